@@ -1,4 +1,5 @@
 from betty.documentation import _prebuild_documentation
+from betty.project.extension.cotton_candy import _prebuild_cotton_candy_templates
 from betty.project.extension.webpack import _prebuild_webpack_assets
 
 
@@ -7,4 +8,5 @@ async def prebuild() -> None:
     Prebuild assets for inclusion in package builds.
     """
     await _prebuild_webpack_assets()
+    await _prebuild_cotton_candy_templates()
     await _prebuild_documentation()
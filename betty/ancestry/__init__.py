@@ -4,8 +4,10 @@ Provide Betty's main data model.
 
 from __future__ import annotations
 
+import pickle
 from contextlib import contextmanager
-from typing import Iterable, final, TYPE_CHECKING
+from io import BytesIO
+from typing import Iterable, final, TYPE_CHECKING, Any
 
 from betty.model import Entity
 from betty.model.association import AssociationRegistry
@@ -13,7 +15,7 @@ from betty.model.collections import MultipleTypesEntityCollection
 
 if TYPE_CHECKING:
     from betty.plugin import PluginIdToTypeMapping
-    from collections.abc import Iterator
+    from collections.abc import Iterator, Mapping, Sequence, Callable
 
 
 @final
@@ -32,6 +34,26 @@ class Ancestry(MultipleTypesEntityCollection[Entity]):
         )
         self._check_graph = True
 
+    def __reduce__(
+        self,
+    ) -> tuple[
+        Callable[[PluginIdToTypeMapping[Entity], bytes], Ancestry],
+        tuple[PluginIdToTypeMapping[Entity], bytes],
+    ]:
+        # Entities reference each other, so pickling them recursively exceeds the maximum recursion depth for larger
+        # ancestries. Instead, pickle each entity's state separately, with references to other entities replaced by
+        # their indices, so that references can be restored after all entities have been created.
+        entities = [*self]
+        entity_indices = {id(entity): index for index, entity in enumerate(entities)}
+        pickled = BytesIO()
+        pickler = _EntityPickler(pickled, entity_indices)
+        pickler.dump([type(entity) for entity in entities])
+        pickler.dump([entity.__getstate__() for entity in entities])
+        return _unpickle_ancestry, (
+            self._entity_type_id_to_type_mapping,
+            pickled.getvalue(),
+        )
+
     @contextmanager
     def unchecked(self) -> Iterator[None]:
         """
@@ -56,3 +78,49 @@ class Ancestry(MultipleTypesEntityCollection[Entity]):
             for association in AssociationRegistry.get_all_associations(entity):
                 for associate in association.get_associates(entity):
                     yield associate
+
+
+class _EntityPickler(pickle.Pickler):
+    def __init__(self, file: BytesIO, entity_indices: Mapping[int, int]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._entity_indices = entity_indices
+
+    def persistent_id(self, obj: Any) -> int | None:
+        return self._entity_indices.get(id(obj))
+
+
+class _EntityUnpickler(pickle.Unpickler):
+    def __init__(self, file: BytesIO):
+        super().__init__(file)
+        self.entities: Sequence[Entity] = []
+
+    def persistent_load(self, pid: Any) -> Entity:
+        return self.entities[int(pid)]
+
+
+def _set_entity_state(entity: Entity, state: Any) -> None:
+    # This mirrors how pickle restores the state of objects without a __setstate__() method.
+    slot_state = None
+    if isinstance(state, tuple):
+        state, slot_state = state
+    if state:
+        entity.__dict__.update(state)
+    if slot_state:
+        for name, value in slot_state.items():
+            setattr(entity, name, value)
+
+
+def _unpickle_ancestry(
+    entity_type_id_to_type_mapping: PluginIdToTypeMapping[Entity], pickled: bytes
+) -> Ancestry:
+    unpickler = _EntityUnpickler(BytesIO(pickled))
+    entity_types: Sequence[type[Entity]] = unpickler.load()
+    unpickler.entities = [
+        entity_type.__new__(entity_type) for entity_type in entity_types
+    ]
+    for entity, state in zip(unpickler.entities, unpickler.load(), strict=True):
+        _set_entity_state(entity, state)
+    ancestry = Ancestry(entity_type_id_to_type_mapping=entity_type_id_to_type_mapping)
+    with ancestry.unchecked():
+        ancestry.add(*unpickler.entities)
+    return ancestry
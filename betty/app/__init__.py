@@ -87,7 +87,10 @@ class App(Configurable[AppConfiguration], TargetFactory, CoreComponent):
         yield cls(
             configuration,
             Path(environ.get("BETTY_CACHE_DIRECTORY", HOME_DIRECTORY_PATH / "cache")),
-            cache_factory=lambda app: PickledFileCache[Any](app._cache_directory_path),
+            cache_factory=lambda app: PickledFileCache[Any](
+                app._cache_directory_path,
+                max_size=app.configuration.cache_max_size,
+            ),
         )
 
     @classmethod
@@ -206,7 +209,10 @@ class App(Configurable[AppConfiguration], TargetFactory, CoreComponent):
         """
         if self._binary_file_cache is None:
             self.assert_bootstrapped()
-            self._binary_file_cache = BinaryFileCache(self._cache_directory_path)
+            self._binary_file_cache = BinaryFileCache(
+                self._cache_directory_path,
+                max_size=self.configuration.cache_max_size,
+            )
         return self._binary_file_cache
 
     @property
@@ -15,6 +15,10 @@ from betty.assertion import (
     assert_str,
     assert_setattr,
     assert_locale,
+    assert_int,
+    assert_none,
+    assert_or,
+    assert_positive_number,
 )
 from betty.config import Configuration
 
@@ -34,9 +38,11 @@ class AppConfiguration(Configuration):
         self,
         *,
         locale: str | None = None,
+        cache_max_size: int | None = None,
     ):
         super().__init__()
         self._locale: str | None = locale
+        self._cache_max_size = cache_max_size
 
     @property
     def locale(self) -> str | None:
@@ -49,12 +55,32 @@ class AppConfiguration(Configuration):
     def locale(self, locale: str) -> None:
         self._locale = assert_locale()(locale)
 
+    @property
+    def cache_max_size(self) -> int | None:
+        """
+        The maximum total size of the cache items in each cache scope, in bytes.
+
+        If ``None``, caches are not limited in size.
+        """
+        return self._cache_max_size
+
+    @cache_max_size.setter
+    def cache_max_size(self, cache_max_size: int | None) -> None:
+        if cache_max_size is not None:
+            assert_positive_number()(cache_max_size)
+        self._cache_max_size = cache_max_size
+
     @override
     def load(self, dump: Dump) -> None:
         assert_record(
-            OptionalField("locale", assert_str() | assert_setattr(self, "locale"))
+            OptionalField("locale", assert_str() | assert_setattr(self, "locale")),
+            OptionalField(
+                "cache_max_size",
+                assert_or(assert_int(), assert_none())
+                | assert_setattr(self, "cache_max_size"),
+            ),
         )(dump)
 
     @override
     def dump(self) -> DumpMapping[Dump]:
-        return {"locale": self.locale}
+        return {"locale": self.locale, "cache_max_size": self.cache_max_size}
@@ -7,9 +7,12 @@ from __future__ import annotations
 import asyncio
 import shutil
 from abc import abstractmethod
+from collections import OrderedDict
 from contextlib import suppress
-from os import utime
+from os import utime, scandir
 from pickle import dumps, loads
+from threading import Lock
+from time import time, monotonic
 from typing import Generic, Self, TYPE_CHECKING, TypeVar, final
 
 import aiofiles
@@ -19,11 +22,12 @@ from typing_extensions import override
 from betty.cache import CacheItem
 from betty.cache._base import _CommonCacheBase
 from betty.hashid import hashid
+from betty.os import write_file_atomically
 from betty.typing import threadsafe
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence, MutableMapping
     from pathlib import Path
-    from collections.abc import Sequence
 
 
 _CacheItemValueCoT = TypeVar("_CacheItemValueCoT", covariant=True)
@@ -78,6 +82,12 @@ class _FileCache(
 ):
     """
     Provide a cache that persists cache items on a file system.
+
+    Cache items are written to temporary files first, and then moved into place, so that interrupted writes never
+    leave behind incomplete cache items.
+
+    :param max_size: The maximum total size of the cache items in each scope, in bytes. When a scope exceeds it, its
+        least recently used cache items are removed. Nested scopes count towards their own maximum size only.
     """
 
     _cache_item_cls: type[_FileCacheItem[_CacheItemValueContraT]]
@@ -87,13 +97,17 @@ class _FileCache(
         cache_directory_path: Path,
         *,
         scopes: Sequence[str] | None = None,
+        max_size: int | None = None,
     ):
         super().__init__(scopes=scopes)
         self._root_path = cache_directory_path
+        self._max_size = max_size
 
     @override
     def _with_scope(self, scope: str) -> Self:
-        return type(self)(self._root_path, scopes=(*self._scopes, scope))
+        return type(self)(
+            self._root_path, scopes=(*self._scopes, scope), max_size=self._max_size
+        )
 
     def _cache_item_file_path(self, cache_item_id: str) -> Path:
         return self._path / hashid(cache_item_id)
@@ -108,12 +122,12 @@ class _FileCache(
     ) -> CacheItem[_CacheItemValueContraT] | None:
         try:
             cache_item_file_path = self._cache_item_file_path(cache_item_id)
-            return self._cache_item_cls(
-                await getmtime(cache_item_file_path),
-                cache_item_file_path,
-            )
+            modified = await getmtime(cache_item_file_path)
         except OSError:
             return None
+        if self._max_size is not None:
+            await asyncio.to_thread(_access, cache_item_file_path, modified)
+        return self._cache_item_cls(modified, cache_item_file_path)
 
     @override
     async def _set(
@@ -130,6 +144,10 @@ class _FileCache(
         except FileNotFoundError:
             await aiofiles.os.makedirs(cache_item_file_path.parent, exist_ok=True)
             await self._write(cache_item_file_path, value, modified)
+        if self._max_size is not None:
+            await asyncio.to_thread(
+                _account, cache_item_file_path, len(value), self._max_size
+            )
 
     async def _write(
         self,
@@ -137,26 +155,130 @@ class _FileCache(
         value: bytes,
         modified: int | float | None = None,
     ) -> None:
-        async with aiofiles.open(cache_item_file_path, "wb") as f:
-            await f.write(value)
-        if modified is not None:
-            await asyncio.to_thread(utime, cache_item_file_path, (modified, modified))
+        await asyncio.to_thread(
+            write_file_atomically, cache_item_file_path, value, modified=modified
+        )
 
     @override
     async def _delete(self, cache_item_id: str) -> None:
+        cache_item_file_path = self._cache_item_file_path(cache_item_id)
         with suppress(FileNotFoundError):
-            await aiofiles.os.remove(self._cache_item_file_path(cache_item_id))
+            await aiofiles.os.remove(cache_item_file_path)
+        index = _get_index(self._path)
+        with index.lock:
+            if index.sizes is not None:
+                index.size -= index.sizes.pop(cache_item_file_path.name, 0)
 
     @override
     async def _clear(self) -> None:
         with suppress(FileNotFoundError):
             await asyncio.to_thread(shutil.rmtree, self._path)
+        with _indexes_lock:
+            indexes = [
+                index
+                for path, index in _indexes.items()
+                if path == self._path or self._path in path.parents
+            ]
+        for index in indexes:
+            with index.lock:
+                index.sizes = None
+                index.size = 0
 
     @property
     def _path(self) -> Path:
         return self._root_path.joinpath(*self._scopes)
 
 
+@final
+class _Index:
+    """
+    The sizes of the cache item files in a scope directory, ordered from least to most recently used.
+    """
+
+    def __init__(self):
+        self.sizes: OrderedDict[str, int] | None = None
+        self.size = 0
+        self.scanned = 0.0
+        self.lock = Lock()
+
+    def load(self, directory_path: Path) -> OrderedDict[str, int]:
+        if self.sizes is None:
+            self.scan(directory_path)
+            assert self.sizes is not None
+        return self.sizes
+
+    def scan(self, directory_path: Path) -> None:
+        # Scan the scope's own directory only, in the order its cache items were last used.
+        entries = []
+        with suppress(FileNotFoundError), scandir(directory_path) as directory:
+            for entry in directory:
+                # Skip nested scopes and temporary files.
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                with suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, entry.name, stat.st_size))
+        self.sizes = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.size = sum(self.sizes.values())
+        self.scanned = monotonic()
+
+
+# The number of seconds after which an index is rebuilt from its scope directory, to include changes by other processes.
+_INDEX_SCAN_INTERVAL = 60
+
+
+# All cache instances for the same scope directory share a single index, so that they account for each other's cache
+# items.
+_indexes: MutableMapping[Path, _Index] = {}
+_indexes_lock = Lock()
+
+
+def _get_index(directory_path: Path) -> _Index:
+    with _indexes_lock:
+        try:
+            return _indexes[directory_path]
+        except KeyError:
+            index = _indexes[directory_path] = _Index()
+            return index
+
+
+def _access(cache_item_file_path: Path, modified: int | float) -> None:
+    # Update the access time only, because the modification time is the cache item's modification time.
+    with suppress(FileNotFoundError):
+        utime(cache_item_file_path, (time(), modified))
+    index = _get_index(cache_item_file_path.parent)
+    with index.lock:
+        sizes = index.load(cache_item_file_path.parent)
+        if cache_item_file_path.name in sizes:
+            sizes.move_to_end(cache_item_file_path.name)
+
+
+def _account(cache_item_file_path: Path, size: int, max_size: int) -> None:
+    directory_path = cache_item_file_path.parent
+    cache_item_file_name = cache_item_file_path.name
+    index = _get_index(directory_path)
+    with index.lock:
+        sizes = index.load(directory_path)
+        index.size += size - sizes.pop(cache_item_file_name, 0)
+        sizes[cache_item_file_name] = size
+        if (
+            index.size <= max_size
+            and monotonic() - index.scanned < _INDEX_SCAN_INTERVAL
+        ):
+            return
+        # Other processes, and code that writes cache item files directly, may have changed the scope without this
+        # index knowing about it, so start from the actual cache item files.
+        index.scan(directory_path)
+        sizes = index.load(directory_path)
+        if cache_item_file_name in sizes:
+            sizes.move_to_end(cache_item_file_name)
+        # Evict the least recently used cache items, but never the cache item that was just added.
+        while index.size > max_size and len(sizes) > 1:
+            evicted_file_name, evicted_size = sizes.popitem(last=False)
+            (directory_path / evicted_file_name).unlink(missing_ok=True)
+            index.size -= evicted_size
+
+
 @final
 @threadsafe
 class PickledFileCache(
@@ -200,3 +322,22 @@ class BinaryFileCache(_FileCache[bytes]):
         The cache item itself may or may not exist.
         """
         return self._cache_item_file_path(cache_item_id)
+
+    def add_file(self, cache_item_file_path: Path) -> None:
+        """
+        Add a cache item whose file was written directly, rather than through this cache.
+
+        This makes the cache item count towards the cache's maximum size. This blocks, so call it from a worker thread
+        in asynchronous code.
+
+        :param cache_item_file_path: A path returned by :py:meth:`betty.cache.file.BinaryFileCache.cache_item_file_path`
+            of this cache or of any of its scopes.
+        """
+        if self._max_size is None:
+            return
+        with suppress(FileNotFoundError):
+            _account(
+                cache_item_file_path,
+                cache_item_file_path.stat().st_size,
+                self._max_size,
+            )
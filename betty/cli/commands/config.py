@@ -53,9 +53,18 @@ class Config(ShorthandPluginBase, AppDependentFactory, Command):
             default=DEFAULT_LOCALE,
             help="Set the locale for Betty's user interface. This must be an IETF BCP 47 language tag.",
         )
-        async def config(*, locale: str) -> None:
+        @click.option(
+            "--cache-max-size",
+            "cache_max_size",
+            type=click.IntRange(min=1),
+            metavar="BYTES",
+            help="Set the maximum size of each cache scope, in bytes. When a cache scope grows larger, its least recently used cache items are removed.",
+        )
+        async def config(*, locale: str, cache_max_size: int | None) -> None:
             logger = getLogger(__name__)
             self._app.configuration.locale = locale
+            if cache_max_size is not None:
+                self._app.configuration.cache_max_size = cache_max_size
             new_localizer = await self._app.localizers.get(locale)
             logger.info(
                 new_localizer._("Betty will talk to you in {locale}").format(
@@ -2,6 +2,7 @@ from __future__ import annotations  # noqa D100
 
 from typing import TYPE_CHECKING, final, Self
 
+import asyncclick as click
 from typing_extensions import override
 
 from betty.app.factory import AppDependentFactory
@@ -11,7 +12,6 @@ from betty.plugin import ShorthandPluginBase
 
 if TYPE_CHECKING:
     from betty.project import Project
-    import asyncclick as click
     from betty.app import App
 
 
@@ -44,11 +44,54 @@ class Generate(ShorthandPluginBase, AppDependentFactory, Command):
             if description
             else self.plugin_label().localize(localizer),
         )
+        @click.option(
+            "--incremental",
+            is_flag=True,
+            default=False,
+            help="Only generate the pages and resources of entities that changed since the previous incremental generation.",
+        )
+        @click.option(
+            "--snapshot/--no-snapshot",
+            default=True,
+            help="Whether to restore a snapshot of the previously loaded ancestry if its inputs did not change, instead of loading the ancestry again. Defaults to --snapshot.",
+        )
+        @click.option(
+            "--processes",
+            type=click.IntRange(min=1),
+            default=1,
+            help="The number of processes to generate entity pages and resources in. Defaults to 1.",
+        )
+        @click.option(
+            "--precompress",
+            is_flag=True,
+            default=False,
+            help="Also write gzip and brotli compressed variants of the generated HTML and JSON files, for web servers to serve instead.",
+        )
+        @click.option(
+            "--concurrency",
+            type=click.IntRange(min=1),
+            default=512,
+            help="The maximum number of generation jobs to run at the same time. Lower this to use less memory. Defaults to 512.",
+        )
         @project_option
-        async def generate(project: Project) -> None:
+        async def generate(
+            project: Project,
+            *,
+            incremental: bool,
+            snapshot: bool,
+            processes: int,
+            precompress: bool,
+            concurrency: int,
+        ) -> None:
             from betty.project import generate, load
 
-            await load.load(project)
-            await generate.generate(project)
+            await load.load(project, snapshot=snapshot)
+            await generate.generate(
+                project,
+                incremental=incremental,
+                processes=processes,
+                precompress=precompress,
+                concurrency=concurrency,
+            )
 
         return generate
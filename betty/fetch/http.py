@@ -3,14 +3,23 @@ Fetch content from the internet.
 """
 
 import asyncio
-from collections.abc import Callable, Awaitable
+from asyncio import Semaphore
+from collections import defaultdict
+from contextlib import suppress
+from collections.abc import Callable, Awaitable, Mapping, MutableMapping
 from logging import getLogger
+from os import utime
 from pathlib import Path
 from time import time
 from typing import TypeVar
+from urllib.parse import urlparse
 
+from aiofiles.os import makedirs, remove, replace
+from aiofiles.tempfile import NamedTemporaryFile
 from aiohttp import ClientSession, ClientResponse, ClientError
-from betty.cache import Cache
+from multidict import CIMultiDict
+
+from betty.cache import Cache, CacheItem, CacheItemValueSetter
 from betty.cache.file import BinaryFileCache
 from betty.fetch import Fetcher, FetchResponse, FetchError
 from betty.hashid import hashid
@@ -18,11 +27,34 @@ from betty.locale.localizable import plain
 from typing_extensions import override
 
 _CacheItemValueT = TypeVar("_CacheItemValueT")
+_FetchedT = TypeVar("_FetchedT")
+
+
+_FILE_CHUNK_SIZE = 2**16
+
+
+_VALIDATOR_HEADER_NAMES = {
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
+
+
+def _conditional_request_headers(response_headers: Mapping[str, str]) -> dict[str, str]:
+    return {
+        request_header_name: response_headers[response_header_name]
+        for response_header_name, request_header_name in _VALIDATOR_HEADER_NAMES.items()
+        if response_header_name in response_headers
+    }
 
 
 class HttpFetcher(Fetcher):
     """
     Fetch content from the internet using an HTTP client.
+
+    Expired responses are revalidated with conditional requests if the server provided an ``ETag`` or
+    ``Last-Modified`` header, so that unchanged content is not downloaded again.
+
+    :param host_concurrency: The maximum number of requests to make to a single host at the same time.
     """
 
     def __init__(
@@ -32,76 +64,209 @@ class HttpFetcher(Fetcher):
         binary_file_cache: BinaryFileCache,
         # Default to seven days.
         ttl: int = 86400 * 7,
+        *,
+        host_concurrency: int = 5,
     ):
         self._response_cache = response_cache
         self._binary_file_cache = binary_file_cache
+        # Files are cached as bytes, so their validators are cached separately.
+        self._file_validator_cache = response_cache.with_scope("file-validators")
         self._ttl = ttl
         self._http_client = http_client
+        self._host_semaphores: MutableMapping[str, Semaphore] = defaultdict(
+            lambda: Semaphore(host_concurrency)
+        )
         self._logger = getLogger(__name__)
 
     async def _fetch(
         self,
         url: str,
         cache: Cache[_CacheItemValueT],
-        response_mapper: Callable[[ClientResponse], Awaitable[_CacheItemValueT]],
-    ) -> tuple[_CacheItemValueT, str]:
+        load_cache_item: Callable[
+            [str, CacheItem[_CacheItemValueT]], Awaitable[_FetchedT]
+        ],
+        store_response: Callable[
+            [str, ClientResponse, CacheItemValueSetter[_CacheItemValueT]],
+            Awaitable[_FetchedT],
+        ],
+        get_validators: Callable[
+            [str, CacheItem[_CacheItemValueT]], Awaitable[Mapping[str, str]]
+        ],
+        revalidate: Callable[
+            [str, CacheItem[_CacheItemValueT], CacheItemValueSetter[_CacheItemValueT]],
+            Awaitable[None],
+        ],
+    ) -> _FetchedT:
         cache_item_id = hashid(url)
 
-        response_data: _CacheItemValueT | None = None
+        # Return fresh cache items without waiting for any other fetches of the same URL.
+        async with cache.get(cache_item_id) as cache_item:
+            if cache_item and cache_item.modified + self._ttl > time():
+                return await load_cache_item(cache_item_id, cache_item)
+
         async with cache.getset(cache_item_id) as (cache_item, setter):
             if cache_item and cache_item.modified + self._ttl > time():
-                response_data = await cache_item.value()
-            else:
-                self._logger.debug(f'Fetching "{url}"...')
-                try:
-                    async with self._http_client.get(url) as response:
-                        response_data = await response_mapper(response)
-                except ClientError as error:
-                    self._logger.warning(
-                        f'Could not successfully connect to "{url}": {error}'
-                    )
-                except asyncio.TimeoutError:
-                    self._logger.warning(f'Timeout when connecting to "{url}"')
-                else:
-                    await setter(response_data)
-
-        if response_data is None:
-            if cache_item:
-                response_data = await cache_item.value()
-            else:
-                raise FetchError(
-                    plain(
-                        f'Could neither fetch "{url}", nor find an old version in the cache.'
-                    )
+                return await load_cache_item(cache_item_id, cache_item)
+            request_headers = (
+                _conditional_request_headers(
+                    await get_validators(cache_item_id, cache_item)
                 )
+                if cache_item
+                else {}
+            )
+            self._logger.debug(f'Fetching "{url}"...')
+            try:
+                async with (
+                    self._host_semaphores[urlparse(url).netloc],
+                    self._http_client.get(url, headers=request_headers) as response,
+                ):
+                    if response.status == 304 and cache_item:
+                        await revalidate(cache_item_id, cache_item, setter)
+                        return await load_cache_item(cache_item_id, cache_item)
+                    return await store_response(cache_item_id, response, setter)
+            except ClientError as error:
+                self._logger.warning(
+                    f'Could not successfully connect to "{url}": {error}'
+                )
+            except asyncio.TimeoutError:
+                self._logger.warning(f'Timeout when connecting to "{url}"')
+
+        if cache_item:
+            return await load_cache_item(cache_item_id, cache_item)
+        raise FetchError(
+            plain(f'Could neither fetch "{url}", nor find an old version in the cache.')
+        )
 
-        return response_data, cache_item_id
+    async def _load_response(
+        self, cache_item_id: str, cache_item: CacheItem[FetchResponse]
+    ) -> FetchResponse:
+        return await cache_item.value()
 
-    async def _map_response(self, response: ClientResponse) -> FetchResponse:
-        return FetchResponse(
+    async def _store_response(
+        self,
+        cache_item_id: str,
+        response: ClientResponse,
+        setter: CacheItemValueSetter[FetchResponse],
+    ) -> FetchResponse:
+        fetch_response = FetchResponse(
             response.headers.copy(),
             await response.read(),
             response.get_encoding(),
         )
+        await setter(fetch_response)
+        return fetch_response
+
+    async def _get_response_validators(
+        self, cache_item_id: str, cache_item: CacheItem[FetchResponse]
+    ) -> Mapping[str, str]:
+        return (await cache_item.value()).headers
+
+    async def _revalidate_response(
+        self,
+        cache_item_id: str,
+        cache_item: CacheItem[FetchResponse],
+        setter: CacheItemValueSetter[FetchResponse],
+    ) -> None:
+        await setter(await cache_item.value())
 
     @override
     async def fetch(self, url: str) -> FetchResponse:
         """
         Fetch an HTTP resource.
         """
-        response_data, _ = await self._fetch(
-            url, self._response_cache, self._map_response
+        return await self._fetch(
+            url,
+            self._response_cache,
+            self._load_response,
+            self._store_response,
+            self._get_response_validators,
+            self._revalidate_response,
+        )
+
+    async def _load_file(
+        self, cache_item_id: str, cache_item: CacheItem[bytes]
+    ) -> Path:
+        return self._binary_file_cache.cache_item_file_path(cache_item_id)
+
+    async def _store_file(
+        self,
+        cache_item_id: str,
+        response: ClientResponse,
+        setter: CacheItemValueSetter[bytes],
+    ) -> Path:
+        cache_item_file_path = self._binary_file_cache.cache_item_file_path(
+            cache_item_id
+        )
+        await makedirs(cache_item_file_path.parent, exist_ok=True)
+        # Stream the response into a temporary file next to the cache item, and move it into place once it is
+        # complete, so that the cache item is never incomplete, and never has to be kept in memory in its entirety.
+        temporary_file_path = None
+        try:
+            async with NamedTemporaryFile(
+                dir=cache_item_file_path.parent,
+                prefix=f".{cache_item_file_path.name}.",
+                delete=False,
+            ) as f:
+                temporary_file_path = Path(str(f.name))
+                async for chunk in response.content.iter_chunked(_FILE_CHUNK_SIZE):
+                    await f.write(chunk)
+            await replace(temporary_file_path, cache_item_file_path)
+        except BaseException:
+            if temporary_file_path is not None:
+                with suppress(FileNotFoundError):
+                    await remove(temporary_file_path)
+            raise
+        await asyncio.to_thread(self._binary_file_cache.add_file, cache_item_file_path)
+        await self._file_validator_cache.set(
+            cache_item_id,
+            FetchResponse(
+                CIMultiDict(
+                    (header_name, response.headers[header_name])
+                    for header_name in _VALIDATOR_HEADER_NAMES
+                    if header_name in response.headers
+                ),
+                b"",
+                "utf-8",
+            ),
+        )
+        return cache_item_file_path
+
+    async def _get_file_validators(
+        self, cache_item_id: str, cache_item: CacheItem[bytes]
+    ) -> Mapping[str, str]:
+        async with self._file_validator_cache.get(cache_item_id) as validator_item:
+            if validator_item is None:
+                return {}
+            return (await validator_item.value()).headers
+
+    async def _revalidate_file(
+        self,
+        cache_item_id: str,
+        cache_item: CacheItem[bytes],
+        setter: CacheItemValueSetter[bytes],
+    ) -> None:
+        # Refresh the file's modification time, rather than writing its (potentially large) content again.
+        modified = time()
+        await asyncio.to_thread(
+            utime,
+            self._binary_file_cache.cache_item_file_path(cache_item_id),
+            (modified, modified),
         )
-        return response_data
 
     @override
     async def fetch_file(self, url: str) -> Path:
         """
         Fetch a file.
 
+        The file is streamed to the binary file cache, so that it is never kept in memory in its entirety.
+
         :return: The path to the file on disk.
         """
-        _, cache_item_id = await self._fetch(
-            url, self._binary_file_cache, ClientResponse.read
+        return await self._fetch(
+            url,
+            self._binary_file_cache,
+            self._load_file,
+            self._store_file,
+            self._get_file_validators,
+            self._revalidate_file,
         )
-        return self._binary_file_cache.cache_item_file_path(cache_item_id)
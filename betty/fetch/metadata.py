@@ -0,0 +1,188 @@
+"""
+Fetch metadata about linked web pages.
+"""
+
+from __future__ import annotations
+
+from asyncio import create_task, Semaphore, Task
+from codecs import getincrementaldecoder
+from collections import defaultdict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from logging import getLogger
+from time import time
+from typing import final, TYPE_CHECKING
+from urllib.parse import urlparse
+
+from typing_extensions import override
+
+from betty.fetch import FetchError
+from betty.hashid import hashid
+from betty.media_type import MediaType, InvalidMediaType
+
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping
+    from betty.cache import Cache
+    from betty.fetch import Fetcher, FetchResponse
+
+
+@final
+@dataclass(frozen=True)
+class HtmlMetadata:
+    """
+    The metadata of an HTML page.
+    """
+
+    title: str | None
+    description: str | None
+
+
+class _HtmlMetadataParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.done = False
+        self.title: str | None = None
+        self._title_data: list[str] | None = None
+        self._descriptions: MutableMapping[tuple[str, str], str] = {}
+
+    @property
+    def description(self) -> str | None:
+        for attr_name, attr_value in (
+            ("name", "description"),
+            ("property", "og:description"),
+        ):
+            description = self._descriptions.get((attr_name, attr_value))
+            if description is not None:
+                return description
+        return None
+
+    @override
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+        elif tag == "title" and self.title is None:
+            self._title_data = []
+        elif tag == "meta":
+            meta_attrs = dict(attrs)
+            content = meta_attrs.get("content")
+            if content is None:
+                return
+            for attr_name in ("name", "property"):
+                attr_value = meta_attrs.get(attr_name)
+                if attr_value is not None:
+                    self._descriptions.setdefault((attr_name, attr_value), content)
+
+    @override
+    def handle_endtag(self, tag: str) -> None:
+        if self.done:
+            return
+        if tag == "head":
+            self.done = True
+        elif tag == "title" and self._title_data is not None:
+            self.title = "".join(self._title_data).strip() or None
+            self._title_data = None
+
+    @override
+    def handle_data(self, data: str) -> None:
+        if self._title_data is not None:
+            self._title_data.append(data)
+
+
+def parse_html_metadata(
+    html: bytes, encoding: str, *, chunk_size: int = 4096
+) -> HtmlMetadata:
+    """
+    Parse the metadata from an HTML page.
+
+    Only the page's ``<head>`` is parsed. The page is decoded and parsed in chunks, and parsing stops as soon as the
+    end of the ``<head>`` is found.
+    """
+    decoder = getincrementaldecoder(encoding)(errors="replace")
+    parser = _HtmlMetadataParser()
+    for offset in range(0, len(html), chunk_size):
+        parser.feed(decoder.decode(html[offset : offset + chunk_size]))
+        if parser.done:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return HtmlMetadata(parser.title, parser.description)
+
+
+_HTML_MEDIA_TYPES = (
+    ("text", "html", None),
+    ("application", "xhtml", "+xml"),
+)
+
+
+@final
+class LinkMetadataFetcher:
+    """
+    Fetch the metadata of linked HTML pages.
+
+    Each URL is fetched at most once, and no more than ``host_concurrency`` URLs are fetched from the same host at the
+    same time. Metadata is stored in the given cache, so that pages are not fetched and parsed again until
+    ``ttl`` seconds have passed.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        cache: Cache[HtmlMetadata | None],
+        *,
+        host_concurrency: int = 4,
+        # Default to seven days.
+        ttl: int = 86400 * 7,
+    ):
+        self._fetcher = fetcher
+        self._cache = cache
+        self._ttl = ttl
+        self._fetches: MutableMapping[str, Task[HtmlMetadata | None]] = {}
+        self._host_semaphores: MutableMapping[str, Semaphore] = defaultdict(
+            lambda: Semaphore(host_concurrency)
+        )
+
+    async def fetch(self, url: str) -> HtmlMetadata | None:
+        """
+        Fetch the metadata of the HTML page at the given URL.
+
+        :return: The page's metadata, or ``None`` if the URL could not be fetched or is not an HTML page.
+        """
+        try:
+            fetch = self._fetches[url]
+        except KeyError:
+            fetch = self._fetches[url] = create_task(self._fetch(url))
+        return await fetch
+
+    async def _fetch(self, url: str) -> HtmlMetadata | None:
+        cache_item_id = hashid(url)
+        async with self._cache.get(cache_item_id) as cache_item:
+            if cache_item and cache_item.modified + self._ttl > time():
+                return await cache_item.value()
+
+        async with self._host_semaphores[urlparse(url).netloc]:
+            try:
+                response = await self._fetcher.fetch(url)
+            except FetchError as error:
+                getLogger(__name__).warning(str(error))
+                return None
+
+        metadata = _parse_response_metadata(response)
+        await self._cache.set(cache_item_id, metadata)
+        return metadata
+
+
+def _parse_response_metadata(response: FetchResponse) -> HtmlMetadata | None:
+    try:
+        content_type = MediaType(response.headers["Content-Type"])
+    except (KeyError, InvalidMediaType):
+        return None
+    if (
+        content_type.type,
+        content_type.subtype,
+        content_type.suffix,
+    ) not in _HTML_MEDIA_TYPES:
+        return None
+    return parse_html_metadata(response.body, response.encoding)
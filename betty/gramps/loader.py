@@ -11,12 +11,12 @@ from collections import defaultdict
 from contextlib import suppress, ExitStack
 from dataclasses import dataclass
 from enum import Enum
+from io import BytesIO, BufferedIOBase
 from logging import getLogger
 from pathlib import Path
 from typing import Iterable, cast, TYPE_CHECKING, TypeVar, Generic, final
 from xml.etree import ElementTree
 
-import aiofiles
 from aiofiles.tempfile import TemporaryDirectory
 from geopy import Point
 from lxml import etree
@@ -67,7 +67,15 @@ if TYPE_CHECKING:
     from betty.ancestry.gender import Gender
     from betty.factory import Factory
     from betty.locale.localizer import Localizer
-    from collections.abc import MutableMapping, Mapping, Sequence, Awaitable, Callable
+    from collections.abc import (
+        MutableMapping,
+        Mapping,
+        Sequence,
+        Awaitable,
+        Callable,
+        MutableSequence,
+        MutableSet,
+    )
 
 _EntityT = TypeVar("_EntityT", bound=Entity)
 
@@ -173,14 +181,15 @@ class GrampsLoader:
         super().__init__()
         self._ancestry = ancestry
         self._handles_to_entities: MutableMapping[str, Entity] = {}
+        self._added_entities: MutableSequence[Entity] = []
         self._factory = factory
         self._attribute_prefix_key = attribute_prefix_key
         self._added_entity_counts: MutableMapping[type[Entity], int] = defaultdict(
             lambda: 0
         )
-        self._tree: ElementTree.ElementTree | None = None
         self._gramps_tree_directory_path: Path | None = None
         self._loaded = False
+        self._loaded_sections: MutableSet[str] = set()
         self._localizer = localizer
         self._copyright_notices = copyright_notices
         self._licenses = licenses
@@ -195,6 +204,8 @@ class GrampsLoader:
 
         :raises betty.gramps.error.GrampsError:
         """
+        self._assert_unused()
+
         file_path = file_path.resolve()
         logger = getLogger(__name__)
         logger.info(
@@ -203,22 +214,20 @@ class GrampsLoader:
             )
         )
 
-        with suppress(UserFacingGrampsError):
-            await self.load_gpkg(file_path)
+        if await self._load_file_as(lambda: self.load_gpkg(file_path)):
             return
 
-        with suppress(UserFacingGrampsError):
-            await self.load_gramps(file_path)
+        if await self._load_file_as(lambda: self.load_gramps(file_path)):
             return
 
         try:
-            async with aiofiles.open(file_path, mode="rb") as f:
-                xml = await f.read()
+            with open(file_path, mode="rb") as f:
+                if await self._load_file_as(
+                    lambda: self._load_xml_file(f, Path(file_path.anchor))
+                ):
+                    return
         except FileNotFoundError:
             raise GrampsFileNotFound.new(file_path) from None
-        with suppress(UserFacingGrampsError):
-            await self._load_xml(xml, Path(file_path.anchor))
-            return
 
         raise UserFacingGrampsError(
             _(
@@ -226,6 +235,16 @@ class GrampsLoader:
             ).format(file_path=str(file_path))
         )
 
+    async def _load_file_as(self, load: Callable[[], Awaitable[None]]) -> bool:
+        try:
+            await load()
+        except UserFacingGrampsError:
+            # Once the file turned out to contain XML, it is of this format but broken, so do not try any others.
+            if self._loaded:
+                raise
+            return False
+        return True
+
     async def load_gramps(self, gramps_path: Path) -> None:
         """
         Load family history data from a Gramps *.gramps file.
@@ -235,11 +254,12 @@ class GrampsLoader:
         gramps_path = gramps_path.resolve()
         try:
             with gzip.open(gramps_path) as f:
-                xml = f.read()
-            await self._load_xml(xml, rootname(gramps_path))
+                # Fail before using the loader if this is not a gzip file at all.
+                f.peek(1)
+                await self._load_xml_file(f, rootname(gramps_path))
         except FileNotFoundError:
             raise GrampsFileNotFound.new(gramps_path) from None
-        except OSError as error:
+        except (OSError, EOFError) as error:
             raise UserFacingGrampsError(
                 _("Could not extract {file_path} as a gzip file  (*.gz).").format(
                     file_path=str(gramps_path)
@@ -278,95 +298,174 @@ class GrampsLoader:
 
         :raises betty.gramps.error.GrampsError:
         """
-        await self._load_xml(xml.encode("utf-8"), gramps_tree_directory_path)
-
-    async def _load_xml(self, xml: bytes, gramps_tree_directory_path: Path) -> None:
-        try:
-            tree = cast(  # type: ignore[bad-cast]
-                ElementTree.ElementTree, etree.ElementTree(etree.fromstring(xml))
-            )
-        except etree.ParseError as error:
-            raise UserFacingGrampsError(plain(str(error))) from error
-        await self._load_tree(tree, gramps_tree_directory_path)
+        await self._load_xml_file(
+            BytesIO(xml.encode("utf-8")), gramps_tree_directory_path
+        )
 
-    async def _load_tree(
-        self, tree: ElementTree.ElementTree, gramps_tree_directory_path: Path
+    async def _load_xml_file(
+        self, xml_file: BufferedIOBase, gramps_tree_directory_path: Path
     ) -> None:
         """
-        Load family history data from a Gramps XML tree.
+        Load family history data from a Gramps XML file.
+
+        The XML is parsed incrementally, and each entity is loaded as soon as its element has been parsed, after which
+        the element is discarded. This means the XML document never needs to be in memory in its entirety. If loading
+        fails, all entities added so far are removed from the ancestry again.
         """
+        self._assert_unused()
+
+        self._gramps_tree_directory_path = gramps_tree_directory_path.resolve()
+
+        try:
+            with self._ancestry.unchecked():
+                await self._load_elements(xml_file)
+        except BaseException as error:
+            self._ancestry.remove(*self._added_entities)
+            self._added_entities.clear()
+            if isinstance(error, etree.ParseError):
+                raise UserFacingGrampsError(plain(str(error))) from error
+            raise
+        self._added_entities.clear()
+
+        resolve(*self._ancestry)
+
+    def _assert_unused(self) -> None:
         if self._loaded:
             raise LoaderUsedAlready("This loader has been used up.")
 
-        self._loaded = True
-        self._tree = tree
-        self._gramps_tree_directory_path = gramps_tree_directory_path.resolve()
+    async def _load_elements(self, xml_file: BufferedIOBase) -> None:
+        # Families reference people directly rather than through resolvers, so they must be loaded after all people.
+        deferred_family_elements: MutableSequence[etree._Element] = []
+        section_entity_counts: Mapping[type[Entity], int] = {}
+        depth = 0
+        for event, element in etree.iterparse(xml_file, events=("start", "end")):
+            # The loader is used up as soon as the XML turns out to be parseable.
+            self._loaded = True
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    section_entity_counts = {**self._added_entity_counts}
+                continue
 
-        logger = getLogger(__name__)
+            depth -= 1
+            if depth == 2:
+                parent = element.getparent()
+                assert parent is not None
+                if (parent.tag, element.tag) == self._qualify(
+                    "families", "family"
+                ) and "people" not in self._loaded_sections:
+                    deferred_family_elements.append(element)
+                    continue
+                await self._load_element(
+                    str(parent.tag),
+                    cast(ElementTree.Element, element),  # type: ignore[bad-cast]
+                )
+                # Free the memory taken by the elements we loaded.
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+            elif depth == 1:
+                section = etree.QName(element).localname
+                self._loaded_sections.add(section)
+                self._log_section(section, section_entity_counts)
+                element.clear()
+                if section == "people":
+                    await self._load_families(deferred_family_elements)
+        await self._load_families(deferred_family_elements)
+
+    async def _load_families(
+        self, family_elements: MutableSequence[etree._Element]
+    ) -> None:
+        for family_element in family_elements:
+            await self._load_family(
+                cast(ElementTree.Element, family_element)  # type: ignore[bad-cast]
+            )
+        family_elements.clear()
 
-        database = self._tree.getroot()
+    def _qualify(self, *tags: str) -> tuple[str, ...]:
+        return tuple(f"{{{self._NS['ns']}}}{tag}" for tag in tags)
+
+    async def _load_element(
+        self, section_tag: str, element: ElementTree.Element
+    ) -> None:
+        if (section_tag, element.tag) == self._qualify("notes", "note"):
+            await self._load_note(element)
+        elif (section_tag, element.tag) == self._qualify("objects", "object"):
+            assert self._gramps_tree_directory_path is not None
+            await self._load_object(element, self._gramps_tree_directory_path)
+        elif (section_tag, element.tag) == self._qualify("repositories", "repository"):
+            await self._load_repository(element)
+        elif (section_tag, element.tag) == self._qualify("sources", "source"):
+            await self._load_source(element)
+        elif (section_tag, element.tag) == self._qualify("citations", "citation"):
+            await self._load_citation(element)
+        elif (section_tag, element.tag) == self._qualify("places", "placeobj"):
+            await self._load_place(element)
+        elif (section_tag, element.tag) == self._qualify("events", "event"):
+            await self._load_event(element)
+        elif (section_tag, element.tag) == self._qualify("people", "person"):
+            await self._load_person(element)
+        elif (section_tag, element.tag) == self._qualify("families", "family"):
+            await self._load_family(element)
 
-        with self._ancestry.unchecked():
-            await self._load_notes(database)
+    def _log_section(
+        self, section: str, section_entity_counts: Mapping[type[Entity], int]
+    ) -> None:
+        def _count(entity_type: type[Entity]) -> int:
+            return self._added_entity_counts[entity_type] - section_entity_counts.get(
+                entity_type, 0
+            )
+
+        logger = getLogger(__name__)
+        if section == "notes":
             logger.info(
                 self._localizer._("Loaded {note_count} notes.").format(
-                    note_count=self._added_entity_counts[Note]
+                    note_count=_count(Note)
                 )
             )
-            await self._load_objects(database, self._gramps_tree_directory_path)
+        elif section == "objects":
             logger.info(
                 self._localizer._("Loaded {file_count} files.").format(
-                    file_count=self._added_entity_counts[File]
+                    file_count=_count(File)
                 )
             )
-
-            await self._load_repositories(database)
-            repository_count = self._added_entity_counts[Source]
+        elif section == "repositories":
             logger.info(
                 self._localizer._(
                     "Loaded {repository_count} repositories as sources."
-                ).format(repository_count=repository_count)
+                ).format(repository_count=_count(Source))
             )
-
-            await self._load_sources(database)
+        elif section == "sources":
             logger.info(
                 self._localizer._("Loaded {source_count} sources.").format(
-                    source_count=self._added_entity_counts[Source] - repository_count
+                    source_count=_count(Source)
                 )
             )
-
-            await self._load_citations(database)
+        elif section == "citations":
             logger.info(
                 self._localizer._("Loaded {citation_count} citations.").format(
-                    citation_count=self._added_entity_counts[Citation]
+                    citation_count=_count(Citation)
                 )
             )
-
-            await self._load_places(database)
+        elif section == "places":
             logger.info(
                 self._localizer._("Loaded {place_count} places.").format(
-                    place_count=self._added_entity_counts[Place]
+                    place_count=_count(Place)
                 )
             )
-
-            await self._load_events(database)
+        elif section == "events":
             logger.info(
                 self._localizer._("Loaded {event_count} events.").format(
-                    event_count=self._added_entity_counts[Event]
+                    event_count=_count(Event)
                 )
             )
-
-            await self._load_people(database)
+        elif section == "people":
             logger.info(
                 self._localizer._("Loaded {person_count} people.").format(
-                    person_count=self._added_entity_counts[Person]
+                    person_count=_count(Person)
                 )
             )
 
-            await self._load_families(database)
-
-        resolve(*self._ancestry)
-
     def _resolve1(
         self, entity_type: type[_EntityT], handle: str
     ) -> _ToOneResolver[_EntityT]:
@@ -379,6 +478,7 @@ class GrampsLoader:
 
     def _add_entity(self, entity: Entity, handle: str | None = None) -> None:
         self._ancestry.add(entity)
+        self._added_entities.append(entity)
         if handle is not None:
             self._handles_to_entities[handle] = entity
         self._added_entity_counts[entity.type] += 1
@@ -468,10 +568,6 @@ class GrampsLoader:
             return date
         return None
 
-    async def _load_notes(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:notes/ns:note"):
-            await self._load_note(element)
-
     async def _load_note(self, element: ElementTree.Element) -> None:
         note_handle = element.get("handle")
         note_id = element.get("id")
@@ -492,12 +588,6 @@ class GrampsLoader:
     ) -> None:
         owner.notes = self._resolve(Note, *self._load_handles("noteref", element))
 
-    async def _load_objects(
-        self, database: ElementTree.Element, gramps_tree_directory_path: Path
-    ) -> None:
-        for element in self._xpath(database, "./ns:objects/ns:object"):
-            await self._load_object(element, gramps_tree_directory_path)
-
     async def _load_object(
         self, element: ElementTree.Element, gramps_tree_directory_path: Path
     ) -> None:
@@ -557,10 +647,6 @@ class GrampsLoader:
         )
         self._load_noteref(file, element)
 
-    async def _load_people(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:people/ns:person"):
-            await self._load_person(element)
-
     async def _load_person(self, element: ElementTree.Element) -> None:
         person_handle = element.get("handle")
         assert person_handle is not None
@@ -644,10 +730,6 @@ class GrampsLoader:
         self._load_urls(person, element)
         self._add_entity(person, person_handle)
 
-    async def _load_families(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:families/ns:family"):
-            await self._load_family(element)
-
     async def _load_family(self, element: ElementTree.Element) -> None:
         children = [
             cast(Person, self._handles_to_entities[child_handle])
@@ -712,10 +794,6 @@ class GrampsLoader:
 
         self._add_entity(presence)
 
-    async def _load_places(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:places/ns:placeobj"):
-            await self._load_place(element)
-
     async def _load_place(self, element: ElementTree.Element) -> None:
         place_handle = element.get("handle")
         assert place_handle is not None
@@ -796,10 +874,6 @@ class GrampsLoader:
                 )
         return None
 
-    async def _load_events(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:events/ns:event"):
-            await self._load_event(element)
-
     async def _load_event(self, element: ElementTree.Element) -> None:
         event_handle = element.get("handle")
         event_id = element.get("id")
@@ -860,10 +934,6 @@ class GrampsLoader:
 
         self._add_entity(event, event_handle)
 
-    async def _load_repositories(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:repositories/ns:repository"):
-            await self._load_repository(element)
-
     async def _load_repository(self, element: ElementTree.Element) -> None:
         repository_source_handle = element.get("handle")
 
@@ -876,10 +946,6 @@ class GrampsLoader:
         self._load_noteref(source, element)
         self._add_entity(source, repository_source_handle)
 
-    async def _load_sources(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:sources/ns:source"):
-            await self._load_source(element)
-
     async def _load_source(self, element: ElementTree.Element) -> None:
         source_handle = element.get("handle")
         try:
@@ -922,10 +988,6 @@ class GrampsLoader:
         self._load_noteref(source, element)
         self._add_entity(source, source_handle)
 
-    async def _load_citations(self, database: ElementTree.Element) -> None:
-        for element in self._xpath(database, "./ns:citations/ns:citation"):
-            await self._load_citation(element)
-
     async def _load_citation(self, element: ElementTree.Element) -> None:
         citation_handle = element.get("handle")
         source_handle = self._xpath1(element, "./ns:sourceref").get("hlink")
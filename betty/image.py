@@ -2,11 +2,30 @@
 Manipulate images.
 """
 
-from typing import TypeAlias
+from __future__ import annotations
 
 import math
+import re
+import warnings
+from asyncio import gather, get_running_loop, to_thread
+from collections import defaultdict
+from contextlib import suppress
+from dataclasses import dataclass
+from io import BytesIO
+from typing import TypeAlias, TYPE_CHECKING, final
 
-from PIL.Image import Image
+from PIL.Image import Image, DecompressionBombWarning, open as open_image
+from pdf2image.pdf2image import convert_from_path, pdfinfo_from_path
+
+from betty.os import write_file_atomically
+
+
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping, Sequence
+    from concurrent.futures import Executor
+    from pathlib import Path
+    from betty.cache.file import BinaryFileCache
+    from betty.media_type import MediaType
 
 
 Percentage: TypeAlias = int
@@ -50,25 +69,32 @@ def resize_cover(
         _assert_area(focus)
         _assert_boundaries(original_image, focus)
 
-    resize_width, resize_height = resize_size
-    focus_left = 0 if focus is None else focus[0] * original_image.width / 100
-    focus_top = 0 if focus is None else focus[1] * original_image.height / 100
-    focus_right = (
-        original_image.width if focus is None else focus[2] * original_image.width / 100
-    )
-    focus_bottom = (
-        original_image.height
-        if focus is None
-        else focus[3] * original_image.height / 100
+    return original_image.crop(
+        _cover_box(original_image.width, original_image.height, resize_size, focus)
+    ).resize(
+        (
+            resize_size[0] or original_image.width,
+            resize_size[1] or original_image.height,
+        )
     )
+
+
+def _cover_box(
+    width: Pixel, height: Pixel, resize_size: Size, focus: FocusArea | None
+) -> tuple[Pixel, Pixel, Pixel, Pixel]:
+    resize_width, resize_height = resize_size
+    focus_left = 0 if focus is None else focus[0] * width / 100
+    focus_top = 0 if focus is None else focus[1] * height / 100
+    focus_right = width if focus is None else focus[2] * width / 100
+    focus_bottom = height if focus is None else focus[3] * height / 100
     focus_width = focus_right - focus_left
     focus_height = focus_bottom - focus_top
     focus_ratio = focus_width / focus_height
 
     # Bind the maximum size by the original image.
     # This ensures the resized image won't have empty bars.
-    max_width: float = original_image.width
-    max_height: float = original_image.height
+    max_width: float = width
+    max_height: float = height
     # Bind the minimum size by the requested resize area, as long as the maximum allows.
     # This ensures we use at least as many pixels as needed for the resize area, reducing
     # the likelihood of the resulting image being *enlarged*.
@@ -132,13 +158,312 @@ def resize_cover(
     if crop_top < 0:
         crop_bottom -= crop_top
         crop_top = 0
-    if crop_right > original_image.width:
-        crop_left -= crop_right - original_image.width
-        crop_right = original_image.width
-    if crop_bottom > original_image.height:
-        crop_top -= crop_bottom - original_image.height
-        crop_bottom = original_image.height
-
-    return original_image.crop((crop_left, crop_top, crop_right, crop_bottom)).resize(
-        (resize_width or original_image.width, resize_height or original_image.height)
-    )
+    if crop_right > width:
+        crop_left -= crop_right - width
+        crop_right = width
+    if crop_bottom > height:
+        crop_top -= crop_bottom - height
+        crop_bottom = height
+
+    return crop_left, crop_top, crop_right, crop_bottom
+
+
+@final
+@dataclass(frozen=True)
+class ImageDerivative:
+    """
+    A derivative of a source image, such as a resized version of it.
+    """
+
+    source_file_path: Path
+    source_media_type: MediaType
+    destination_file_path: Path
+    """
+    The path to write the derivative to.
+    """
+    cache_item_file_path: Path
+    """
+    The path to cache the derivative at, so that later generations can reuse it.
+    """
+    size: Size | None
+    """
+    The size to resize the source image to, or ``None`` to use the source file as-is.
+    """
+    focus: FocusArea | None
+    format: str
+    """
+    The `Pillow format <https://pillow.readthedocs.io/en/stable/handbook/image-file-formats.html>`_ to save the
+    derivative in.
+    """
+    source_cache_item_file_path: Path | None = None
+    """
+    The path to cache the decoded source image at, for sources that are expensive to decode, such as PDFs.
+    """
+
+
+@final
+class ImageDerivativePlanner:
+    """
+    Plan image derivatives, and generate them per source image.
+
+    Each source image is decoded once for all of its planned derivatives, and is downscaled as much as the largest
+    derivative allows while decoding, so that large source images are cheap to generate small derivatives from.
+
+    :param cache: The cache that derivatives are cached in. Generated derivatives are added to it, so that they count
+        towards its maximum size.
+    """
+
+    def __init__(self, *, cache: BinaryFileCache | None = None):
+        self._cache = cache
+        self._derivatives: MutableMapping[
+            Path, MutableMapping[Path, ImageDerivative]
+        ] = defaultdict(dict)
+
+    def plan(self, *derivatives: ImageDerivative) -> None:
+        """
+        Plan derivatives to generate.
+
+        Derivatives with the same destination as a previously planned derivative are ignored.
+        """
+        for derivative in derivatives:
+            self._derivatives[derivative.source_file_path].setdefault(
+                derivative.destination_file_path, derivative
+            )
+
+    def pop_derivatives(self) -> Sequence[ImageDerivative]:
+        """
+        Remove all planned derivatives, and return them.
+        """
+        derivatives, self._derivatives = self._derivatives, defaultdict(dict)
+        return [
+            derivative
+            for source_derivatives in derivatives.values()
+            for derivative in source_derivatives.values()
+        ]
+
+    async def generate(self, executor: Executor | None = None) -> None:
+        """
+        Generate all planned derivatives.
+
+        :param executor: The executor to generate derivatives in. Each source image is given to the executor once.
+            Defaults to the event loop's default executor.
+        """
+        derivatives, self._derivatives = self._derivatives, defaultdict(dict)
+        loop = get_running_loop()
+        await gather(
+            *(
+                loop.run_in_executor(
+                    executor,
+                    generate_image_derivatives,
+                    list(source_derivatives.values()),
+                )
+                for source_derivatives in derivatives.values()
+            )
+        )
+        if self._cache is not None:
+            await to_thread(
+                _add_cache_item_files,
+                self._cache,
+                [
+                    derivative
+                    for source_derivatives in derivatives.values()
+                    for derivative in source_derivatives.values()
+                ],
+            )
+
+
+def _add_cache_item_files(
+    cache: BinaryFileCache, derivatives: Sequence[ImageDerivative]
+) -> None:
+    for derivative in derivatives:
+        if derivative.size is not None:
+            cache.add_file(derivative.cache_item_file_path)
+        if derivative.source_cache_item_file_path is not None:
+            cache.add_file(derivative.source_cache_item_file_path)
+
+
+def generate_image_derivatives(derivatives: Sequence[ImageDerivative]) -> None:
+    """
+    Generate derivatives of a single source image.
+
+    Derivatives that were cached previously are reused, and the source image is decoded only if any derivatives are
+    not cached yet.
+    """
+    from betty.project.generate.file import link_or_copy_file
+
+    uncached_derivatives = []
+    for derivative in derivatives:
+        # If no customizations are needed, work straight from the source.
+        if derivative.size is None:
+            link_or_copy_file(
+                derivative.source_file_path, derivative.destination_file_path
+            )
+            continue
+        try:
+            link_or_copy_file(
+                derivative.cache_item_file_path, derivative.destination_file_path
+            )
+        except FileNotFoundError:
+            uncached_derivatives.append(derivative)
+    if not uncached_derivatives:
+        return
+
+    image = _load_image(uncached_derivatives)
+    try:
+        for derivative in uncached_derivatives:
+            assert derivative.size is not None
+            derivative.cache_item_file_path.parent.mkdir(parents=True, exist_ok=True)
+            converted_image = resize_cover(
+                image, derivative.size, focus=derivative.focus
+            )
+            try:
+                converted_image.save(
+                    derivative.cache_item_file_path, format=derivative.format
+                )
+            finally:
+                converted_image.close()
+            link_or_copy_file(
+                derivative.cache_item_file_path, derivative.destination_file_path
+            )
+    finally:
+        image.close()
+
+
+def _load_image(derivatives: Sequence[ImageDerivative]) -> Image:
+    source_file_path = derivatives[0].source_file_path
+    source_media_type = derivatives[0].source_media_type
+    # Ignore warnings about decompression bombs, because we know where the files come from.
+    with warnings.catch_warnings(action="ignore", category=DecompressionBombWarning):
+        if (
+            source_media_type.type == "application"
+            and source_media_type.subtype == "pdf"
+        ):
+            image = _load_pdf_image(derivatives)
+        else:
+            image = open_image(source_file_path, formats=[source_media_type.subtype])
+            # Let the decoder downscale the image while decoding it. This is only supported by some formats, such as
+            # JPEG.
+            image.draft(None, _minimum_image_size(image.size, derivatives))
+            image.load()
+    # Downscale any images the decoder could not downscale (enough).
+    minimum_size = _minimum_image_size(image.size, derivatives)
+    reduce_factor = min(image.width // minimum_size[0], image.height // minimum_size[1])
+    if reduce_factor > 1 and image.mode not in ("1", "P"):
+        reduced_image = image.reduce(reduce_factor)
+        image.close()
+        return reduced_image
+    return image
+
+
+# PDF page sizes are expressed in points, of which there are 72 per inch.
+_PDF_POINTS_PER_INCH = 72
+# The resolution to rasterize PDF pages at if derivatives require their full size.
+_PDF_MAXIMUM_DPI = 200
+_PDF_PAGE_SIZE_PATTERN = re.compile(r"^([\d.]+) x ([\d.]+) pts")
+
+
+def _load_pdf_image(derivatives: Sequence[ImageDerivative]) -> Image:
+    """
+    Rasterize the first page of a PDF, at the lowest resolution that does not reduce the quality of any derivatives.
+
+    Rasterized pages are cached, so that derivatives in other sizes can reuse them.
+    """
+    source_file_path = derivatives[0].source_file_path
+    source_cache_item_file_path = derivatives[0].source_cache_item_file_path
+
+    if source_cache_item_file_path is not None:
+        with suppress(OSError):
+            cached_page = open_image(source_cache_item_file_path, formats=["png"])
+            cached_page_dpi = round(cached_page.info.get("dpi", (0, 0))[0])
+            if (
+                cached_page_dpi >= _PDF_MAXIMUM_DPI
+                or _minimum_image_scale(cached_page.size, derivatives) <= 1
+            ):
+                cached_page.load()
+                return cached_page
+            cached_page.close()
+
+    page_scale = _minimum_image_scale(_pdf_page_size(source_file_path), derivatives)
+    dpi = max(1, math.ceil(min(_PDF_MAXIMUM_DPI, _PDF_POINTS_PER_INCH * page_scale)))
+    page = convert_from_path(source_file_path, dpi=dpi, first_page=1, last_page=1)[0]
+
+    if source_cache_item_file_path is not None:
+        page_bytes = BytesIO()
+        page.save(page_bytes, format="png", dpi=(dpi, dpi))
+        source_cache_item_file_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomically(source_cache_item_file_path, page_bytes.getvalue())
+    return page
+
+
+def _pdf_page_size(file_path: Path) -> tuple[Pixel, Pixel]:
+    """
+    Get the size of a PDF's first page, in points.
+    """
+    pdf_info = pdfinfo_from_path(str(file_path))
+    page_size_match = _PDF_PAGE_SIZE_PATTERN.match(pdf_info["Page size"])
+    assert page_size_match is not None
+    width = math.ceil(float(page_size_match.group(1)))
+    height = math.ceil(float(page_size_match.group(2)))
+    # Rotated pages are rasterized as they are displayed.
+    if int(pdf_info.get("Page rot", 0)) % 180:
+        return height, width
+    return width, height
+
+
+def read_image_size(file_path: Path, media_type: MediaType) -> TwoDimensionalSize:
+    """
+    Read an image's size without decoding it.
+
+    The size of a PDF is that of its first page, in points.
+
+    This blocks, so call it from a worker thread in asynchronous code.
+    """
+    if media_type.type == "application" and media_type.subtype == "pdf":
+        return _pdf_page_size(file_path)
+    with warnings.catch_warnings(action="ignore", category=DecompressionBombWarning):
+        image = open_image(file_path, formats=[media_type.subtype])
+    try:
+        return image.size
+    finally:
+        image.close()
+
+
+def _minimum_image_size(
+    image_size: tuple[Pixel, Pixel], derivatives: Sequence[ImageDerivative]
+) -> tuple[Pixel, Pixel]:
+    """
+    Get the smallest size an image can be downscaled to without reducing the quality of any of its derivatives.
+    """
+    scale = _minimum_image_scale(image_size, derivatives)
+    if scale >= 1:
+        return image_size
+    width, height = image_size
+    return math.ceil(width * scale), math.ceil(height * scale)
+
+
+def _minimum_image_scale(
+    image_size: tuple[Pixel, Pixel], derivatives: Sequence[ImageDerivative]
+) -> float:
+    """
+    Get the smallest factor an image can be scaled by without reducing the quality of any of its derivatives.
+    """
+    width, height = image_size
+    scale = 0.0
+    for derivative in derivatives:
+        assert derivative.size is not None
+        _assert_size(derivative.size)
+        if derivative.focus is not None:
+            _assert_area(derivative.focus)
+        resize_width, resize_height = derivative.size
+        # One-dimensional derivatives keep the image's full size in the other dimension.
+        if resize_width is None or resize_height is None:
+            return math.inf
+        crop_left, crop_top, crop_right, crop_bottom = _cover_box(
+            width, height, derivative.size, derivative.focus
+        )
+        scale = max(
+            scale,
+            resize_width / (crop_right - crop_left),
+            resize_height / (crop_bottom - crop_top),
+        )
+    return scale
@@ -17,12 +17,18 @@ from jinja2 import (
     FileSystemLoader,
     pass_context,
     Template,
+    BytecodeCache,
 )
+from jinja2 import nodes
+from jinja2.ext import Extension as Jinja2Extension
 from jinja2.runtime import StrictUndefined, Context, DebugUndefined
 from typing_extensions import override
 
+from betty import fs
+from betty.cache.file import BinaryFileCache
 from betty.date import Date
 from betty.html import CssProvider, JsProvider, Citer, Breadcrumbs
+from betty.jinja2.bytecode import BinaryFileBytecodeCache
 from betty.jinja2.filter import filters
 from betty.jinja2.test import tests
 from betty.job import Context as JobContext
@@ -42,8 +48,9 @@ if TYPE_CHECKING:
     from betty.project.extension import Extension
     from betty.project import Project
     from betty.project.config import ProjectConfiguration
+    from jinja2.parser import Parser
     from pathlib import Path
-    from collections.abc import MutableMapping, Iterator, Sequence
+    from collections.abc import MutableMapping, Iterator, Sequence, Awaitable
 
 
 def context_project(context: Context) -> Project:
@@ -127,6 +134,49 @@ class EntityContexts:
         return updated_contexts
 
 
+@final
+class FragmentCacheExtension(Jinja2Extension):
+    """
+    Cache rendered template fragments.
+
+    ``{% cache key %}...{% endcache %}`` renders its body once per key and locale, and stores the rendered fragment
+    in the job context's cache. Fragments **MUST NOT** depend on variables other than the key and the locale. If a
+    template is rendered without a job context, fragments are always rendered.
+    """
+
+    tags = {"cache"}
+
+    @override
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cache", [nodes.ContextReference(), key]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    async def _cache(
+        self, context: Context, key: Any, caller: Callable[[], Awaitable[str]]
+    ) -> str:
+        job_context = context_job_context(context)
+        if job_context is None:
+            return await caller()
+        localizer = context.resolve_or_missing("localizer")
+        locale = localizer.locale if isinstance(localizer, Localizer) else None
+        async with job_context.cache.with_scope("jinja2-fragment").getset(
+            f"{key}:{locale}"
+        ) as (cache_item, setter):
+            if cache_item is not None:
+                fragment: str = await cache_item.value()
+                return fragment
+            fragment = await caller()
+            await setter(fragment)
+            return fragment
+
+
 Globals: TypeAlias = Mapping[str, Any]
 Filters: TypeAlias = Mapping[str, Callable[..., Any]]
 Tests: TypeAlias = Mapping[str, Callable[..., bool]]
@@ -192,6 +242,8 @@ class Environment(ProjectDependentFactory, Jinja2Environment):
         entity_contexts: EntityContexts,
         filters: Mapping[str, Callable[..., Any]],
         tests: Mapping[str, Callable[..., bool]],
+        *,
+        bytecode_cache: BytecodeCache | None = None,
     ):
         template_directory_paths = [
             str(path / "templates") for path in assets.assets_directory_paths
@@ -199,6 +251,7 @@ class Environment(ProjectDependentFactory, Jinja2Environment):
         super().__init__(
             loader=FileSystemLoader(template_directory_paths),
             auto_reload=project.configuration.debug,
+            bytecode_cache=bytecode_cache,
             enable_async=True,
             undefined=(
                 DebugUndefined if project.configuration.debug else StrictUndefined
@@ -209,6 +262,7 @@ class Environment(ProjectDependentFactory, Jinja2Environment):
             extensions=[
                 "jinja2.ext.do",
                 "jinja2.ext.i18n",
+                FragmentCacheExtension,
             ],
         )
 
@@ -237,6 +291,15 @@ class Environment(ProjectDependentFactory, Jinja2Environment):
             await EntityContexts.new(),
             await filters(),
             await tests(),
+            bytecode_cache=BinaryFileBytecodeCache(
+                project.app.binary_file_cache.with_scope("jinja2"),
+                prebuilt_cache=(
+                    BinaryFileCache(fs.PREBUILT_ASSETS_DIRECTORY_PATH / "jinja2")
+                    if (fs.PREBUILT_ASSETS_DIRECTORY_PATH / "jinja2").is_dir()
+                    else None
+                ),
+                debug=project.configuration.debug,
+            ),
         )
 
     @property
@@ -0,0 +1,129 @@
+"""
+Cache compiled Jinja2 templates.
+"""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from io import BytesIO
+from typing import TYPE_CHECKING, final
+
+import jinja2
+from jinja2 import BytecodeCache
+from typing_extensions import override
+
+from betty import about
+from betty.hashid import hashid_sequence
+from betty.os import write_file_atomically
+from betty.typing import threadsafe
+
+if TYPE_CHECKING:
+    from jinja2.bccache import Bucket
+    from collections.abc import Sequence
+    from jinja2 import Environment
+    from betty.cache.file import BinaryFileCache
+
+
+@final
+@threadsafe
+class BinaryFileBytecodeCache(BytecodeCache):
+    """
+    Cache compiled Jinja2 templates in a binary file cache.
+
+    Compiled templates are keyed by their template name and source, the environment's extensions and syntax settings,
+    Betty's version, and Jinja2's version, but not by their file path. This lets compiled templates be reused across
+    processes and installations, so that templates are only compiled if their source or environment changed.
+
+    :param prebuilt_cache: A read-only cache with compiled templates that were prebuilt for inclusion in package builds.
+        It is used for templates that ``cache`` does not contain.
+    :param debug: Whether the templates are compiled for an environment in debug mode.
+    """
+
+    def __init__(
+        self,
+        cache: BinaryFileCache,
+        *,
+        prebuilt_cache: BinaryFileCache | None = None,
+        debug: bool = False,
+    ):
+        self._cache = cache
+        self._prebuilt_cache = prebuilt_cache
+        self._debug = debug
+
+    @override
+    def get_cache_key(self, name: str, filename: str | None = None) -> str:
+        return name
+
+    def _cache_item_id(self, bucket: Bucket) -> str:
+        return hashid_sequence(
+            about.version(),
+            jinja2.__version__,
+            str(self._debug),
+            *_environment_fingerprint(bucket.environment),
+            bucket.key,
+            bucket.checksum,
+        )
+
+    @override
+    def load_bytecode(self, bucket: Bucket) -> None:
+        cache_item_id = self._cache_item_id(bucket)
+        for cache in (self._cache, self._prebuilt_cache):
+            if cache is None:
+                continue
+            with (
+                suppress(OSError),
+                open(  # noqa PTH123
+                    cache.cache_item_file_path(cache_item_id), "rb"
+                ) as f,
+            ):
+                bucket.load_bytecode(f)
+            if bucket.code is not None:
+                return
+
+    @override
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        bytecode = BytesIO()
+        bucket.write_bytecode(bytecode)
+        cache_item_file_path = self._cache.cache_item_file_path(
+            self._cache_item_id(bucket)
+        )
+        cache_item_file_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomically(cache_item_file_path, bytecode.getvalue())
+        self._cache.add_file(cache_item_file_path)
+
+
+def _environment_fingerprint(environment: Environment) -> Sequence[str]:
+    # Extensions and syntax settings change how templates compile.
+    return (
+        *sorted(environment.extensions),
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        str(environment.line_statement_prefix),
+        str(environment.line_comment_prefix),
+        str(environment.trim_blocks),
+        str(environment.lstrip_blocks),
+        environment.newline_sequence,
+        str(environment.keep_trailing_newline),
+        str(environment.optimized),
+        str(environment.is_async),
+        _qualname(environment.autoescape),
+        _qualname(environment.finalize),
+    )
+
+
+def _qualname(value: object) -> str:
+    if callable(value):
+        return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    return str(value)
+
+
+def compile_templates(environment: Environment) -> None:
+    """
+    Compile all of an environment's Jinja2 templates into its bytecode cache.
+    """
+    for template_name in environment.list_templates(extensions=["j2"]):
+        environment.get_template(template_name)
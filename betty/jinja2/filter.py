@@ -6,10 +6,8 @@ from __future__ import annotations
 
 import json as stdjson
 import re
-import warnings
-from asyncio import get_running_loop, run
+from asyncio import to_thread
 from contextlib import suppress
-from io import BytesIO
 from typing import (
     Callable,
     Iterable,
@@ -21,10 +19,6 @@ from typing import (
 )
 from urllib.parse import quote
 
-import aiofiles
-from PIL import Image
-from PIL.Image import DecompressionBombWarning
-from aiofiles.os import makedirs
 from geopy import units
 from geopy.format import DEGREES_FORMAT
 from jinja2 import pass_context, pass_eval_context
@@ -32,12 +26,18 @@ from jinja2.async_utils import auto_aiter, auto_await
 from jinja2.filters import prepare_map, make_attrgetter
 from jinja2.runtime import Context, Macro
 from markupsafe import Markup, escape
-from pdf2image.pdf2image import convert_from_path
 
 from betty.ancestry.file import File
 from betty.ancestry.file_reference import FileReference
 from betty.hashid import hashid_file_meta, hashid
-from betty.image import resize_cover, Size, FocusArea
+from betty.image import (
+    Pixel,
+    Size,
+    FocusArea,
+    ImageDerivative,
+    ImageDerivativePlanner,
+    read_image_size,
+)
 from betty.locale import (
     negotiate_locale,
     Localey,
@@ -48,7 +48,8 @@ from betty.locale import (
 from betty.locale.localized import Localized, negotiate_localizeds, LocalizedStr
 from betty.media_type import MediaType
 from betty.media_type.media_types import HTML, SVG
-from betty.os import link_or_copy
+from betty.project import ProjectContext
+from betty.project.generate.file import link_or_copy_file
 from betty.string import (
     camel_case_to_snake_case,
     camel_case_to_kebab_case,
@@ -61,8 +62,7 @@ if TYPE_CHECKING:
     from betty.date import Datey
     from betty.locale.localizable import Localizable
     from jinja2.nodes import EvalContext
-    from pathlib import Path
-    from collections.abc import Awaitable, Mapping
+    from collections.abc import Mapping
 
 _T = TypeVar("_T")
 
@@ -278,8 +278,7 @@ async def filter_file(context: Context, file: File) -> str:
             / "file"
             / file.name
         )
-        await makedirs(file_destination_path.parent, exist_ok=True)
-        await link_or_copy(file.path, file_destination_path)
+        await to_thread(link_or_copy_file, file.path, file_destination_path)
 
     return f"/file/{quote(file.id)}/file/{quote(file.name)}"
 
@@ -291,10 +290,14 @@ async def filter_image_resize_cover(
     size: Size | None = None,
     *,
     focus: FocusArea | None = None,
+    image_format: str | None = None,
 ) -> str:
     """
     Preprocess an image file for use in a page.
 
+    :param image_format: The `Pillow format <https://pillow.readthedocs.io/en/stable/handbook/image-file-formats.html>`_
+        to convert the image to, such as ``webp`` or ``avif``. Defaults to the image's own format. PDFs are converted
+        to JPEG by default.
     :return: The public path to the preprocessed file. This can be embedded in a web page.
     """
     from betty.jinja2 import context_project, context_job_context
@@ -333,11 +336,11 @@ async def filter_image_resize_cover(
 
     if file.media_type:
         if file.media_type.type == "image":
-            image_loader = _load_image_image
-            destination_name += file.path.suffix
+            default_image_format = file.media_type.subtype
+            default_suffix = file.path.suffix
         elif file.media_type.type == "application" and file.media_type.subtype == "pdf":
-            image_loader = _load_image_application_pdf
-            destination_name += "." + "jpg"
+            default_image_format = "jpeg"
+            default_suffix = "." + "jpg"
         else:
             raise ValueError(
                 f'Cannot convert a file of media type "{file.media_type}" to an image.'
@@ -345,7 +348,38 @@ async def filter_image_resize_cover(
     else:
         raise ValueError("Cannot convert a file without a media type to an image.")
 
-    cache_item_id = f"{await hashid_file_meta(file.path)}:{destination_name}"
+    if image_format is None:
+        image_format = default_image_format
+        destination_name += default_suffix
+    elif size is None:
+        raise ValueError("Cannot convert an image to another format without a size.")
+    else:
+        destination_name += f".{image_format}"
+
+    file_meta_hashid = await hashid_file_meta(file.path)
+    cache_item_id = f"{file_meta_hashid}:{destination_name}"
+    image_cache = project.app.binary_file_cache.with_scope("image")
+    derivative = ImageDerivative(
+        file.path,
+        file.media_type,
+        file_directory_path / destination_name,
+        image_cache.cache_item_file_path(cache_item_id),
+        size,
+        focus,
+        image_format,
+        # Cache rasterized PDF pages, so that derivatives in other sizes can reuse them.
+        image_cache.with_scope("pdf").cache_item_file_path(file_meta_hashid)
+        if file.media_type.type == "application"
+        else None,
+    )
+    destination_public_path = f"/file/{quote(destination_name)}"
+
+    # Let the job context's planner generate the derivative later, together with all other derivatives of the
+    # same source image.
+    if isinstance(job_context, ProjectContext) and job_context.image_derivative_planner:
+        job_context.image_derivative_planner.plan(derivative)
+        return destination_public_path
+
     execute_filter = True
     if job_context:
         async with job_context.cache.with_scope("filter_image").getset(
@@ -356,108 +390,51 @@ async def filter_image_resize_cover(
             else:
                 execute_filter = False
     if execute_filter:
-        loop = get_running_loop()
-        await loop.run_in_executor(
-            project.app.process_pool,
-            _execute_filter_image,
-            image_loader,
-            file.path,
-            file.media_type,
-            project.app.binary_file_cache.with_scope("image").cache_item_file_path(
-                cache_item_id
-            ),
-            file_directory_path,
-            destination_name,
-            size,
-            focus,
+        image_derivative_planner = ImageDerivativePlanner(
+            cache=project.app.binary_file_cache
         )
-    destination_public_path = f"/file/{quote(destination_name)}"
+        image_derivative_planner.plan(derivative)
+        await image_derivative_planner.generate(project.app.process_pool)
 
     return destination_public_path
 
 
-async def _load_image_image(
-    file_path: Path,
-    media_type: MediaType,
-) -> Image.Image:
-    # We want to read the image asynchronously and prevent Pillow from keeping too many file
-    # descriptors open simultaneously, so we read the image ourselves and store the contents
-    # in a synchronous file object.
-    async with aiofiles.open(file_path, "rb") as f:
-        image_f = BytesIO(await f.read())
-    # Ignore warnings about decompression bombs, because we know where the files come from.
-    with warnings.catch_warnings(action="ignore", category=DecompressionBombWarning):
-        image = Image.open(image_f, formats=[media_type.subtype])
-    return image
-
-
-async def _load_image_application_pdf(
-    file_path: Path,
-    media_type: MediaType,
-) -> Image.Image:
-    # Ignore warnings about decompression bombs, because we know where the files come from.
-    with warnings.catch_warnings(action="ignore", category=DecompressionBombWarning):
-        image = convert_from_path(file_path, fmt="jpeg")[0]
-    return image
-
-
-def _execute_filter_image(
-    image_loader: Callable[[Path, MediaType], Awaitable[Image.Image]],
-    file_path: Path,
-    media_type: MediaType,
-    cache_item_file_path: Path,
-    destination_directory_path: Path,
-    destination_name: str,
-    size: Size | None,
-    focus: FocusArea | None,
-) -> None:
-    run(
-        __execute_filter_image(
-            image_loader,
-            file_path,
-            media_type,
-            cache_item_file_path,
-            destination_directory_path,
-            destination_name,
-            size,
-            focus,
-        )
-    )
-
+@pass_context
+async def filter_image_srcset(
+    context: Context,
+    filey: File | FileReference,
+    widths: Iterable[Pixel],
+    *,
+    aspect_ratio: tuple[int, int] | None = None,
+    focus: FocusArea | None = None,
+    image_format: str | None = None,
+) -> str:
+    """
+    Preprocess an image file in multiple widths for use in a page.
 
-async def __execute_filter_image(
-    image_loader: Callable[[Path, MediaType], Awaitable[Image.Image]],
-    file_path: Path,
-    media_type: MediaType,
-    cache_item_file_path: Path,
-    destination_directory_path: Path,
-    destination_name: str,
-    size: Size | None,
-    focus: FocusArea | None,
-) -> None:
-    destination_file_path = destination_directory_path / destination_name
-    await makedirs(destination_directory_path, exist_ok=True)
-
-    # If no customizations are needed, work straight from the source.
-    if size is None:
-        await link_or_copy(file_path, destination_file_path)
-        return
-
-    try:
-        # Try using a previously cached image.
-        await link_or_copy(cache_item_file_path, destination_file_path)
-    except FileNotFoundError:
-        # Apply customizations, and cache the customized image.
-        image = await image_loader(file_path, media_type)
-        try:
-            await makedirs(cache_item_file_path.parent, exist_ok=True)
-            converted_image = resize_cover(image, size, focus=focus)
-            converted_image.save(cache_item_file_path, format=media_type.subtype)
-            del converted_image
-        finally:
-            image.close()
-            del image
-        await link_or_copy(cache_item_file_path, destination_file_path)
+    :param aspect_ratio: The ratio of the width to the height to crop the image to, such as ``(16, 9)``. Defaults to
+        the image's own aspect ratio.
+    :param image_format: The format to convert the image to. See :py:func:`betty.jinja2.filter.filter_image_resize_cover`.
+    :return: A ``srcset`` attribute value with the static URLs to the preprocessed files. This can be embedded in a
+        web page.
+    """
+    file = filey if isinstance(filey, File) else filey.file
+    assert file is not None
+    if aspect_ratio is None and file.media_type and file.media_type != SVG:
+        aspect_ratio = await to_thread(read_image_size, file.path, file.media_type)
+
+    candidates = []
+    for width in widths:
+        size: Size = (
+            (width, None)
+            if aspect_ratio is None
+            else (width, max(1, round(width * aspect_ratio[1] / aspect_ratio[0])))
+        )
+        public_path = await filter_image_resize_cover(
+            context, filey, size, focus=focus, image_format=image_format
+        )
+        candidates.append(f"{await filter_static_url(context, public_path)} {width}w")
+    return ", ".join(candidates)
 
 
 @pass_context
@@ -595,6 +572,7 @@ async def filters() -> Mapping[str, Callable[..., Any]]:
         "format_degrees": filter_format_degrees,
         "hashid": filter_hashid,
         "filter_image_resize_cover": filter_image_resize_cover,
+        "filter_image_srcset": filter_image_srcset,
         "html_lang": filter_html_lang,
         "json": filter_json,
         "locale_get_data": get_data,
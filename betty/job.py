@@ -16,11 +16,14 @@ if TYPE_CHECKING:
 class Context:
     """
     Define a job context.
+
+    :param start: When the job started. Defaults to now. Pass the start of another job context to make this context
+        part of the same job, such as when a job is split across processes.
     """
 
-    def __init__(self):
+    def __init__(self, *, start: datetime | None = None):
         self._cache: Cache[Any] = MemoryCache()
-        self._start = datetime.now()
+        self._start = datetime.now() if start is None else start
 
     @property
     def cache(self) -> Cache[Any]:
@@ -0,0 +1,43 @@
+"""
+Provide JSON encoders.
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import suppress
+from importlib import import_module
+from typing import TYPE_CHECKING, Callable, TypeAlias
+
+if TYPE_CHECKING:
+    from betty.serde.dump import Dump
+
+
+JsonEncoder: TypeAlias = Callable[["Dump"], bytes]
+"""
+Encode a dump to UTF-8 encoded JSON.
+"""
+
+
+def encode_json(dump: Dump) -> bytes:
+    """
+    Encode a dump to JSON using Python's standard library.
+    """
+    return json.dumps(dump).encode("utf-8")
+
+
+def _new_default_json_encoder() -> JsonEncoder:
+    with suppress(ImportError):
+        # orjson is considerably faster than the standard library, but it is not a dependency of Betty.
+        encode: JsonEncoder = import_module("orjson").dumps
+        return encode
+    return encode_json
+
+
+DEFAULT_JSON_ENCODER = _new_default_json_encoder()
+"""
+The fastest available JSON encoder.
+
+This uses `orjson <https://github.com/ijl/orjson>`_ if it is installed, and falls back to
+:py:func:`betty.json.encode.encode_json` otherwise.
+"""
@@ -5,10 +5,11 @@ Provide `JSON-LD <https://json-ld.org/>`_ utilities.
 from __future__ import annotations
 
 from abc import abstractmethod, ABC
-from collections.abc import MutableSequence
+from collections.abc import MutableSequence, Sequence, MutableMapping
+from functools import cache
 from inspect import getmembers
 from pathlib import Path
-from typing import TYPE_CHECKING, cast, Self, Generic, final
+from typing import TYPE_CHECKING, cast, Self, Generic, final, Any
 
 from typing_extensions import TypeVar, override
 
@@ -36,9 +37,18 @@ async def dump_schema(
     """
     from betty.project import ProjectSchema
 
-    schema = await linked_data_dumpable.linked_data_schema(project)
-    if schema.def_name:
-        dump["$schema"] = await ProjectSchema.def_url(project, schema.def_name)
+    linked_data_dumpable_type = type(linked_data_dumpable)
+    try:
+        def_name = _linked_data_schema_def_names[linked_data_dumpable_type]
+    except KeyError:
+        # Building a schema is expensive, and its definition name depends on the type only.
+        def_name = (await linked_data_dumpable.linked_data_schema(project)).def_name
+        _linked_data_schema_def_names[linked_data_dumpable_type] = def_name
+    if def_name:
+        dump["$schema"] = await ProjectSchema.def_url(project, def_name)
+
+
+_linked_data_schema_def_names: MutableMapping[type, str | None] = {}
 
 
 class LinkedDataDumpable(Generic[_SchemaTypeT, _DumpT]):
@@ -98,14 +108,12 @@ class LinkedDataDumpableJsonLdObject(
     @classmethod
     async def linked_data_schema(cls, project: Project) -> JsonLdObject:
         schema = JsonLdObject(await JsonLdSchema.new())
-        for attr_name, class_attr_value in getmembers(cls):
-            if isinstance(class_attr_value, LinkedDataDumpableProvider):
-                linked_data_dumpable = class_attr_value
-                schema.add_property(
-                    snake_case_to_lower_camel_case(attr_name),
-                    await linked_data_dumpable.linked_data_schema_for(project),
-                    True,
-                )
+        for property_name, linked_data_dumpable in _get_linked_data_dump_plan(cls):
+            schema.add_property(
+                property_name,
+                await linked_data_dumpable.linked_data_schema_for(project),
+                True,
+            )
         return schema
 
     @override
@@ -114,15 +122,28 @@ class LinkedDataDumpableJsonLdObject(
 
         await dump_schema(project, dump, self)
 
-        for attr_name, class_attr_value in getmembers(type(self)):
-            if isinstance(class_attr_value, LinkedDataDumpableProvider):
-                dump[
-                    snake_case_to_lower_camel_case(attr_name)
-                ] = await class_attr_value.dump_linked_data_for(project, self)
+        for property_name, linked_data_dumpable in _get_linked_data_dump_plan(
+            type(self)
+        ):
+            dump[property_name] = await linked_data_dumpable.dump_linked_data_for(
+                project, self
+            )
 
         return dump
 
 
+@cache
+def _get_linked_data_dump_plan(
+    cls: type,
+) -> Sequence[tuple[str, LinkedDataDumpableProvider[Any, Schema, Dump]]]:
+    # Inspecting classes is expensive, so do it only once for every class.
+    return tuple(
+        (snake_case_to_lower_camel_case(attr_name), class_attr_value)
+        for attr_name, class_attr_value in getmembers(cls)
+        if isinstance(class_attr_value, LinkedDataDumpableProvider)
+    )
+
+
 class LinkedDataDumpableProvider(Generic[_T, _SchemaTypeT, _DumpT], ABC):
     """
     Provide linked data for instances of a target type.
@@ -6,9 +6,10 @@ import logging
 import re
 import tarfile
 from asyncio import get_running_loop, gather
-from collections.abc import Iterator, Mapping, AsyncIterator
+from collections.abc import Iterator, Mapping, AsyncIterator, Callable
 from concurrent.futures import Executor
 from contextlib import contextmanager
+from functools import cache
 from json import loads
 from pathlib import Path
 
@@ -255,28 +256,46 @@ class SpdxLicenseRepository(PluginRepository[License]):
 
             license_name = spdx_license_data["name"]
             assert isinstance(license_name, str)
-            plugin_label = plain(license_name)
 
             license_text = spdx_license_data["licenseText"]
             assert isinstance(license_text, str)
 
-            class _SpdxLicense(ShorthandPluginBase, License):
-                _plugin_id = plugin_id
-                _plugin_label = plugin_label
+            return _new_spdx_license_type(plugin_id, license_name, license_text, url)
 
-                @override
-                @property
-                def summary(self) -> Localizable:
-                    return self.plugin_label()
 
-                @override
-                @property
-                def text(self) -> Localizable:
-                    return plain(license_text)
+@cache
+def _new_spdx_license_type(
+    plugin_id: MachineName, license_name: str, license_text: str, url: str
+) -> type[License]:
+    class _SpdxLicense(ShorthandPluginBase, License):
+        _plugin_id = plugin_id
+        _plugin_label = plain(license_name)
 
-                @override
-                @property
-                def url(self) -> Localizable | None:
-                    return plain(url)
+        def __reduce__(
+            self,
+        ) -> tuple[Callable[[str, str, str, str], License], tuple[str, str, str, str]]:
+            # The license type is created at runtime, so it cannot be pickled by reference.
+            return _new_spdx_license, (plugin_id, license_name, license_text, url)
 
-            return _SpdxLicense
+        @override
+        @property
+        def summary(self) -> Localizable:
+            return self.plugin_label()
+
+        @override
+        @property
+        def text(self) -> Localizable:
+            return plain(license_text)
+
+        @override
+        @property
+        def url(self) -> Localizable | None:
+            return plain(url)
+
+    return _SpdxLicense
+
+
+def _new_spdx_license(
+    plugin_id: MachineName, license_name: str, license_text: str, url: str
+) -> License:
+    return _new_spdx_license_type(plugin_id, license_name, license_text, url)()
@@ -35,6 +35,7 @@ from betty.model.collections import EntityCollection, SingleTypeEntityCollection
 from betty.typing import internal
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
     from betty.project import Project
     from betty.serde.dump import Dump
 
@@ -164,9 +165,11 @@ class _Association(LinkedDataDumpableProvider[_OwnerT], Generic[_OwnerT, _Associ
         linked_data_embedded: bool = False,
     ):
         self._owner_type_name = owner_type_name
+        self._owner_type: type[_OwnerT] | None = None
         self._owner_attr_name = owner_attr_name
         self._internal_owner_attr_name = f"_{owner_attr_name}"
         self._associate_type_name = associate_type_name
+        self._associate_type: type[_AssociateT] | None = None
         self._linked_data_embedded = linked_data_embedded
         self._title = title
         self._description = description
@@ -192,10 +195,13 @@ class _Association(LinkedDataDumpableProvider[_OwnerT], Generic[_OwnerT, _Associ
 
         This may be an abstract class.
         """
-        return cast(
-            type[_OwnerT],
-            import_any(self._owner_type_name),
-        )
+        # The type is resolved lazily, because associations are declared before their owner types exist.
+        if self._owner_type is None:
+            self._owner_type = cast(
+                type[_OwnerT],
+                import_any(self._owner_type_name),
+            )
+        return self._owner_type
 
     @property
     def owner_attr_name(self) -> str:
@@ -211,10 +217,12 @@ class _Association(LinkedDataDumpableProvider[_OwnerT], Generic[_OwnerT, _Associ
 
         This may be an abstract class.
         """
-        return cast(
-            type[_AssociateT],
-            import_any(self._associate_type_name),
-        )
+        if self._associate_type is None:
+            self._associate_type = cast(
+                type[_AssociateT],
+                import_any(self._associate_type_name),
+            )
+        return self._associate_type
 
     @abstractmethod
     def resolve(self, owner: _OwnerT) -> None:
@@ -671,18 +679,29 @@ class AssociationRegistry:
     """
 
     _associations = set[_Association[Any, Any]]()
+    _associations_by_owner_type: dict[type, frozenset[_Association[Any, Any]]] = {}
+    _associations_by_owner_attr_name: dict[
+        tuple[type, str], _Association[Any, Any]
+    ] = {}
 
     @classmethod
-    def get_all_associations(cls, owner: type | object) -> set[_Association[Any, Any]]:
+    def get_all_associations(
+        cls, owner: type | object
+    ) -> frozenset[_Association[Any, Any]]:
         """
         Get all associations for an owner.
         """
         owner_type = owner if isinstance(owner, type) else type(owner)
-        return {
-            association
-            for association in cls._associations
-            if association.owner_type in owner_type.__mro__
-        }
+        try:
+            return cls._associations_by_owner_type[owner_type]
+        except KeyError:
+            associations = frozenset(
+                association
+                for association in cls._associations
+                if association.owner_type in owner_type.__mro__
+            )
+            cls._associations_by_owner_type[owner_type] = associations
+            return associations
 
     @classmethod
     def get_association(
@@ -691,16 +710,25 @@ class AssociationRegistry:
         """
         Get the association for a given owner and attribute name.
         """
-        for association in cls.get_all_associations(owner):
+        owner_type = owner if isinstance(owner, type) else type(owner)
+        try:
+            return cls._associations_by_owner_attr_name[(owner_type, owner_attr_name)]
+        except KeyError:
+            pass
+        for association in cls.get_all_associations(owner_type):
             if association.owner_attr_name == owner_attr_name:
+                cls._associations_by_owner_attr_name[(owner_type, owner_attr_name)] = (
+                    association
+                )
                 return association
-        raise ValueError(
-            f"No association exists for {owner if isinstance(owner, type) else owner.__class__}.{owner_attr_name}."
-        )
+        raise ValueError(f"No association exists for {owner_type}.{owner_attr_name}.")
 
     @classmethod
     def _register(cls, association: _Association[Any, Any]) -> None:
         cls._associations.add(association)
+        # Any association may apply to any owner type, so invalidate all lookup tables.
+        cls._associations_by_owner_type.clear()
+        cls._associations_by_owner_attr_name.clear()
 
 
 class _BidirectionalAssociateCollection(
@@ -717,6 +745,22 @@ class _BidirectionalAssociateCollection(
         self._association = association
         self.__owner = weakref.ref(owner)
 
+    def __reduce__(
+        self,
+    ) -> tuple[
+        Callable[[_OwnerT, str], _BidirectionalAssociateCollection[Any, _OwnerT]],
+        tuple[_OwnerT, str],
+        tuple[type[_AssociateT], Sequence[_AssociateT & Entity]],
+    ]:
+        # Weak references cannot be pickled, so pickle the owner instead, and look the association up again when
+        # unpickling, rather than pickling a copy of it. The associates' inverse associations are unpickled along
+        # with them, so restoring the state does not trigger self._on_add().
+        return (
+            _new_bidirectional_associate_collection,
+            (self._owner, self._association.owner_attr_name),
+            self.__getstate__(),
+        )
+
     @property
     def _owner(self) -> _OwnerT:
         owner = self.__owner()
@@ -738,6 +782,14 @@ class _BidirectionalAssociateCollection(
             self._association.inverse().disassociate(associate, self._owner)
 
 
+def _new_bidirectional_associate_collection(
+    owner: _OwnerT, owner_attr_name: str
+) -> _BidirectionalAssociateCollection[Any, _OwnerT]:
+    association = AssociationRegistry.get_association(owner, owner_attr_name)
+    assert isinstance(association, _BidirectionalAssociation)
+    return _BidirectionalAssociateCollection(owner, association)
+
+
 def resolve(*entities: Entity) -> None:
     """
     Resolve all entities' associates.
@@ -21,14 +21,19 @@ from typing import (
 
 from typing_extensions import override
 
-from betty.functools import unique
 from betty.model import Entity
 from betty.repr import repr_instance
 
 if TYPE_CHECKING:
     from betty.plugin import PluginIdToTypeMapping
     from betty.machine_name import MachineName
-    from collections.abc import Sequence, MutableSequence, MutableMapping, AsyncIterator
+    from collections.abc import (
+        Sequence,
+        MutableSequence,
+        MutableMapping,
+        MutableSet,
+        AsyncIterator,
+    )
 
 _EntityT = TypeVar("_EntityT", bound=Entity)
 _TargetT = TypeVar("_TargetT")
@@ -116,16 +121,21 @@ class EntityCollection(Generic[_TargetT], ABC):
         pass
 
     def _known(self, *entities: _TargetT & Entity) -> Iterable[_TargetT & Entity]:
-        for entity in unique(entities):
+        for entity in _unique(entities):
             if entity in self:
                 yield entity
 
     def _unknown(self, *entities: _TargetT & Entity) -> Iterable[_TargetT & Entity]:
-        for entity in unique(entities):
+        for entity in _unique(entities):
             if entity not in self:
                 yield entity
 
 
+def _unique(entities: Iterable[_EntityT]) -> Iterable[_EntityT]:
+    # Entities are unique by identity, which we can check in constant time, unlike betty.functools.unique().
+    return {id(entity): entity for entity in entities}.values()
+
+
 _EntityCollectionT = TypeVar("_EntityCollectionT", bound=EntityCollection[_EntityT])
 
 
@@ -134,12 +144,54 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
     Collect entities of a single type.
     """
 
-    __slots__ = "_entities", "_target_type"
+    __slots__ = "_entities", "_entity_identities", "_entities_by_id", "_target_type"
 
     def __init__(self, target_type: type[_TargetT], *entities: _TargetT & Entity):
         super().__init__()
-        self._entities: MutableSequence[_TargetT & Entity] = [*entities]
+        self._entities: MutableSequence[_TargetT & Entity] = []
+        # The identities (:py:func:`id`) of the entities in the collection, so we can look them up in constant time.
+        self._entity_identities: MutableSet[int] = set()
+        # The entities in the collection, keyed by their IDs. This is built when first needed, because entities that
+        # are being unpickled may not have their IDs yet when they are added to collections.
+        self._entities_by_id: MutableMapping[str, _TargetT & Entity] | None = None
         self._target_type = target_type
+        for entity in _unique(entities):
+            self._append(entity)
+
+    def __getstate__(
+        self,
+    ) -> tuple[type[_TargetT], Sequence[_TargetT & Entity]]:
+        # Entity identities differ between processes, so do not pickle the indexes.
+        return self._target_type, [*self._entities]
+
+    def __setstate__(
+        self, state: tuple[type[_TargetT], Sequence[_TargetT & Entity]]
+    ) -> None:
+        target_type, entities = state
+        SingleTypeEntityCollection.__init__(self, target_type, *entities)
+
+    def _append(self, entity: _TargetT & Entity) -> None:
+        self._entities.append(entity)
+        self._entity_identities.add(id(entity))
+        if self._entities_by_id is not None:
+            self._entities_by_id.setdefault(entity.id, entity)
+
+    def _discard(self, entity: _TargetT & Entity) -> None:
+        self._entities.remove(entity)
+        self._entity_identities.discard(id(entity))
+        # Another entity with the same ID may exist, so rebuild the ID index when it is needed next.
+        if (
+            self._entities_by_id is not None
+            and self._entities_by_id.get(entity.id) is entity
+        ):
+            self._entities_by_id = None
+
+    def _get_entities_by_id(self) -> MutableMapping[str, _TargetT & Entity]:
+        if self._entities_by_id is None:
+            self._entities_by_id = {}
+            for entity in self._entities:
+                self._entities_by_id.setdefault(entity.id, entity)
+        return self._entities_by_id
 
     @override  # type: ignore[callable-functiontype]
     @recursive_repr()
@@ -150,7 +202,7 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
     def add(self, *entities: _TargetT & Entity) -> None:
         added_entities = [*self._unknown(*entities)]
         for entity in added_entities:
-            self._entities.append(entity)
+            self._append(entity)
         if added_entities:
             self._on_add(*added_entities)
 
@@ -158,7 +210,7 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
     def remove(self, *entities: _TargetT & Entity) -> None:
         removed_entities = [*self._known(*entities)]
         for entity in removed_entities:
-            self._entities.remove(entity)
+            self._discard(entity)
         if removed_entities:
             self._on_remove(*removed_entities)
 
@@ -203,12 +255,12 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
         return self.view[indices]
 
     def _getitem_by_entity_id(self, entity_id: str) -> _TargetT & Entity:
-        for entity in self._entities:
-            if entity_id == entity.id:
-                return entity
-        raise KeyError(
-            f'Cannot find a {self._target_type} entity with ID "{entity_id}".'
-        )
+        try:
+            return self._get_entities_by_id()[entity_id]
+        except KeyError:
+            raise KeyError(
+                f'Cannot find a {self._target_type} entity with ID "{entity_id}".'
+            ) from None
 
     @override
     def __delitem__(self, key: str | _TargetT & Entity) -> None:
@@ -222,10 +274,9 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
         self.remove(entity)
 
     def _delitem_by_entity_id(self, entity_id: str) -> None:
-        for entity in self._entities:
-            if entity_id == entity.id:
-                self.remove(entity)
-                return
+        entity = self._get_entities_by_id().get(entity_id)
+        if entity is not None:
+            self.remove(entity)
 
     @override
     def __contains__(self, value: Any) -> bool:
@@ -236,10 +287,10 @@ class SingleTypeEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
         return False
 
     def _contains_by_entity(self, other_entity: _TargetT & Entity) -> bool:
-        return any(other_entity is entity for entity in self._entities)
+        return id(other_entity) in self._entity_identities
 
     def _contains_by_entity_id(self, entity_id: str) -> bool:
-        return any(entity.id == entity_id for entity in self._entities)
+        return entity_id in self._get_entities_by_id()
 
 
 class MultipleTypesEntityCollection(Generic[_TargetT], EntityCollection[_TargetT]):
@@ -398,8 +449,12 @@ class MultipleTypesEntityCollection(Generic[_TargetT], EntityCollection[_TargetT
             return self._contains_by_entity(value)
         return False
 
-    def _contains_by_entity(self, other_entity: Any) -> bool:
-        return any(other_entity is entity for entity in self)
+    def _contains_by_entity(self, other_entity: Entity) -> bool:
+        try:
+            collection = self._collections[other_entity.type]
+        except KeyError:
+            return False
+        return other_entity in collection
 
     @override
     def add(self, *entities: _TargetT & Entity) -> None:
@@ -5,6 +5,7 @@ Multiprocessing functionality.
 from concurrent import futures
 from multiprocessing import get_context
 from signal import signal, SIGINT, SIG_IGN
+from typing import Callable, Any
 
 
 class ProcessPoolExecutor(futures.ProcessPoolExecutor):
@@ -18,12 +19,25 @@ class ProcessPoolExecutor(futures.ProcessPoolExecutor):
     """
 
     def __init__(
-        self, max_workers: int | None = None, *, max_tasks_per_child: int | None = None
+        self,
+        max_workers: int | None = None,
+        *,
+        max_tasks_per_child: int | None = None,
+        initializer: Callable[..., object] | None = None,
+        initargs: tuple[Any, ...] = (),
     ):
         super().__init__(
-            initializer=signal,
-            initargs=(SIGINT, SIG_IGN),
+            initializer=_initialize,
+            initargs=(initializer, initargs),
             max_workers=max_workers,
             max_tasks_per_child=max_tasks_per_child,
             mp_context=get_context("spawn"),
         )
+
+
+def _initialize(
+    initializer: Callable[..., object] | None, initargs: tuple[Any, ...]
+) -> None:
+    signal(SIGINT, SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
@@ -5,16 +5,18 @@ Provide OS interaction utilities.
 from __future__ import annotations
 
 import asyncio
+import filecmp
 import os
 import shutil
 from asyncio import gather
-from contextlib import suppress
+from contextlib import suppress, contextmanager
 from os import walk
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Any, IO
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Awaitable
+    from collections.abc import Callable, Awaitable, Iterator
 
 
 async def link_or_copy(source_file_path: Path, destination_file_path: Path) -> None:
@@ -59,6 +61,75 @@ def _retry_copyfile(source_file_path: Path, destination_file_path: Path) -> None
         _retry(shutil.copyfile, source_file_path, destination_file_path)
 
 
+def write_file_atomically(
+    file_path: Path,
+    content: bytes,
+    *,
+    modified: int | float | None = None,
+    mode: int | None = None,
+) -> None:
+    """
+    Write a file atomically.
+
+    The content is written to a temporary file in the same directory first, which then replaces the file. This
+    ensures that interrupted writes never leave behind incomplete files, and that other processes never read them.
+
+    This blocks, so call it from a worker thread in asynchronous code.
+
+    :param modified: The file's modification time, as a timestamp. Defaults to the current time.
+    :param mode: The file's permissions. Defaults to those of temporary files, which only the owner can read.
+    """
+    with open_file_atomically(file_path, modified=modified, mode=mode) as f:
+        f.write(content)
+
+
+@contextmanager
+def open_file_atomically(
+    file_path: Path,
+    *,
+    modified: int | float | None = None,
+    mode: int | None = None,
+    keep_identical: bool = False,
+) -> Iterator[IO[bytes]]:
+    """
+    Open a file to write to atomically.
+
+    Like :py:func:`betty.os.write_file_atomically`, but this yields a binary file object to stream content to, so
+    that the complete content never needs to be in memory. The file is replaced once the context exits without errors.
+
+    This blocks, so call it from a worker thread in asynchronous code.
+
+    :param keep_identical: Whether to leave an existing file with identical content untouched, so that its
+        modification time is preserved.
+    """
+    with NamedTemporaryFile(
+        dir=file_path.parent,
+        prefix=f".{file_path.name}.",
+        delete=False,
+    ) as f:
+        temporary_file_path = Path(f.name)
+        try:
+            yield f
+        except BaseException:
+            f.close()
+            temporary_file_path.unlink(missing_ok=True)
+            raise
+    try:
+        if keep_identical:
+            with suppress(OSError):
+                if filecmp.cmp(temporary_file_path, file_path, shallow=False):
+                    temporary_file_path.unlink()
+                    return
+        if mode is not None:
+            temporary_file_path.chmod(mode)
+        if modified is not None:
+            os.utime(temporary_file_path, (modified, modified))
+        temporary_file_path.replace(file_path)
+    except BaseException:
+        temporary_file_path.unlink(missing_ok=True)
+        raise
+
+
 async def copy_tree(
     source_directory_path: Path,
     destination_directory_path: Path,
@@ -5,9 +5,8 @@ Provide an API to determine if information should be kept private.
 from __future__ import annotations
 
 import logging
-from contextlib import suppress
 from datetime import datetime
-from typing import Iterator, TypeAlias, Any, TYPE_CHECKING
+from typing import Iterator, TypeAlias, Any, TYPE_CHECKING, TypeVar
 
 from betty.ancestry.presence import Presence
 from betty.ancestry.event import Event
@@ -24,10 +23,12 @@ from betty.date import DateRange, Date
 from betty.model import Entity
 
 if TYPE_CHECKING:
-    from collections.abc import MutableSequence
+    from collections.abc import MutableSequence, MutableMapping, Mapping
     from betty.locale.localizer import Localizer
 
 _Expirable: TypeAlias = Person | Event | Date | None
+_PrivatizeItem: TypeAlias = "tuple[HasPrivacy, HasPrivacy | None]"
+_ExpirationT = TypeVar("_ExpirationT")
 
 
 class Privatizer:
@@ -43,12 +44,46 @@ class Privatizer:
     ):
         self._lifetime_threshold = lifetime_threshold
         self._localizer = localizer
-        self._seen: MutableSequence[HasPrivacy] = []
+        self._seen: MutableMapping[int, HasPrivacy] = {}
+        # Memoized expirations are keyed by the IDs of the people they are for. Each value also keeps a reference to
+        # that person, so that their ID cannot be reused by another object.
+        self._expired_generations: MutableMapping[int, tuple[Person, int | None]] = {}
+        self._ancestors_expired_generations: MutableMapping[
+            int, tuple[Person, int | None]
+        ] = {}
+        self._descendants_expired: MutableMapping[int, tuple[Person, bool]] = {}
+        self._expiration_lookups = 0
+        self._memoized_expiration_lookups = 0
+
+    @property
+    def expiration_lookups(self) -> int:
+        """
+        The number of times people's expirations were looked up while determining their privacy.
+        """
+        return self._expiration_lookups
+
+    @property
+    def memoized_expiration_lookups(self) -> int:
+        """
+        The number of expiration lookups that were served from memory, rather than determined again.
+        """
+        return self._memoized_expiration_lookups
 
     def privatize(self, subject: HasPrivacy) -> None:
         """
         Privatize a resource.
         """
+        # Resources and their associates form a graph that may be much deeper than the maximum recursion depth, so
+        # traverse it using a worklist instead. Each item is a resource to privatize, and the resource to mark it
+        # private because of, if any. Associates are added in reverse, so they are privatized in order.
+        worklist: MutableSequence[_PrivatizeItem] = [(subject, None)]
+        while worklist:
+            subject, reason = worklist.pop()
+            if reason is not None:
+                self._mark_private(subject, reason)
+            worklist.extend(reversed([*self._privatize(subject)]))
+
+    def _privatize(self, subject: HasPrivacy) -> Iterator[_PrivatizeItem]:
         if subject.privacy is Privacy.PUBLIC:
             return
 
@@ -61,120 +96,197 @@ class Privatizer:
         if subject.privacy is not Privacy.PRIVATE:
             return
 
-        if subject in self._seen:
+        if id(subject) in self._seen:
             return
-        self._seen.append(subject)
+        self._seen[id(subject)] = subject
 
         if isinstance(subject, Person):
-            self._privatize_person(subject)
+            yield from self._privatize_person(subject)
 
         if isinstance(subject, Presence):
-            self._privatize_presence(subject)
+            yield from self._privatize_presence(subject)
 
         if isinstance(subject, Event):
-            self._privatize_event(subject)
+            yield from self._privatize_event(subject)
 
         if isinstance(subject, Place):
-            self._privatize_place(subject)
+            yield from self._privatize_place(subject)
 
         if isinstance(subject, Source):
-            self._privatize_source(subject)
+            yield from self._privatize_source(subject)
 
         if isinstance(subject, HasCitations):
-            self._privatize_has_citations(subject)
+            yield from self._privatize_has_citations(subject)
 
         if isinstance(subject, HasFileReferences):
-            self._privatize_has_file_references(subject)
+            yield from self._privatize_has_file_references(subject)
 
         if isinstance(subject, HasNotes):
-            self._privatize_has_notes(subject)
+            yield from self._privatize_has_notes(subject)
 
-    def _privatize_person(self, person: Person) -> None:
+    def _privatize_person(self, person: Person) -> Iterator[_PrivatizeItem]:
         if not person.private:
             return
 
         for person_name in person.names:
-            self._mark_private(person_name, person)
-            self.privatize(person_name)
+            yield person_name, person
         for presence in person.presences:
-            self._mark_private(presence, person)
-            self.privatize(presence)
+            yield presence, person
 
-    def _privatize_presence(self, presence: Presence) -> None:
+    def _privatize_presence(self, presence: Presence) -> Iterator[_PrivatizeItem]:
         if not presence.private:
             return
 
         if isinstance(presence.role, Subject):
-            self._mark_private(presence.event, presence)
-            self.privatize(presence.event)
-        self._mark_private(presence.person, presence)
-        self.privatize(presence.person)
+            yield presence.event, presence
+        yield presence.person, presence
 
-    def _privatize_event(self, event: Event) -> None:
+    def _privatize_event(self, event: Event) -> Iterator[_PrivatizeItem]:
         if not event.private:
             return
 
         for presence in event.presences:
-            self._mark_private(presence, event)
-            self.privatize(presence)
+            yield presence, event
         if event.place:
-            self.privatize(event.place)
+            yield event.place, None
 
-    def _privatize_place(self, place: Place) -> None:
+    def _privatize_place(self, place: Place) -> Iterator[_PrivatizeItem]:
         if not place.private:
             return
 
         for enclosure in place.enclosees:
-            self._mark_private(enclosure.enclosee, place)
-            self.privatize(enclosure.enclosee)
+            yield enclosure.enclosee, place
         for enclosure in place.enclosers:
-            self.privatize(enclosure.encloser)
+            yield enclosure.encloser, None
 
     def _privatize_has_citations(
         self, has_citations: HasCitations & HasPrivacy
-    ) -> None:
+    ) -> Iterator[_PrivatizeItem]:
         if not has_citations.private:
             return
 
         for citation in has_citations.citations:
-            self._mark_private(citation, has_citations)
-            self.privatize(citation)
+            yield citation, has_citations
 
-    def _privatize_source(self, source: Source) -> None:
+    def _privatize_source(self, source: Source) -> Iterator[_PrivatizeItem]:
         if not source.private:
             return
 
         for contained_source in source.contains:
-            self._mark_private(contained_source, source)
-            self.privatize(contained_source)
+            yield contained_source, source
         for citation in source.citations:
-            self._mark_private(citation, source)
-            self.privatize(citation)
+            yield citation, source
 
     def _privatize_has_file_references(
         self, has_file_references: HasFileReferences & HasPrivacy
-    ) -> None:
+    ) -> Iterator[_PrivatizeItem]:
         if not has_file_references.private:
             return
 
         for file_reference in has_file_references.file_references:
-            self._mark_private(file_reference.file, has_file_references)
-            self.privatize(file_reference.file)
+            yield file_reference.file, has_file_references
 
-    def _privatize_has_notes(self, has_notes: HasNotes & HasPrivacy) -> None:
+    def _privatize_has_notes(
+        self, has_notes: HasNotes & HasPrivacy
+    ) -> Iterator[_PrivatizeItem]:
         if not has_notes.private:
             return
 
         for note in has_notes.notes:
-            self._mark_private(note, has_notes)
-            self.privatize(note)
+            yield note, has_notes
+
+    def _lookup_expiration(
+        self, memo: Mapping[int, tuple[Person, _ExpirationT]], person: Person
+    ) -> tuple[Person, _ExpirationT] | None:
+        self._expiration_lookups += 1
+        expiration = memo.get(id(person))
+        if expiration is not None:
+            self._memoized_expiration_lookups += 1
+        return expiration
+
+    def _get_ancestors_expired_generations(self, person: Person) -> int | None:
+        """
+        Get by how many generations any of a person's ancestors has expired, relative to the person.
 
-    def _ancestors_by_generation(
-        self, person: Person, generations_ago: int = 1
-    ) -> Iterator[tuple[Person, int]]:
-        for parent in person.parents:
-            yield parent, generations_ago
-            yield from self._ancestors_by_generation(parent, generations_ago + 1)
+        This is the greatest number of generations ago for which an ancestor has expired, minus the number of
+        generations between that ancestor and the person. If this is at least ``1``, the person has an ancestor ``n``
+        generations ago, who has expired for ``n + 1`` generations ago.
+        """
+        memoized = self._lookup_expiration(self._ancestors_expired_generations, person)
+        if memoized is not None:
+            return memoized[1]
+
+        # Traverse depth-first, so that each person's ancestors are evaluated before the person themselves. Ancestors
+        # that are still being evaluated can only be encountered if someone is their own ancestor, in which case they
+        # are skipped.
+        path = [person]
+        on_path = {id(person)}
+        while path:
+            descendant = path[-1]
+            for parent in descendant.parents:
+                if (
+                    id(parent) not in self._ancestors_expired_generations
+                    and id(parent) not in on_path
+                ):
+                    path.append(parent)
+                    on_path.add(id(parent))
+                    break
+            else:
+                path.pop()
+                on_path.discard(id(descendant))
+                ancestors_expired_generations = max(
+                    (
+                        expired_generations - 1
+                        for parent in descendant.parents
+                        for expired_generations in (
+                            self._person_expired_generations(parent),
+                            self._ancestors_expired_generations.get(
+                                id(parent), (parent, None)
+                            )[1],
+                        )
+                        if expired_generations is not None
+                    ),
+                    default=None,
+                )
+                self._ancestors_expired_generations[id(descendant)] = (
+                    descendant,
+                    ancestors_expired_generations,
+                )
+        return self._ancestors_expired_generations[id(person)][1]
+
+    def _get_descendants_expired(self, person: Person) -> bool:
+        """
+        Check if any of a person's descendants has expired for one generation ago.
+        """
+        memoized = self._lookup_expiration(self._descendants_expired, person)
+        if memoized is not None:
+            return memoized[1]
+
+        # Traverse depth-first, so that each person's descendants are evaluated before the person themselves.
+        # Descendants that are still being evaluated can only be encountered if someone is their own descendant, in
+        # which case they are skipped.
+        path = [person]
+        on_path = {id(person)}
+        while path:
+            ancestor = path[-1]
+            for child in ancestor.children:
+                if (
+                    id(child) not in self._descendants_expired
+                    and id(child) not in on_path
+                ):
+                    path.append(child)
+                    on_path.add(id(child))
+                    break
+            else:
+                path.pop()
+                on_path.discard(id(ancestor))
+                descendants_expired = any(
+                    self._person_has_expired(child, 1)
+                    or self._descendants_expired.get(id(child), (child, False))[1]
+                    for child in ancestor.children
+                )
+                self._descendants_expired[id(ancestor)] = ancestor, descendants_expired
+        return self._descendants_expired[id(person)][1]
 
     def _determine_person_privacy(self, person: Person) -> None:
         # Do not change existing explicit privacy declarations.
@@ -195,16 +307,19 @@ class Privatizer:
             person.public = True
             return
 
-        for ancestor, generations_ago in self._ancestors_by_generation(person):
-            if self.has_expired(ancestor, generations_ago + 1):
-                person.public = True
-                return
+        # If any ancestor has expired for one generation before their own, the person is considered not private.
+        ancestors_expired_generations = self._get_ancestors_expired_generations(person)
+        if (
+            ancestors_expired_generations is not None
+            and ancestors_expired_generations >= 1
+        ):
+            person.public = True
+            return
 
         # If any descendant has any expired event, the person is considered not private.
-        for descendant in person.descendants:
-            if self.has_expired(descendant, 1):
-                person.public = True
-                return
+        if self._get_descendants_expired(person):
+            person.public = True
+            return
 
         person.private = True
         logging.getLogger(__name__).debug(
@@ -261,10 +376,55 @@ class Privatizer:
         return False
 
     def _person_has_expired(self, person: Person, generations_ago: int) -> bool:
-        for presence in person.presences:
-            if self._event_has_expired(presence.event, generations_ago):
-                return True
-        return False
+        expired_generations = self._person_expired_generations(person)
+        return (
+            expired_generations is not None and expired_generations >= generations_ago
+        )
+
+    def _person_expired_generations(self, person: Person) -> int | None:
+        """
+        Get the greatest number of generations ago for which a person has expired, if they have expired at all.
+
+        Expiration is monotonic: if a person has expired for a number of generations ago, they have also expired for
+        all more recent generations. Each person's expiration is therefore determined once, no matter how often they
+        are checked as someone else's ancestor or descendant.
+        """
+        memoized = self._lookup_expiration(self._expired_generations, person)
+        if memoized is not None:
+            return memoized[1]
+        expired_generations = max(
+            (
+                event_expired_generations
+                for presence in person.presences
+                if (
+                    event_expired_generations := self._event_expired_generations(
+                        presence.event
+                    )
+                )
+                is not None
+            ),
+            default=None,
+        )
+        # Keep a reference to the person, so that its ID cannot be reused by another object.
+        self._expired_generations[id(person)] = person, expired_generations
+        return expired_generations
+
+    def _event_expired_generations(self, event: Event) -> int | None:
+        date = event.date
+        if isinstance(date, DateRange):
+            date = date.end
+        if not isinstance(date, Date) or not self.has_expired(date, 0):
+            return None
+        # Start from an estimate based on the year, and correct it by one generation at a time.
+        assert date.year is not None
+        generations_ago = max(
+            0, (datetime.now().year - date.year) // self._lifetime_threshold
+        )
+        while generations_ago > 0 and not self.has_expired(date, generations_ago):
+            generations_ago -= 1
+        while self.has_expired(date, generations_ago + 1):
+            generations_ago += 1
+        return generations_ago
 
     def _event_has_expired(self, event: Event, generations_ago: int) -> bool:
         date = event.date
@@ -297,8 +457,7 @@ class Privatizer:
             return
 
         target.private = True
-        with suppress(ValueError):
-            self._seen.remove(target)
+        self._seen.pop(id(target), None)
 
         if isinstance(target, Entity) and isinstance(reason, Entity):
             logging.getLogger(__name__).debug(
@@ -60,7 +60,10 @@ from betty.string import kebab_case_to_lower_camel_case
 from betty.typing import internal
 
 if TYPE_CHECKING:
+    from datetime import datetime
+    from betty.image import ImageDerivativePlanner
     from betty.license import License
+    from betty.project.generate.file import Precompressor
     from betty.url import LocalizedUrlGenerator, StaticUrlGenerator
     from betty.ancestry.event_type import EventType
     from betty.machine_name import MachineName
@@ -735,9 +738,18 @@ class ProjectContext(Context):
     A job context for a project.
     """
 
-    def __init__(self, project: Project):
-        super().__init__()
+    def __init__(
+        self,
+        project: Project,
+        *,
+        precompressor: Precompressor | None = None,
+        image_derivative_planner: ImageDerivativePlanner | None = None,
+        start: datetime | None = None,
+    ):
+        super().__init__(start=start)
         self._project = project
+        self._precompressor = precompressor
+        self._image_derivative_planner = image_derivative_planner
 
     @property
     def project(self) -> Project:
@@ -745,3 +757,19 @@ class ProjectContext(Context):
         The Betty project this job context is run within.
         """
         return self._project
+
+    @property
+    def precompressor(self) -> Precompressor | None:
+        """
+        The precompressor for the files generated within this job context, if any.
+        """
+        return self._precompressor
+
+    @property
+    def image_derivative_planner(self) -> ImageDerivativePlanner | None:
+        """
+        The planner for the image derivatives needed within this job context, if any.
+
+        If there is no planner, image derivatives are generated as soon as they are needed.
+        """
+        return self._image_derivative_planner
@@ -35,6 +35,7 @@ from betty.assertion import (
     assert_mapping,
     assert_none,
     assert_or,
+    assert_sequence,
 )
 from betty.assertion.error import AssertionFailed
 from betty.config import Configuration
@@ -78,6 +79,22 @@ if TYPE_CHECKING:
 _EntityT = TypeVar("_EntityT", bound=Entity)
 
 
+_IMAGE_FORMATS = ("avif", "webp")
+
+
+def _assert_image_format(image_format: str) -> str:
+    if image_format not in _IMAGE_FORMATS:
+        raise AssertionFailed(
+            _(
+                '"{image_format}" is not a supported image format. Supported image formats are: {image_formats}.'
+            ).format(
+                image_format=image_format,
+                image_formats=", ".join(_IMAGE_FORMATS),
+            )
+        )
+    return image_format
+
+
 #: The default age by which people are presumed dead.
 #: This is based on `Jeanne Louise Calment <https://www.guinnessworldrecords.com/world-records/oldest-person/>`_ who is
 #: the oldest verified person to ever have lived.
@@ -746,6 +763,8 @@ class ProjectConfiguration(Configuration):
         available_formats: Sequence[type[Format]],
         url: str = "https://example.com",
         clean_urls: bool = False,
+        compress_sitemaps: bool = False,
+        image_formats: Sequence[str] = (),
         title: ShorthandStaticTranslations = "Betty",
         author: ShorthandStaticTranslations | None = None,
         entity_types: Iterable[EntityTypeConfiguration] | None = None,
@@ -773,6 +792,9 @@ class ProjectConfiguration(Configuration):
         self._computed_name: str | None = None
         self._url = url
         self._clean_urls = clean_urls
+        self._compress_sitemaps = compress_sitemaps
+        self._image_formats: Sequence[str] = ()
+        self.image_formats = image_formats
         self.title = title
         if author:
             self.author = author
@@ -832,6 +854,8 @@ class ProjectConfiguration(Configuration):
         *,
         url: str = "https://example.com",
         clean_urls: bool = False,
+        compress_sitemaps: bool = False,
+        image_formats: Sequence[str] = (),
         title: ShorthandStaticTranslations = "Betty",
         author: ShorthandStaticTranslations | None = None,
         entity_types: Iterable[EntityTypeConfiguration] | None = None,
@@ -858,6 +882,8 @@ class ProjectConfiguration(Configuration):
             available_formats=await FORMAT_REPOSITORY.select(),
             url=url,
             clean_urls=clean_urls,
+            compress_sitemaps=compress_sitemaps,
+            image_formats=image_formats,
             title=title,
             author=author,
             entity_types=entity_types,
@@ -994,6 +1020,35 @@ class ProjectConfiguration(Configuration):
     def clean_urls(self, clean_urls: bool) -> None:
         self._clean_urls = clean_urls
 
+    @property
+    def compress_sitemaps(self) -> bool:
+        """
+        Whether to generate gzip-compressed sitemaps such as ``/sitemap-0.xml.gz`` instead of ``/sitemap-0.xml``.
+
+        The sitemap index at ``/sitemap.xml`` itself is never compressed.
+        """
+        return self._compress_sitemaps
+
+    @compress_sitemaps.setter
+    def compress_sitemaps(self, compress_sitemaps: bool) -> None:
+        self._compress_sitemaps = compress_sitemaps
+
+    @property
+    def image_formats(self) -> Sequence[str]:
+        """
+        The additional formats to generate images in, such as ``webp`` and ``avif``.
+
+        Images are always generated in their original format as well, so that browsers that do not support any of the
+        additional formats can fall back to it.
+        """
+        return self._image_formats
+
+    @image_formats.setter
+    def image_formats(self, image_formats: Sequence[str]) -> None:
+        self._image_formats = tuple(
+            _assert_image_format(image_format) for image_format in image_formats
+        )
+
     @property
     def locales(self) -> LocaleConfigurationMapping:
         """
@@ -1129,6 +1184,15 @@ class ProjectConfiguration(Configuration):
                 "clean_urls",
                 assert_bool() | assert_setattr(self, "clean_urls"),
             ),
+            OptionalField(
+                "compress_sitemaps",
+                assert_bool() | assert_setattr(self, "compress_sitemaps"),
+            ),
+            OptionalField(
+                "image_formats",
+                assert_sequence(assert_str() | _assert_image_format)
+                | assert_setattr(self, "image_formats"),
+            ),
             OptionalField("debug", assert_bool() | assert_setattr(self, "debug")),
             OptionalField(
                 "lifetime_threshold",
@@ -1154,6 +1218,8 @@ class ProjectConfiguration(Configuration):
             "url": self.url,
             "title": self.title.dump(),
             "clean_urls": self.clean_urls,
+            "compress_sitemaps": self.compress_sitemaps,
+            "image_formats": list(self.image_formats),
             "author": self.author.dump(),
             "logo": str(self._logo) if self._logo else None,
             "debug": self.debug,
@@ -5,14 +5,14 @@ Provide Betty's default theme.
 from __future__ import annotations
 
 import json
-from asyncio import gather
+from asyncio import gather, to_thread
 from collections import defaultdict
 from pathlib import Path
 from typing import Iterable, cast, TYPE_CHECKING, final, Self
 
-import aiofiles
 from typing_extensions import override
 
+from betty import fs
 from betty.ancestry.event import Event
 from betty.ancestry.event_type.event_types import (
     StartOfLifeEventType,
@@ -21,18 +21,21 @@ from betty.ancestry.event_type.event_types import (
 from betty.ancestry.person import Person
 from betty.ancestry.place import Place
 from betty.ancestry.presence_role.presence_roles import Subject
+from betty.app import App
+from betty.cache.file import BinaryFileCache
 from betty.date import Date, Datey
 from betty.functools import unique
 from betty.html import CssProvider
+from betty.jinja2.bytecode import BinaryFileBytecodeCache, compile_templates
 from betty.jinja2 import (
     Jinja2Provider,
     Filters,
 )
 from betty.locale.localizable import _, static
 from betty.model import persistent_id
-from betty.os import link_or_copy
 from betty.plugin import ShorthandPluginBase
 from betty.privacy import is_public
+from betty.project import Project
 from betty.project.extension import ConfigurableExtension, Theme, Extension
 from betty.project.extension.cotton_candy.config import CottonCandyConfiguration
 from betty.project.extension.cotton_candy.search import Index
@@ -40,16 +43,20 @@ from betty.project.extension.maps import Maps
 from betty.project.extension.trees import Trees
 from betty.project.extension.webpack import Webpack, WebpackEntryPointProvider
 from betty.project.generate import GenerateSiteEvent
+from betty.project.generate.file import (
+    create_file,
+    link_or_copy_file,
+    PRECOMPRESSED_SUFFIXES,
+)
 from betty.typing import private
 
 if TYPE_CHECKING:
-    from betty.project import Project
     from betty.ancestry.presence import Presence
     from betty.ancestry.file_reference import FileReference
     from betty.ancestry.has_file_references import HasFileReferences
     from betty.plugin import PluginIdentifier
     from betty.event_dispatcher import EventHandlerRegistry
-    from collections.abc import Sequence
+    from collections.abc import Sequence, Set
 
 _RESULT_CONTAINER_TEMPLATE = """
 <li class="search-result">
@@ -58,6 +65,10 @@ _RESULT_CONTAINER_TEMPLATE = """
 """
 
 
+_SEARCH_INDEX_RESULT_CHUNK_SIZE = 100
+_SEARCH_INDEX_TOKEN_PREFIX_LENGTH = 2
+
+
 _RESULTS_CONTAINER_TEMPLATE = """
 <ul id="search-results" class="nav-secondary">
     {{{ betty-search-results }}}
@@ -65,9 +76,29 @@ _RESULTS_CONTAINER_TEMPLATE = """
 """
 
 
+async def _prebuild_cotton_candy_templates() -> None:
+    """
+    Prebuild compiled Jinja2 templates for inclusion in package builds.
+    """
+    async with (
+        App.new_temporary() as app,
+        app,
+        Project.new_temporary(app) as project,
+    ):
+        await project.configuration.extensions.enable(CottonCandy)
+        async with project:
+            jinja2_environment = await project.jinja2_environment
+            jinja2_environment.bytecode_cache = BinaryFileBytecodeCache(
+                BinaryFileCache(fs.PREBUILT_ASSETS_DIRECTORY_PATH / "jinja2")
+            )
+            await to_thread(compile_templates, jinja2_environment)
+
+
 async def _generate_favicon(event: GenerateSiteEvent) -> None:
-    await link_or_copy(
-        event.project.logo, event.project.configuration.www_directory_path / "logo.png"
+    await to_thread(
+        link_or_copy_file,
+        event.project.logo,
+        event.project.configuration.www_directory_path / "logo.png",
     )
 
 
@@ -86,26 +117,86 @@ async def _generate_search_index_for_locale(
     project = event.project
     localizers = await project.localizers
     localizer = await localizers.get(locale)
-    search_index = {
-        "resultContainerTemplate": _RESULT_CONTAINER_TEMPLATE,
-        "resultsContainerTemplate": _RESULTS_CONTAINER_TEMPLATE,
-        "index": [
-            {"text": " ".join(entry.text), "result": entry.result}
-            for entry in await Index(
-                project.ancestry,
-                await project.jinja2_environment,
-                event.job_context,
-                localizer,
-            ).build()
-        ],
+    search_index = await Index(
+        project.ancestry,
+        await project.jinja2_environment,
+        event.job_context,
+        localizer,
+    ).build_sharded(
+        token_prefix_length=_SEARCH_INDEX_TOKEN_PREFIX_LENGTH,
+        result_chunk_size=_SEARCH_INDEX_RESULT_CHUNK_SIZE,
+    )
+    www_directory_path = project.configuration.localize_www_directory_path(locale)
+    token_shard_paths = {
+        prefix: f"search-index/tokens/{prefix.encode('utf-8').hex()}.json"
+        for prefix in search_index.token_shards
     }
-    search_index_json = json.dumps(search_index)
-    async with aiofiles.open(
-        event.project.configuration.localize_www_directory_path(locale)
-        / "search-index.json",
-        mode="w",
-    ) as f:
-        await f.write(search_index_json)
+    result_chunk_paths = [
+        f"search-index/results/{chunk}.json"
+        for chunk in range(len(search_index.result_chunks))
+    ]
+    await gather(
+        _generate_search_index_file(
+            event,
+            www_directory_path / "search-index.json",
+            {
+                "resultContainerTemplate": _RESULT_CONTAINER_TEMPLATE,
+                "resultsContainerTemplate": _RESULTS_CONTAINER_TEMPLATE,
+                "tokenShards": token_shard_paths,
+                "tokenPrefixLength": _SEARCH_INDEX_TOKEN_PREFIX_LENGTH,
+                "resultChunks": result_chunk_paths,
+                "resultChunkSize": _SEARCH_INDEX_RESULT_CHUNK_SIZE,
+            },
+        ),
+        *(
+            _generate_search_index_file(
+                event, www_directory_path / token_shard_paths[prefix], token_shard
+            )
+            for prefix, token_shard in search_index.token_shards.items()
+        ),
+        *(
+            _generate_search_index_file(
+                event, www_directory_path / result_chunk_path, result_chunk
+            )
+            for result_chunk_path, result_chunk in zip(
+                result_chunk_paths, search_index.result_chunks, strict=True
+            )
+        ),
+    )
+    # Shards and chunks whose content did not change were left untouched, so only remove those that are no longer
+    # part of the search index.
+    await to_thread(
+        _prune_search_index,
+        www_directory_path / "search-index",
+        {
+            www_directory_path / file_path
+            for file_path in (*token_shard_paths.values(), *result_chunk_paths)
+        },
+        event.job_context.precompressor is not None,
+    )
+
+
+def _prune_search_index(
+    search_index_directory_path: Path,
+    search_index_file_paths: Set[Path],
+    precompressed: bool,
+) -> None:
+    for file_path in list(search_index_directory_path.rglob("*")):
+        if not file_path.is_file():
+            continue
+        if file_path.suffix in PRECOMPRESSED_SUFFIXES:
+            if precompressed and file_path.with_suffix("") in search_index_file_paths:
+                continue
+        elif file_path in search_index_file_paths:
+            continue
+        file_path.unlink(missing_ok=True)
+
+
+async def _generate_search_index_file(
+    event: GenerateSiteEvent, file_path: Path, search_index_data: object
+) -> None:
+    async with create_file(file_path, job_context=event.job_context) as f:
+        await f.write(json.dumps(search_index_data, sort_keys=True))
 
 
 @final
@@ -6,7 +6,9 @@ from __future__ import annotations
 
 from abc import ABC
 from asyncio import gather
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import cache
 from inspect import getmembers
 from typing import TYPE_CHECKING, TypeVar, Generic, final
 
@@ -28,7 +30,7 @@ if TYPE_CHECKING:
     from betty.locale.localizable import StaticTranslationsLocalizable
     from betty.locale.localizer import Localizer
     from betty.job import Context
-    from collections.abc import Iterable, Sequence
+    from collections.abc import Iterable, Sequence, Mapping, MutableSequence
 
 _EntityT = TypeVar("_EntityT", bound=Entity)
 
@@ -43,6 +45,18 @@ def _static_translations_to_text(
     }
 
 
+@cache
+def _get_static_translations_localizable_attr_names(
+    entity_type: type[Entity],
+) -> Sequence[str]:
+    # Inspecting classes is expensive, so do it only once for every class.
+    return tuple(
+        attr_name
+        for attr_name, class_attr_value in getmembers(entity_type)
+        if isinstance(class_attr_value, StaticTranslationsLocalizableAttr)
+    )
+
+
 class _EntityTypeIndexer(Generic[_EntityT], ABC):
     def text(self, entity: _EntityT) -> set[str]:
         text = set()
@@ -52,9 +66,8 @@ class _EntityTypeIndexer(Generic[_EntityT], ABC):
             for note in entity.notes:
                 text.update(_static_translations_to_text(note.text))
 
-        for attr_name, class_attr_value in getmembers(type(entity)):
-            if isinstance(class_attr_value, StaticTranslationsLocalizableAttr):
-                text.update(_static_translations_to_text(getattr(entity, attr_name)))
+        for attr_name in _get_static_translations_localizable_attr_names(type(entity)):
+            text.update(_static_translations_to_text(getattr(entity, attr_name)))
 
         return text
 
@@ -95,6 +108,19 @@ class _Entry:
     result: str
 
 
+@final
+@dataclass(frozen=True)
+class _ShardedIndex:
+    token_shards: Mapping[str, Mapping[str, Sequence[int]]]
+    """
+    The IDs of the entries containing each token, partitioned by token prefix.
+    """
+    result_chunks: Sequence[Sequence[str]]
+    """
+    The entries' results, split into chunks. An entry's ID is its position across all chunks.
+    """
+
+
 @internal
 class Index:
     """
@@ -129,6 +155,31 @@ class Index:
             if entry is not None
         ]
 
+    async def build_sharded(
+        self, *, token_prefix_length: int = 2, result_chunk_size: int = 100
+    ) -> _ShardedIndex:
+        """
+        Build the search index, sharded so that searches only need to load the parts matching their queries.
+
+        :param token_prefix_length: The length of the token prefixes to partition the tokens by.
+        :param result_chunk_size: The number of results per chunk.
+        """
+        entries = await self.build()
+        token_shards: defaultdict[str, defaultdict[str, MutableSequence[int]]] = (
+            defaultdict(lambda: defaultdict(list))
+        )
+        for entry_id, entry in enumerate(entries):
+            # Sort the tokens, so that identical indexes are always built identically.
+            for token in sorted(entry.text):
+                token_shards[token[:token_prefix_length]][token].append(entry_id)
+        return _ShardedIndex(
+            token_shards,
+            [
+                [entry.result for entry in entries[offset : offset + result_chunk_size]]
+                for offset in range(0, len(entries), result_chunk_size)
+            ],
+        )
+
     async def _build_entities(
         self, indexer: _EntityTypeIndexer[_EntityT], entity_type: type[_EntityT]
     ) -> Iterable[_Entry | None]:
@@ -1,14 +1,16 @@
-interface IndexEntry {
-  text: string
-  result: string
-}
-
 interface Index {
-  index: IndexEntry[]
   resultContainerTemplate: string
   resultsContainerTemplate: string
+  tokenShards: Record<string, string>
+  tokenPrefixLength: number
+  resultChunks: string[]
+  resultChunkSize: number
 }
 
+type TokenShard = Record<string, number[]>
+
+type ResultChunk = string[]
+
 class Search {
   private readonly hideSearchKeys = ['Escape']
   private readonly nextResultKeys = ['ArrowDown']
@@ -19,6 +21,9 @@ class Search {
   private readonly resultsContainer: HTMLElement
   private documentY: number
   private index: Index | null = null
+  private readonly tokenShards = new Map<string, Promise<TokenShard>>()
+  private readonly resultChunks = new Map<number, Promise<ResultChunk>>()
+  private searchCount = 0
 
   public constructor () {
     this.search = document.getElementById('search')
@@ -101,8 +106,8 @@ class Search {
     }
   }
 
-  private setSearchEntries (entries: IndexEntry[]): void {
-    this.resultsContainer.innerHTML = this.renderResults(entries)
+  private setSearchResults (results: string[]): void {
+    this.resultsContainer.innerHTML = this.renderResults(results)
     this.resultsContainer.scrollTop = 0
   }
 
@@ -134,35 +139,85 @@ class Search {
 
   private async getIndex () :Promise<Index> {
     if (this.index === null) {
-      const response = await fetch(this.search.dataset.bettySearchIndex)
-      this.index = await response.json() as Index
+      this.index = await this.fetchIndexFile<Index>(this.search.dataset.bettySearchIndex)
     }
     return this.index
   }
 
+  private async fetchIndexFile<T> (path: string) :Promise<T> {
+    // Index file paths are relative to the index itself.
+    const indexUrl = new URL(this.search.dataset.bettySearchIndex, document.baseURI)
+    const response = await fetch(new URL(path, indexUrl))
+    return await response.json() as T
+  }
+
+  private async getTokenShard (prefix: string) :Promise<TokenShard> {
+    if (!this.tokenShards.has(prefix)) {
+      const index = await this.getIndex()
+      this.tokenShards.set(prefix, this.fetchIndexFile<TokenShard>(index.tokenShards[prefix]))
+    }
+    return await this.tokenShards.get(prefix)
+  }
+
+  private async getResultChunk (chunk: number) :Promise<ResultChunk> {
+    if (!this.resultChunks.has(chunk)) {
+      const index = await this.getIndex()
+      this.resultChunks.set(chunk, this.fetchIndexFile<ResultChunk>(index.resultChunks[chunk]))
+    }
+    return await this.resultChunks.get(chunk)
+  }
+
   private async perform (query: string): Promise<void> {
-    const index = await this.getIndex()
-    this.setSearchEntries(index.index.filter((entry) => this.match(query, entry.text)))
+    // Queries are performed asynchronously, so ensure only the results for the latest query are shown.
+    const searchCount = ++this.searchCount
+    const results = await this.getResults(await this.match(query))
+    if (searchCount === this.searchCount) {
+      this.setSearchResults(results)
+    }
   }
 
-  private match (query: string, haystack: string):boolean {
-    const queryParts = query.toLowerCase().split(/\s/)
+  private async match (query: string): Promise<number[]> {
+    const index = await this.getIndex()
+    // Shorter query parts would match the tokens of many shards, and loading those would download most of the index.
+    const queryParts = query.toLowerCase().split(/\s+/).filter((queryPart) => queryPart.length >= index.tokenPrefixLength)
+    let entryIds: Set<number> | null = null
     for (const queryPart of queryParts) {
-      if (!haystack.includes(queryPart)) {
-        return false
+      // Tokens are partitioned by prefix, so only load the shard whose tokens may start with the query part.
+      const prefix = queryPart.slice(0, index.tokenPrefixLength)
+      const queryPartEntryIds = new Set<number>()
+      if (prefix in index.tokenShards) {
+        const tokenShard = await this.getTokenShard(prefix)
+        for (const [token, tokenEntryIds] of Object.entries(tokenShard)) {
+          if (token.startsWith(queryPart)) {
+            for (const entryId of tokenEntryIds) {
+              queryPartEntryIds.add(entryId)
+            }
+          }
+        }
       }
+      entryIds = entryIds === null
+        ? queryPartEntryIds
+        : new Set([...entryIds].filter((entryId) => queryPartEntryIds.has(entryId)))
     }
-    return true
+    return entryIds === null ? [] : [...entryIds].sort((a, b) => a - b)
+  }
+
+  private async getResults (entryIds: number[]): Promise<string[]> {
+    const index = await this.getIndex()
+    return await Promise.all(entryIds.map(async (entryId) => {
+      const resultChunk = await this.getResultChunk(Math.floor(entryId / index.resultChunkSize))
+      return resultChunk[entryId % index.resultChunkSize]
+    }))
   }
 
-  private renderResults (entries: IndexEntry[]) :string {
+  private renderResults (results: string[]) :string {
     return this.index.resultsContainerTemplate
-      .replace('{{{ betty-search-results }}}', entries.map((entry) => this.renderResult(entry)).join(''))
+      .replace('{{{ betty-search-results }}}', results.map((result) => this.renderResult(result)).join(''))
   }
 
-  private renderResult (entry: IndexEntry) :string {
+  private renderResult (result: string) :string {
     return this.index.resultContainerTemplate
-      .replace('{{{ betty-search-result }}}', entry.result)
+      .replace('{{{ betty-search-result }}}', result)
   }
 }
 
@@ -10,11 +10,12 @@ from typing import final, TypeVar
 from typing_extensions import override
 
 from betty.gramps.loader import GrampsLoader
+from betty.hashid import hashid_file_meta, hashid_sequence
 from betty.locale.localizable import static, _
 from betty.plugin import ShorthandPluginBase, Plugin, PluginRepository
 from betty.project.extension import ConfigurableExtension
 from betty.project.extension.gramps.config import GrampsConfiguration
-from betty.project.load import LoadAncestryEvent
+from betty.project.load import LoadAncestryEvent, AncestryInputsProvider
 
 if TYPE_CHECKING:
     from betty.plugin.config import PluginInstanceConfiguration
@@ -82,7 +83,11 @@ async def _load_ancestry(event: LoadAncestryEvent) -> None:
 
 
 @final
-class Gramps(ShorthandPluginBase, ConfigurableExtension[GrampsConfiguration]):
+class Gramps(
+    ShorthandPluginBase,
+    ConfigurableExtension[GrampsConfiguration],
+    AncestryInputsProvider,
+):
     """
     Integrate Betty with `Gramps <https://gramps-project.org>`_.
     """
@@ -101,3 +106,17 @@ class Gramps(ShorthandPluginBase, ConfigurableExtension[GrampsConfiguration]):
     @override
     def register_event_handlers(self, registry: EventHandlerRegistry) -> None:
         registry.add_handler(LoadAncestryEvent, _load_ancestry)
+
+    @override
+    async def fingerprint_ancestry_inputs(self) -> str:
+        file_fingerprints = []
+        for family_tree_configuration in self.configuration.family_trees:
+            file_path = family_tree_configuration.file_path
+            if not file_path:
+                continue
+            try:
+                file_fingerprints.append(await hashid_file_meta(file_path))
+            except FileNotFoundError:
+                # Missing family trees fail to load, but that is for the loader to report.
+                file_fingerprints.append(str(file_path))
+        return hashid_sequence(*file_fingerprints)
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 from asyncio import to_thread, gather
 from pathlib import Path
-from shutil import copy2
 from typing import TYPE_CHECKING, final
 
 from typing_extensions import override
@@ -13,6 +12,7 @@ from betty.locale.localizable import _
 from betty.plugin import ShorthandPluginBase
 from betty.project.extension.webpack import Webpack, WebpackEntryPointProvider
 from betty.project.generate import GenerateSiteEvent
+from betty.project.generate.file import copy_file
 
 if TYPE_CHECKING:
     from betty.project.extension import Extension
@@ -24,7 +24,7 @@ if TYPE_CHECKING:
 async def _generate_swagger_ui(event: GenerateSiteEvent) -> None:
     await gather(
         to_thread(
-            copy2,
+            copy_file,
             event.job_context._webpack_build_directory_path.parent  # type: ignore[attr-defined]
             / "node_modules"
             / "swagger-ui-dist"
@@ -32,7 +32,7 @@ async def _generate_swagger_ui(event: GenerateSiteEvent) -> None:
             event.project.configuration.www_directory_path / "css" / "http-api-doc.css",
         ),
         to_thread(
-            copy2,
+            copy_file,
             event.job_context._webpack_build_directory_path.parent  # type: ignore[attr-defined]
             / "node_modules"
             / "swagger-ui-dist"
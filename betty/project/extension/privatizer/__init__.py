@@ -44,6 +44,14 @@ async def _privatize_ancestry(event: PostLoadAncestryEvent) -> None:
 
     for entity in entities:
         privatizer.privatize(entity)
+    logger.debug(
+        localizer._(
+            "Served {memoized_lookup_count} out of {lookup_count} expiration lookups from memory."
+        ).format(
+            memoized_lookup_count=str(privatizer.memoized_expiration_lookups),
+            lookup_count=str(privatizer.expiration_lookups),
+        )
+    )
 
     for entity in entities:
         if entity.private:
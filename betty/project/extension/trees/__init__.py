@@ -7,7 +7,6 @@ from asyncio import gather
 from pathlib import Path
 from typing import TYPE_CHECKING, final
 
-import aiofiles
 from typing_extensions import override
 
 from betty.ancestry.person import Person
@@ -16,6 +15,7 @@ from betty.media_type.media_types import HTML
 from betty.plugin import ShorthandPluginBase
 from betty.project.extension.webpack import Webpack, WebpackEntryPointProvider
 from betty.project.generate import GenerateSiteEvent
+from betty.project.generate.file import create_file
 
 if TYPE_CHECKING:
     from betty.project.extension import Extension
@@ -55,9 +55,9 @@ async def _generate_people_json_for_locale(
         for person in project.ancestry[Person]
     }
     people_json = json.dumps(people)
-    async with aiofiles.open(
+    async with create_file(
         project.configuration.localize_www_directory_path(locale) / "people.json",
-        mode="w",
+        job_context=event.job_context,
     ) as f:
         await f.write(people_json)
 
@@ -7,6 +7,8 @@ This module is internal.
 from __future__ import annotations
 
 from abc import abstractmethod
+from asyncio import to_thread
+from os import walk
 from pathlib import Path
 from typing import TYPE_CHECKING, final, Self, ClassVar
 
@@ -20,7 +22,6 @@ from betty.html import CssProvider
 from betty.jinja2 import Jinja2Provider, Filters, ContextVars
 from betty.job import Context
 from betty.locale.localizable import _, Localizable, static
-from betty.os import copy_tree
 from betty.plugin import ShorthandPluginBase
 from betty.project import Project, extension
 from betty.project.extension import Extension
@@ -28,6 +29,7 @@ from betty.project.extension.webpack import build
 from betty.project.extension.webpack.build import webpack_build_id
 from betty.project.extension.webpack.jinja2.filter import FILTERS
 from betty.project.generate import GenerateSiteEvent
+from betty.project.generate.file import copy_file
 from betty.requirement import (
     Requirement,
     AllRequirements,
@@ -128,6 +130,22 @@ async def _generate_assets(event: GenerateSiteEvent) -> None:
     )
 
 
+def _copy_build_directory(
+    build_directory_path: Path, destination_directory_path: Path
+) -> None:
+    for directory_path_str, _subdirectory_names, file_names in walk(
+        build_directory_path
+    ):
+        directory_path = Path(directory_path_str)
+        for file_name in file_names:
+            copy_file(
+                directory_path / file_name,
+                destination_directory_path
+                / directory_path.relative_to(build_directory_path)
+                / file_name,
+            )
+
+
 @internal
 @final
 class Webpack(ShorthandPluginBase, Extension, CssProvider, Jinja2Provider):
@@ -232,7 +250,9 @@ class Webpack(ShorthandPluginBase, Extension, CssProvider, Jinja2Provider):
         build_directory_path: Path,
         destination_directory_path: Path,
     ) -> None:
-        await copy_tree(build_directory_path, destination_directory_path)
+        await to_thread(
+            _copy_build_directory, build_directory_path, destination_directory_path
+        )
 
     async def _generate_ensure_build_directory(
         self,
@@ -7,25 +7,29 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-import os
+import pickle
 import shutil
 from asyncio import (
     create_task,
-    Task,
-    as_completed,
-    Semaphore,
+    ensure_future,
+    Event,
+    Future,
     CancelledError,
     sleep,
     to_thread,
     gather,
+    get_running_loop,
+    Runner,
 )
-from collections.abc import MutableSequence, Coroutine
-from contextlib import suppress
+from collections.abc import MutableSequence, Coroutine, Mapping
+from contextlib import suppress, AsyncExitStack, asynccontextmanager, ExitStack
+from multiprocessing.util import Finalize
 from pathlib import Path
+from time import monotonic
+from xml.sax.saxutils import escape as xml_escape
 from typing import (
     cast,
-    ParamSpec,
-    Callable,
+    final,
     Awaitable,
     Sequence,
     TYPE_CHECKING,
@@ -34,30 +38,52 @@ from typing import (
 
 import aiofiles
 from PIL import Image
-from aiofiles.os import makedirs
-from math import floor
 
-from betty import model
+from betty import model, about
+from betty.app import App
+from betty.cache.file import PickledFileCache
+from betty.hashid import hashid, hashid_sequence, hashid_file_meta
+from betty.image import ImageDerivativePlanner
+from betty.json.encode import DEFAULT_JSON_ENCODER
 from betty.locale import get_display_name
 from betty.locale.localizable import _
 from betty.locale.localizer import DEFAULT_LOCALIZER
 from betty.media_type.media_types import JSON, HTML
-from betty.model import UserFacingEntity, Entity, persistent_id
+from betty.model import UserFacingEntity, Entity, persistent_id, NonPersistentId
+from betty.multiprocessing import ProcessPoolExecutor
 from betty.openapi import Specification
 from betty.privacy import is_public
-from betty.project import ProjectEvent, ProjectSchema, ProjectContext
+from betty.project import ProjectEvent, ProjectSchema, ProjectContext, Project
 from betty.project.generate.file import (
+    copy_file,
     create_file,
+    create_files,
     create_html_resource,
     create_json_resource,
+    make_directories,
+    Precompressor,
+    PRECOMPRESSED_SUFFIXES,
+    _stream_file,
 )
+from betty.project.generate.manifest import BuildManifest
 from betty.string import kebab_case_to_lower_camel_case
 
 if TYPE_CHECKING:
-    from betty.project import Project
-    from betty.app import App
+    from datetime import datetime
+    from concurrent.futures import Executor
+    from betty.ancestry import Ancestry
+    from betty.app.config import AppConfiguration
+    from betty.image import ImageDerivative
+    from betty.json.encode import JsonEncoder
+    from betty.project.config import ProjectConfiguration
+    from betty.url import LocalizedUrlGenerator
     from betty.serde.dump import DumpMapping, Dump
-    from collections.abc import AsyncIterator
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        MutableMapping,
+        Iterator,
+    )
 
 
 class GenerateSiteEvent(ProjectEvent):
@@ -68,12 +94,38 @@ class GenerateSiteEvent(ProjectEvent):
     pass
 
 
-async def generate(project: Project) -> None:
+async def generate(
+    project: Project,
+    *,
+    incremental: bool = False,
+    processes: int = 1,
+    precompress: bool = False,
+    concurrency: int = 512,
+) -> None:
     """
     Generate a new site.
+
+    :param incremental: Whether to only generate the entity resources whose inputs changed since the previous
+        incremental generation, and to remove the resources of entities that no longer exist. Entity pages may render
+        information about any other entity, so they are all generated again if any entity changed. The site is
+        generated in its entirety if there is no previous build manifest, or if site-wide inputs, such as the project
+        configuration or assets, changed.
+    :param processes: The number of processes to generate entity resources in. If greater than ``1``, each process
+        receives a copy of the project and its ancestry once, and generates the entity resources it is given.
+    :param precompress: Whether to write gzip and brotli compressed variants of the generated HTML and JSON
+        resources, for web servers to serve to clients that accept them.
+    :param concurrency: The maximum number of jobs to run concurrently. Jobs are only created once there is room for
+        them, so this also limits how much memory pending jobs take up.
     """
     logger = logging.getLogger(__name__)
-    job_context = ProjectContext(project)
+    image_derivative_planner = ImageDerivativePlanner(
+        cache=project.app.binary_file_cache
+    )
+    job_context = ProjectContext(
+        project,
+        precompressor=Precompressor() if precompress else None,
+        image_derivative_planner=image_derivative_planner,
+    )
     app = project.app
     localizer = await app.localizer
 
@@ -82,139 +134,549 @@ async def generate(project: Project) -> None:
             output_directory=project.configuration.output_directory_path
         )
     )
-    with suppress(FileNotFoundError):
-        await asyncio.to_thread(
-            shutil.rmtree, project.configuration.output_directory_path
-        )
-    await makedirs(project.configuration.output_directory_path, exist_ok=True)
+
+    manifest = None
+    previous_manifest = None
+    if incremental:
+        manifest = await _new_build_manifest(project)
+        previous_manifest = await BuildManifest.read(_build_manifest_file_path(project))
+        if (
+            previous_manifest is not None
+            and previous_manifest.inputs != manifest.inputs
+        ):
+            previous_manifest = None
+        if previous_manifest is None:
+            logger.info(
+                localizer._(
+                    "Your site cannot be generated incrementally, so it will be generated in its entirety."
+                )
+            )
+
+    if previous_manifest is None:
+        with suppress(FileNotFoundError):
+            await asyncio.to_thread(
+                shutil.rmtree, project.configuration.output_directory_path
+            )
+    await to_thread(make_directories, project.configuration.output_directory_path)
+    await to_thread(project.configuration.output_directory_path.chmod, 0o755)
 
     # The static public assets may be overridden depending on the number of locales rendered, so ensure they are
     # generated before anything else.
     await _generate_static_public_assets(job_context)
 
-    jobs = []
-    log_job: Task[None] | None = None
-    try:
-        async for job_coroutine in _run_jobs(job_context):
-            jobs.append(create_task(job_coroutine))
-        log_job = create_task(_log_jobs_forever(app, jobs))
-        for completed_job in as_completed(jobs):
-            await completed_job
-    except BaseException:
-        for job in jobs:
-            job.cancel()
-        raise
-    finally:
-        if log_job is not None:  # type: ignore[redundant-expr]
+    scheduler = _JobScheduler(concurrency)
+    async with AsyncExitStack() as stack:
+        process_pool = (
+            await stack.enter_async_context(
+                _new_generate_process_pool(job_context, processes, precompress)
+            )
+            if processes > 1
+            else None
+        )
+        log_job = create_task(_log_jobs_forever(app, scheduler))
+        try:
+            # Entity jobs are sent to the process pool as the scheduler takes them, so that the pool and the jobs in
+            # this process run at the same time, and pending entity jobs never need to be kept in memory.
+            await scheduler.run(
+                _run_jobs(
+                    job_context,
+                    manifest=manifest,
+                    previous_manifest=previous_manifest,
+                    process_pool=process_pool,
+                )
+            )
+        finally:
             log_job.cancel()
-    await _log_jobs(app, jobs)
+    await _log_jobs(app, scheduler)
 
-    project.configuration.output_directory_path.chmod(0o755)
-    for directory_path_str, subdirectory_names, file_names in os.walk(
-        project.configuration.output_directory_path
-    ):
-        directory_path = Path(directory_path_str)
-        for subdirectory_name in subdirectory_names:
-            (directory_path / subdirectory_name).chmod(0o755)
-        for file_name in file_names:
-            (directory_path / file_name).chmod(0o644)
+    # Generate image derivatives last, so that each source image is decoded once for all the derivatives that were
+    # needed across all resources.
+    await image_derivative_planner.generate(app.process_pool)
+
+    if manifest is not None and previous_manifest is not None:
+        await to_thread(_prune_entity_resources, project, manifest, previous_manifest)
+
+    # Write the manifest last, so that an interrupted generation never leaves behind a manifest that claims
+    # resources are up to date when they are not.
+    if manifest is not None:
+        await manifest.write(_build_manifest_file_path(project))
+
+
+def _build_manifest_file_path(project: Project) -> Path:
+    return project.configuration.output_directory_path / "build-manifest.json"
+
+
+async def _fingerprint_inputs(project: Project) -> str:
+    assets = await project.assets
+    asset_paths = sorted([asset_path async for asset_path in assets.walk()])
+    return hashid_sequence(
+        about.version(),
+        json.dumps(project.configuration.dump(), sort_keys=True, default=str),
+        await hashid_file_meta(project.logo),
+        *[
+            await hashid_file_meta(await assets.get(asset_path))
+            for asset_path in asset_paths
+        ],
+    )
+
+
+def _normalize_fingerprint_dump(dump: Dump) -> Dump:
+    # Non-persistent IDs are regenerated every time an ancestry is loaded, so they must not affect fingerprints.
+    if isinstance(dump, NonPersistentId):
+        return None
+    if isinstance(dump, Mapping):
+        return {key: _normalize_fingerprint_dump(value) for key, value in dump.items()}
+    if isinstance(dump, Sequence) and not isinstance(dump, str):
+        return [_normalize_fingerprint_dump(value) for value in dump]
+    return dump
+
+
+async def _new_build_manifest(project: Project) -> BuildManifest:
+    dump_fingerprints: MutableMapping[Entity, str] = {}
+
+    async def _fingerprint_dump(entity: Entity) -> str:
+        try:
+            return dump_fingerprints[entity]
+        except KeyError:
+            dump_fingerprints[entity] = hashid(
+                json.dumps(
+                    _normalize_fingerprint_dump(await entity.dump_linked_data(project)),
+                    sort_keys=True,
+                )
+            )
+            return dump_fingerprints[entity]
+
+    # Entity pages render information about arbitrarily distant entities, such as siblings, ancestors, descendants,
+    # and enclosing places, and templates may render any information at all. Therefore, all entity pages must be
+    # generated again if any entity changed.
+    html_fingerprint = hashid_sequence(
+        *sorted([await _fingerprint_dump(entity) for entity in project.ancestry])
+    )
+
+    manifest = BuildManifest(await _fingerprint_inputs(project))
+    async for entity_type in model.ENTITY_TYPE_REPOSITORY:
+        if not issubclass(entity_type, UserFacingEntity):
+            continue
+        for entity in project.ancestry[entity_type]:
+            if not persistent_id(entity):
+                continue
+            manifest.add(
+                entity_type.plugin_id(),
+                entity.id,
+                await _fingerprint_dump(entity),
+                html_fingerprint if is_public(entity) else None,
+            )
+    return manifest
 
 
-async def _log_jobs(app: App, jobs: Sequence[Task[None]]) -> None:
+def _entities_added_or_removed(
+    manifest: BuildManifest, previous_manifest: BuildManifest
+) -> bool:
+    entity_type_ids = manifest.entity_type_ids() | previous_manifest.entity_type_ids()
+    return any(
+        manifest.entity_ids(entity_type_id)
+        != previous_manifest.entity_ids(entity_type_id)
+        for entity_type_id in entity_type_ids
+    )
+
+
+def _entity_html_changed(
+    manifest: BuildManifest, previous_manifest: BuildManifest
+) -> bool:
+    if _entities_added_or_removed(manifest, previous_manifest):
+        return True
+    for entity_type_id in manifest.entity_type_ids():
+        for entity_id in manifest.entity_ids(entity_type_id):
+            fingerprints = manifest.get(entity_type_id, entity_id)
+            previous_fingerprints = previous_manifest.get(entity_type_id, entity_id)
+            assert fingerprints is not None
+            assert previous_fingerprints is not None
+            if fingerprints[1] != previous_fingerprints[1]:
+                return True
+    return False
+
+
+def _prune_entity_resources(
+    project: Project, manifest: BuildManifest, previous_manifest: BuildManifest
+) -> None:
+    locales = list(project.configuration.locales.keys())
+    for entity_type_id in previous_manifest.entity_type_ids():
+        for entity_id in previous_manifest.entity_ids(entity_type_id):
+            fingerprints = manifest.get(entity_type_id, entity_id)
+            resource_paths = []
+            if fingerprints is None:
+                resource_paths.append(
+                    project.configuration.www_directory_path
+                    / entity_type_id
+                    / entity_id
+                    / "index.json"
+                )
+            if fingerprints is None or fingerprints[1] is None:
+                resource_paths.extend(
+                    project.configuration.localize_www_directory_path(locale)
+                    / entity_type_id
+                    / entity_id
+                    / "index.html"
+                    for locale in locales
+                )
+            for resource_path in resource_paths:
+                for resource_file_path in (
+                    resource_path,
+                    *(
+                        resource_path.with_name(resource_path.name + suffix)
+                        for suffix in PRECOMPRESSED_SUFFIXES
+                    ),
+                ):
+                    with suppress(FileNotFoundError):
+                        resource_file_path.unlink()
+                # Remove the resource's directory if this left it empty.
+                with suppress(OSError):
+                    resource_path.parent.rmdir()
+
+
+@final
+class _JobScheduler:
+    """
+    Run jobs from an asynchronous iterable, with a bounded number of jobs in flight.
+
+    Jobs are only taken from the iterable once there is room for them, so that jobs that have not started yet do not
+    take up any memory.
+    """
+
+    def __init__(self, concurrency: int):
+        assert concurrency > 0
+        self._concurrency = concurrency
+        self._in_flight: set[Future[None]] = set()
+        self._done: MutableSequence[Future[None]] = []
+        self._job_done = Event()
+        self._completed_job_count = 0
+        self._start = monotonic()
+
+    @property
+    def completed_job_count(self) -> int:
+        """
+        The number of completed jobs.
+        """
+        return self._completed_job_count
+
+    @property
+    def in_flight_job_count(self) -> int:
+        """
+        The number of jobs that have been started, but have not completed yet.
+        """
+        return len(self._in_flight)
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of jobs completed per second.
+        """
+        return self._completed_job_count / max(monotonic() - self._start, 1e-9)
+
+    async def run(self, jobs: AsyncIterable[Awaitable[None]]) -> None:
+        """
+        Run the given jobs, and wait for them to complete.
+        """
+        try:
+            async for job in jobs:
+                in_flight_job = ensure_future(job)
+                self._in_flight.add(in_flight_job)
+                in_flight_job.add_done_callback(self._complete)
+                while len(self._in_flight) >= self._concurrency:
+                    await self._wait()
+            while self._in_flight:
+                await self._wait()
+            self._raise_for_done()
+        except BaseException:
+            for pending_job in self._in_flight:
+                pending_job.cancel()
+            raise
+
+    def _complete(self, job: Future[None]) -> None:
+        self._in_flight.discard(job)
+        self._done.append(job)
+        self._completed_job_count += 1
+        self._job_done.set()
+
+    async def _wait(self) -> None:
+        # Unlike asyncio.wait(), this does not add callbacks to every job in flight each time a job completes.
+        await self._job_done.wait()
+        self._job_done.clear()
+        self._raise_for_done()
+
+    def _raise_for_done(self) -> None:
+        done, self._done = self._done, []
+        for done_job in done:
+            done_job.result()
+
+
+async def _run_entity_job(
+    job_context: ProjectContext, process_pool: Executor, entity_job: _EntityJob
+) -> None:
+    image_derivatives = await get_running_loop().run_in_executor(
+        process_pool, _generate_entity_in_worker, *entity_job
+    )
+    # Workers only plan image derivatives, so that they can be generated together with those of other workers.
+    assert job_context.image_derivative_planner is not None
+    job_context.image_derivative_planner.plan(*image_derivatives)
+
+
+async def _log_jobs(app: App, scheduler: _JobScheduler) -> None:
     localizer = await app.localizer
-    total_job_count = len(jobs)
-    completed_job_count = len([job for job in jobs if job.done()])
     logging.getLogger(__name__).info(
         localizer._(
-            "Generated {completed_job_count} out of {total_job_count} items ({completed_job_percentage}%)."
+            "Generated {completed_job_count} items, with {in_flight_job_count} in progress ({job_throughput} items per second)."
         ).format(
-            completed_job_count=completed_job_count,
-            total_job_count=total_job_count,
-            completed_job_percentage=floor(
-                completed_job_count / (total_job_count / 100)
-            ),
+            completed_job_count=scheduler.completed_job_count,
+            in_flight_job_count=scheduler.in_flight_job_count,
+            job_throughput=round(scheduler.throughput),
         )
     )
 
 
-async def _log_jobs_forever(app: App, jobs: Sequence[Task[None]]) -> None:
+async def _log_jobs_forever(app: App, scheduler: _JobScheduler) -> None:
     with suppress(CancelledError):
         while True:
-            await _log_jobs(app, jobs)
+            await _log_jobs(app, scheduler)
             await sleep(5)
 
 
-_JobP = ParamSpec("_JobP")
+_EntityJob = tuple[type[Entity], Sequence[str], str | None]
+"""
+An entity resource generation job, consisting of an entity type, entity IDs, and the locale to generate HTML in, or
+``None`` to generate JSON.
+"""
+
+
+_ENTITY_JSON_BATCH_SIZE = 100
+
+
+@asynccontextmanager
+async def _new_generate_process_pool(
+    job_context: ProjectContext, processes: int, precompress: bool
+) -> AsyncIterator[Executor]:
+    project = job_context.project
+    # Pickle the ancestry once, rather than once for every process.
+    ancestry = await to_thread(pickle.dumps, project.ancestry)
+    process_pool = ProcessPoolExecutor(
+        processes,
+        initializer=_initialize_generate_worker,
+        initargs=(
+            project.app.configuration,
+            project.app.binary_file_cache.path,
+            project.configuration,
+            ancestry,
+            precompress,
+            # Let workers render the same job start time as the main process.
+            job_context.start,
+        ),
+    )
+    try:
+        yield process_pool
+    finally:
+        await to_thread(process_pool.shutdown, cancel_futures=True)
+
+
+_generate_worker: tuple[Runner, ProjectContext] | None = None
 
 
-def _run_job(
-    semaphore: Semaphore,
-    f: Callable[_JobP, Awaitable[None]],
-    *args: _JobP.args,
-    **kwargs: _JobP.kwargs,
-) -> Coroutine[Any, Any, None]:
-    async def _job():
-        async with semaphore:
-            await f(*args, **kwargs)
+def _initialize_generate_worker(
+    app_configuration: AppConfiguration,
+    cache_directory_path: Path,
+    project_configuration: ProjectConfiguration,
+    ancestry: bytes,
+    precompress: bool,
+    start: datetime,
+) -> None:
+    global _generate_worker
+    runner = Runner()
+    stack = AsyncExitStack()
+    job_context = runner.run(
+        _new_generate_worker_job_context(
+            stack,
+            app_configuration,
+            cache_directory_path,
+            project_configuration,
+            pickle.loads(ancestry),
+            precompress,
+            start,
+        )
+    )
+    _generate_worker = runner, job_context
+    Finalize(None, _shutdown_generate_worker, args=(runner, stack), exitpriority=0)
+
+
+async def _new_generate_worker_job_context(
+    stack: AsyncExitStack,
+    app_configuration: AppConfiguration,
+    cache_directory_path: Path,
+    project_configuration: ProjectConfiguration,
+    ancestry: Ancestry,
+    precompress: bool,
+    start: datetime,
+) -> ProjectContext:
+    app = await stack.enter_async_context(
+        App(
+            app_configuration,
+            cache_directory_path,
+            cache_factory=lambda app: PickledFileCache[Any](cache_directory_path),
+        )
+    )
+    project = await stack.enter_async_context(
+        await Project.new(app, configuration=project_configuration, ancestry=ancestry)
+    )
+    return ProjectContext(
+        project,
+        precompressor=Precompressor() if precompress else None,
+        image_derivative_planner=ImageDerivativePlanner(),
+        start=start,
+    )
+
 
-    return _job()
+def _shutdown_generate_worker(runner: Runner, stack: AsyncExitStack) -> None:
+    try:
+        runner.run(stack.aclose())
+    finally:
+        runner.close()
+
+
+def _generate_entity_in_worker(
+    entity_type: type[Entity], entity_ids: Sequence[str], locale: str | None
+) -> Sequence[ImageDerivative]:
+    assert _generate_worker is not None
+    runner, job_context = _generate_worker
+    if locale is None:
+        runner.run(_generate_entity_jsons(job_context, entity_type, entity_ids))
+    else:
+        for entity_id in entity_ids:
+            runner.run(
+                _generate_entity_html(job_context, locale, entity_type, entity_id)
+            )
+    assert job_context.image_derivative_planner is not None
+    return job_context.image_derivative_planner.pop_derivatives()
 
 
 async def _run_jobs(
     job_context: ProjectContext,
+    *,
+    manifest: BuildManifest | None = None,
+    previous_manifest: BuildManifest | None = None,
+    process_pool: Executor | None = None,
 ) -> AsyncIterator[Coroutine[Any, Any, None]]:
+    """
+    Yield the jobs to generate the site with.
+
+    :param process_pool: If given, entity resources are generated in this process pool.
+    """
     project = job_context.project
-    semaphore = Semaphore(512)
-    yield _run_job(semaphore, _generate_favicon, job_context)
-    yield _run_job(semaphore, _generate_json_error_responses, project)
-    yield _run_job(semaphore, _generate_dispatch, job_context)
-    yield _run_job(semaphore, _generate_robots_txt, job_context)
-    yield _run_job(semaphore, _generate_sitemap, job_context)
-    yield _run_job(semaphore, _generate_json_schema, job_context)
-    yield _run_job(semaphore, _generate_openapi, job_context)
+    yield _generate_favicon(job_context)
+    yield _generate_json_error_responses(job_context)
+    yield _generate_dispatch(job_context)
+    yield _generate_robots_txt(job_context)
+    if (
+        manifest is None
+        or previous_manifest is None
+        or _entities_added_or_removed(manifest, previous_manifest)
+    ):
+        yield _generate_sitemap(job_context)
+    yield _generate_json_schema(job_context)
+    yield _generate_openapi(job_context)
 
     locales = list(project.configuration.locales.keys())
 
     for locale in locales:
-        yield _run_job(
-            semaphore, _generate_localized_public_assets, job_context, locale
-        )
+        yield _generate_localized_public_assets(job_context, locale)
+
+    # Like entity pages, entity list pages render information about other entities, such as the people an event list
+    # names, so they must be generated again if any entity changed.
+    entity_html_changed = (
+        manifest is None
+        or previous_manifest is None
+        or _entity_html_changed(manifest, previous_manifest)
+    )
 
     async for entity_type in model.ENTITY_TYPE_REPOSITORY:
         if not issubclass(entity_type, UserFacingEntity):
             continue
+        entity_type_changed = manifest is None or previous_manifest is None
+        json_entity_ids: MutableSequence[str] = []
+        for entity in project.ancestry[entity_type]:
+            if not persistent_id(entity):
+                continue
+
+            generate_json = True
+            generate_html = is_public(entity)
+            if manifest is not None and previous_manifest is not None:
+                fingerprints = manifest.get(entity_type.plugin_id(), entity.id)
+                previous_fingerprints = previous_manifest.get(
+                    entity_type.plugin_id(), entity.id
+                )
+                if fingerprints == previous_fingerprints:
+                    continue
+                entity_type_changed = True
+                if fingerprints is not None and previous_fingerprints is not None:
+                    generate_json = fingerprints[0] != previous_fingerprints[0]
+                    generate_html = (
+                        generate_html and fingerprints[1] != previous_fingerprints[1]
+                    )
+
+            if generate_json:
+                json_entity_ids.append(entity.id)
+            if generate_html:
+                for locale in locales:
+                    if process_pool is None:
+                        yield _generate_entity_html(
+                            job_context,
+                            locale,
+                            entity_type,
+                            entity.id,
+                        )
+                    else:
+                        yield _run_entity_job(
+                            job_context,
+                            process_pool,
+                            (entity_type, (entity.id,), locale),
+                        )
+
+        # Entity JSON resources are small and many, so generate them in batches.
+        for offset in range(0, len(json_entity_ids), _ENTITY_JSON_BATCH_SIZE):
+            json_entity_ids_batch = json_entity_ids[
+                offset : offset + _ENTITY_JSON_BATCH_SIZE
+            ]
+            if process_pool is None:
+                yield _generate_entity_jsons(
+                    job_context,
+                    entity_type,
+                    json_entity_ids_batch,
+                )
+            else:
+                yield _run_entity_job(
+                    job_context,
+                    process_pool,
+                    (entity_type, json_entity_ids_batch, None),
+                )
+
+        if (
+            not entity_type_changed
+            and manifest is not None
+            and previous_manifest is not None
+        ):
+            entity_type_changed = manifest.entity_ids(
+                entity_type.plugin_id()
+            ) != previous_manifest.entity_ids(entity_type.plugin_id())
         if (
-            entity_type in project.configuration.entity_types
+            (entity_type_changed or entity_html_changed)
+            and entity_type in project.configuration.entity_types
             and project.configuration.entity_types[entity_type].generate_html_list
         ):
             for locale in locales:
-                yield _run_job(
-                    semaphore,
-                    _generate_entity_type_list_html,
+                yield _generate_entity_type_list_html(
                     job_context,
                     locale,
                     entity_type,
                 )
-        yield _run_job(
-            semaphore, _generate_entity_type_list_json, job_context, entity_type
-        )
-        for entity in project.ancestry[entity_type]:
-            if not persistent_id(entity):
-                continue
-
-            yield _run_job(
-                semaphore, _generate_entity_json, job_context, entity_type, entity.id
-            )
-            if is_public(entity):
-                for locale in locales:
-                    yield _run_job(
-                        semaphore,
-                        _generate_entity_html,
-                        job_context,
-                        locale,
-                        entity_type,
-                        entity.id,
-                    )
+        if entity_type_changed:
+            yield _generate_entity_type_list_json(job_context, entity_type)
 
 
 async def _generate_dispatch(job_context: ProjectContext) -> None:
@@ -230,14 +692,15 @@ async def _generate_localized_public_asset(
     file_destination_path = www_directory_path / asset_path.relative_to(
         Path("public") / "localized"
     )
-    await makedirs(file_destination_path.parent, exist_ok=True)
-    await to_thread(shutil.copy2, await assets.get(asset_path), file_destination_path)
+    await to_thread(copy_file, await assets.get(asset_path), file_destination_path)
     renderer = await project.renderer
-    await renderer.render_file(
+    file_destination_path = await renderer.render_file(
         file_destination_path,
         job_context=job_context,
         localizer=await project.app.localizers.get(locale),
     )
+    await to_thread(file_destination_path.chmod, 0o644)
+    await _precompress_public_asset(job_context, file_destination_path)
 
 
 async def _generate_localized_public_assets(
@@ -270,10 +733,38 @@ async def _generate_static_public_asset(
         project.configuration.www_directory_path
         / asset_path.relative_to(Path("public") / "static")
     )
-    await makedirs(file_destination_path.parent, exist_ok=True)
-    await to_thread(shutil.copy2, await assets.get(asset_path), file_destination_path)
+    await to_thread(copy_file, await assets.get(asset_path), file_destination_path)
     renderer = await project.renderer
-    await renderer.render_file(file_destination_path, job_context=job_context)
+    file_destination_path = await renderer.render_file(
+        file_destination_path, job_context=job_context
+    )
+    await to_thread(file_destination_path.chmod, 0o644)
+    await _precompress_public_asset(job_context, file_destination_path)
+
+
+_PRECOMPRESSIBLE_PUBLIC_ASSET_SUFFIXES = {
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+}
+
+
+async def _precompress_public_asset(
+    job_context: ProjectContext, file_path: Path
+) -> None:
+    precompressor = job_context.precompressor
+    if (
+        precompressor is None
+        or file_path.suffix not in _PRECOMPRESSIBLE_PUBLIC_ASSET_SUFFIXES
+    ):
+        return
+    async with aiofiles.open(file_path, "rb") as f:
+        content = await f.read()
+    await precompressor.precompress(file_path, content)
 
 
 async def _generate_static_public_assets(
@@ -311,9 +802,11 @@ def __generate_favicon(logo_file_path: Path, www_directory_path: Path) -> None:
     with open(logo_file_path, "rb") as logo_f:
         image = Image.open(logo_f)
         image.save(www_directory_path / "favicon.ico")
+    (www_directory_path / "favicon.ico").chmod(0o644)
 
 
-async def _generate_json_error_responses(project: Project) -> None:
+async def _generate_json_error_responses(job_context: ProjectContext) -> None:
+    project = job_context.project
     for code, message in [
         (401, _("I'm sorry, dear, but it seems you're not logged in.")),
         (403, _("I'm sorry, dear, but it seems you're not allowed to view this page.")),
@@ -323,7 +816,9 @@ async def _generate_json_error_responses(project: Project) -> None:
             async with create_file(
                 project.configuration.localize_www_directory_path(locale)
                 / ".error"
-                / f"{code}.json"
+                / f"{code}.json",
+                job_context=job_context,
+                deduplicate=True,
             ) as f:
                 await f.write(
                     json.dumps(
@@ -362,7 +857,7 @@ async def _generate_entity_type_list_html(
         entity_type=entity_type,
         entities=project.ancestry[entity_type],
     )
-    async with create_html_resource(entity_type_path) as f:
+    async with create_html_resource(entity_type_path, job_context=job_context) as f:
         await f.write(rendered_html)
 
 
@@ -392,7 +887,7 @@ async def _generate_entity_type_list_json(
             )
         )
     rendered_json = json.dumps(data)
-    async with create_json_resource(entity_type_path) as f:
+    async with create_json_resource(entity_type_path, job_context=job_context) as f:
         await f.write(rendered_json)
 
 
@@ -423,23 +918,32 @@ async def _generate_entity_html(
         entity_type=entity.type,
         entity=entity,
     )
-    async with create_html_resource(entity_path) as f:
+    async with create_html_resource(entity_path, job_context=job_context) as f:
         await f.write(rendered_html)
 
 
-async def _generate_entity_json(
+async def _generate_entity_jsons(
     job_context: ProjectContext,
     entity_type: type[Entity],
-    entity_id: str,
+    entity_ids: Sequence[str],
+    *,
+    json_encoder: JsonEncoder = DEFAULT_JSON_ENCODER,
 ) -> None:
     project = job_context.project
-    entity_path = (
-        project.configuration.www_directory_path / entity_type.plugin_id() / entity_id
+    entity_type_path = (
+        project.configuration.www_directory_path / entity_type.plugin_id()
+    )
+    entities = project.ancestry[entity_type]
+    await create_files(
+        [
+            (
+                entity_type_path / entity_id / "index.json",
+                json_encoder(await entities[entity_id].dump_linked_data(project)),
+            )
+            for entity_id in entity_ids
+        ],
+        job_context=job_context,
     )
-    entity = project.ancestry[entity_type][entity_id]
-    rendered_json = json.dumps(await entity.dump_linked_data(project))
-    async with create_json_resource(entity_path) as f:
-        await f.write(rendered_json)
 
 
 _ROBOTS_TXT_TEMPLATE = """Sitemap: {{{ sitemap }}}"""
@@ -454,17 +958,16 @@ async def _generate_robots_txt(
         "{{{ sitemap }}}",
         static_url_generator.generate("/sitemap.xml", absolute=True),
     )
-    await to_thread(
-        project.configuration.www_directory_path.mkdir,
-        exist_ok=True,
-        parents=True,
-    )
-    async with aiofiles.open(
-        project.configuration.www_directory_path / "robots.txt", mode="w"
+    async with create_file(
+        project.configuration.www_directory_path / "robots.txt",
+        job_context=job_context,
     ) as f:
         await f.write(rendered_robots_txt)
 
 
+_SITEMAP_BATCH_SIZE = 50_000
+
+
 _SITEMAP_URL_TEMPLATE = """<url>
     <loc>{{{ loc }}}</loc>
     <lastmod>{{{ lastmod }}}</lastmod>
@@ -472,9 +975,12 @@ _SITEMAP_URL_TEMPLATE = """<url>
 """
 
 
-_SITEMAP_BATCH_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+_SITEMAP_BATCH_HEADER = """<?xml version="1.0" encoding="utf-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9 http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
-    {{{ urls }}}
+    """
+
+
+_SITEMAP_BATCH_FOOTER = """
 </urlset>
 """
 
@@ -498,73 +1004,148 @@ async def _generate_sitemap(
     project = job_context.project
     static_url_generator = await project.static_url_generator
     localized_url_generator = await project.localized_url_generator
-    sitemap_batches = []
-    sitemap_batch_urls: MutableSequence[str] = []
-    sitemap_batch_urls_length = 0
-    sitemap_batches.append(sitemap_batch_urls)
-    for locale in project.configuration.locales:
-        for entity in project.ancestry:
-            if not persistent_id(entity):
-                continue
-            if not isinstance(entity, UserFacingEntity):
-                continue
+    www_directory_path = project.configuration.www_directory_path
+    compress = project.configuration.compress_sitemaps
+    locales = list(project.configuration.locales)
+    # Keep references to the entities only. Their URLs are generated lazily, while each sitemap is being written.
+    entities = [
+        entity
+        for entity in project.ancestry
+        if persistent_id(entity) and isinstance(entity, UserFacingEntity)
+    ]
+    sitemap_urls_count = len(locales) * len(entities)
+    sitemap_batch_count = max(1, -(-sitemap_urls_count // _SITEMAP_BATCH_SIZE))
+    sitemap_batch_file_names = [
+        f"sitemap-{sitemap_batch_index}.xml{'.gz' if compress else ''}"
+        for sitemap_batch_index in range(sitemap_batch_count)
+    ]
 
-            sitemap_batch_urls.append(
-                localized_url_generator.generate(
-                    entity,
-                    absolute=True,
-                    locale=locale,
-                    media_type=HTML,
-                )
+    await gather(
+        *(
+            to_thread(
+                _write_sitemap_batch,
+                www_directory_path / sitemap_batch_file_name,
+                _generate_sitemap_batch_urls(
+                    localized_url_generator,
+                    locales,
+                    entities,
+                    sitemap_batch_index * _SITEMAP_BATCH_SIZE,
+                    min(
+                        (sitemap_batch_index + 1) * _SITEMAP_BATCH_SIZE,
+                        sitemap_urls_count,
+                    ),
+                ),
+                job_context.start.isoformat(),
+                compress=compress,
+                precompress=job_context.precompressor is not None,
             )
-            sitemap_batch_urls_length += 1
-
-            if sitemap_batch_urls_length == 50_000:
-                sitemap_batch_urls = []
-                sitemap_batch_urls_length = 0
-                sitemap_batches.append(sitemap_batch_urls)
-
-    sitemap_urls = []
-    for sitemap_batch_index, sitemap_batch_urls in enumerate(sitemap_batches):
-        sitemap_urls.append(
-            static_url_generator.generate(
-                f"/sitemap-{sitemap_batch_index}.xml",
-                absolute=True,
+            for sitemap_batch_index, sitemap_batch_file_name in enumerate(
+                sitemap_batch_file_names
             )
         )
-        rendered_sitemap_batch = _SITEMAP_BATCH_TEMPLATE.replace(
-            "{{{ urls }}}",
-            "".join(
-                (
-                    _SITEMAP_URL_TEMPLATE.replace(
-                        "{{{ loc }}}", sitemap_batch_url
-                    ).replace("{{{ lastmod }}}", job_context.start.isoformat())
-                    for sitemap_batch_url in sitemap_batch_urls
-                )
-            ),
-        )
-        async with aiofiles.open(
-            project.configuration.www_directory_path
-            / f"sitemap-{sitemap_batch_index}.xml",
-            "w",
-        ) as f:
-            await f.write(rendered_sitemap_batch)
+    )
+    await to_thread(
+        _prune_sitemap_batches, www_directory_path, sitemap_batch_file_names
+    )
 
     rendered_sitemap = _SITEMAP_TEMPLATE.replace(
         "{{{ sitemaps }}}",
         "".join(
             (
-                _SITEMAP_SITEMAP_TEMPLATE.replace("{{{ loc }}}", sitemap_url)
-                for sitemap_url in sitemap_urls
+                _SITEMAP_SITEMAP_TEMPLATE.replace(
+                    "{{{ loc }}}",
+                    xml_escape(
+                        static_url_generator.generate(
+                            f"/{sitemap_batch_file_name}", absolute=True
+                        )
+                    ),
+                )
+                for sitemap_batch_file_name in sitemap_batch_file_names
             )
         ),
     )
-    async with aiofiles.open(
-        project.configuration.www_directory_path / "sitemap.xml", "w"
+    async with create_file(
+        www_directory_path / "sitemap.xml",
+        job_context=job_context,
     ) as f:
         await f.write(rendered_sitemap)
 
 
+def _generate_sitemap_batch_urls(
+    localized_url_generator: LocalizedUrlGenerator,
+    locales: Sequence[str],
+    entities: Sequence[Entity],
+    start: int,
+    stop: int,
+) -> Iterator[str]:
+    """
+    Generate the URLs for the sitemap entries from ``start`` up to (but excluding) ``stop``.
+
+    Entries are ordered by locale first, and by entity second.
+    """
+    for index in range(start, stop):
+        locale_index, entity_index = divmod(index, len(entities))
+        yield localized_url_generator.generate(
+            entities[entity_index],
+            absolute=True,
+            locale=locales[locale_index],
+            media_type=HTML,
+        )
+
+
+def _write_sitemap_batch(
+    path: Path,
+    urls: Iterator[str],
+    lastmod: str,
+    *,
+    compress: bool,
+    precompress: bool,
+) -> None:
+    with ExitStack() as stack:
+        writes = [stack.enter_context(_stream_file(path, compress=compress))]
+        if precompress and not compress:
+            writes.append(
+                stack.enter_context(
+                    _stream_file(path.with_name(f"{path.name}.gz"), compress=True)
+                )
+            )
+        else:
+            path.with_name(f"{path.name}.gz").unlink(missing_ok=True)
+        path.with_name(f"{path.name}.br").unlink(missing_ok=True)
+
+        def write(content: str) -> None:
+            encoded_content = content.encode("utf-8")
+            for write_encoded in writes:
+                write_encoded(encoded_content)
+
+        write(_SITEMAP_BATCH_HEADER)
+        for url in urls:
+            write(
+                _SITEMAP_URL_TEMPLATE.replace("{{{ loc }}}", xml_escape(url)).replace(
+                    "{{{ lastmod }}}", lastmod
+                )
+            )
+        write(_SITEMAP_BATCH_FOOTER)
+
+
+def _prune_sitemap_batches(
+    www_directory_path: Path, sitemap_batch_file_names: Sequence[str]
+) -> None:
+    sitemap_batch_file_paths = {
+        www_directory_path / sitemap_batch_file_name
+        for sitemap_batch_file_name in sitemap_batch_file_names
+    }
+    for file_path in www_directory_path.glob("sitemap-*.xml*"):
+        if file_path in sitemap_batch_file_paths:
+            continue
+        if (
+            file_path.with_suffix("") in sitemap_batch_file_paths
+            and file_path.suffix in PRECOMPRESSED_SUFFIXES
+        ):
+            continue
+        file_path.unlink(missing_ok=True)
+
+
 async def _generate_json_schema(
     job_context: ProjectContext,
 ) -> None:
@@ -573,7 +1154,9 @@ async def _generate_json_schema(
     logging.getLogger(__name__).debug(localizer._("Generating JSON Schema..."))
     schema = await ProjectSchema.new_for_project(project)
     rendered_json = json.dumps(schema.schema)
-    async with create_file(ProjectSchema.www_path(project)) as f:
+    async with create_file(
+        ProjectSchema.www_path(project), job_context=job_context
+    ) as f:
         await f.write(rendered_json)
 
 
@@ -588,5 +1171,5 @@ async def _generate_openapi(
     )
     api_directory_path = project.configuration.www_directory_path / "api"
     rendered_json = json.dumps(await Specification(project).build())
-    async with create_json_resource(api_directory_path) as f:
+    async with create_json_resource(api_directory_path, job_context=job_context) as f:
         await f.write(rendered_json)
@@ -4,37 +4,299 @@ File utilities for site generation.
 
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
-from typing import AsyncContextManager, TYPE_CHECKING
+import gzip
+import os
+import shutil
+from asyncio import to_thread, get_running_loop
+from contextlib import asynccontextmanager, suppress, contextmanager
+from importlib import import_module
+from threading import get_ident
+from typing import AsyncContextManager, TYPE_CHECKING, final, Callable
 
-import aiofiles
-from aiofiles.os import makedirs
+from betty.hashid import hashid
+from betty.os import _link_or_copy, open_file_atomically, write_file_atomically
+from betty.project import ProjectContext
 
 if TYPE_CHECKING:
-    from aiofiles.threadpool.text import AsyncTextIOWrapper
-    from collections.abc import AsyncIterator
     from pathlib import Path
+    from collections.abc import (
+        AsyncIterator,
+        Iterator,
+        MutableSequence,
+        MutableMapping,
+        Sequence,
+    )
+    from concurrent.futures import Executor
+    from betty.job import Context
+
+
+_FILE_MODE = 0o644
+_DIRECTORY_MODE = 0o755
+
+
+def _gzip_compress(content: bytes) -> bytes:
+    # Omit the modification time, so that identical content always compresses identically.
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+PRECOMPRESSED_SUFFIXES = (".gz", ".br")
+"""
+The file name suffixes of precompressed file variants.
+"""
+
+
+_COMPRESSORS: MutableMapping[str, Callable[[bytes], bytes]] = {".gz": _gzip_compress}
+with suppress(ImportError):
+    _COMPRESSORS[".br"] = import_module("brotli").compress
+
+
+@final
+class Precompressor:
+    """
+    Write precompressed variants of files alongside them.
+
+    Web servers can serve these variants to clients that accept them, without having to compress files on the fly.
+    Gzip variants (``.gz``) are always written. Brotli variants (``.br``) are written if the ``brotli`` package is
+    installed.
+
+    :param threshold: The minimum size of files to precompress, in bytes. Smaller files rarely benefit from compression.
+    :param executor: The executor to compress files in. Defaults to the event loop's default executor.
+    """
+
+    def __init__(self, *, threshold: int = 1024, executor: Executor | None = None):
+        self._threshold = threshold
+        self._executor = executor
+
+    async def precompress(self, path: Path, content: bytes) -> None:
+        """
+        Write the precompressed variants of a file with the given content.
+
+        Any existing variants of files that are not precompressed are removed, so they are never served instead of
+        the file itself.
+        """
+        await get_running_loop().run_in_executor(
+            self._executor, _precompress_file, path, content, self._threshold
+        )
+
+    async def precompress_all(self, files: Sequence[tuple[Path, bytes]]) -> None:
+        """
+        Write the precompressed variants of many files with the given contents.
+
+        The files are precompressed in a single call to the executor, which makes this suitable for large numbers of
+        small files.
+        """
+        await get_running_loop().run_in_executor(
+            self._executor, _precompress_files, files, self._threshold
+        )
+
+
+def _precompress_files(files: Sequence[tuple[Path, bytes]], threshold: int) -> None:
+    for path, content in files:
+        _precompress_file(path, content, threshold)
+
+
+def _precompress_file(path: Path, content: bytes, threshold: int) -> None:
+    for suffix in PRECOMPRESSED_SUFFIXES:
+        variant_path = path.with_name(path.name + suffix)
+        compress = _COMPRESSORS.get(suffix)
+        if compress is not None and len(content) >= threshold:
+            compressed_content = compress(content)
+            if len(compressed_content) < len(content):
+                _write_file(variant_path, compressed_content, None)
+                continue
+        variant_path.unlink(missing_ok=True)
+
+
+@final
+class ResourceFile:
+    """
+    The content of a resource's file.
+
+    Content is kept in memory, and written to the file once it is complete.
+    """
+
+    def __init__(self):
+        self._content: MutableSequence[str] = []
+
+    async def write(self, content: str) -> None:
+        """
+        Add content to the file.
+        """
+        self._content.append(content)
+
+    @property
+    def content(self) -> bytes:
+        """
+        The file's complete content.
+        """
+        return "".join(self._content).encode("utf-8")
 
 
 @asynccontextmanager
-async def create_file(path: Path) -> AsyncIterator[AsyncTextIOWrapper]:
+async def create_file(
+    path: Path, *, job_context: Context | None = None, deduplicate: bool = False
+) -> AsyncIterator[ResourceFile]:
     """
     Create the file for a resource.
+
+    If the file exists already and its content is identical, it is left untouched, so that its modification time
+    is preserved. Files are created with permissions ``0o644``, and any directories with permissions ``0o755``.
+
+    :param job_context: If the job context has a :py:class:`betty.project.generate.file.Precompressor`, it
+        precompresses the file.
+    :param deduplicate: Whether the file's content is likely identical to that of other files, such as the same error
+        response for each locale. If so, and a job context is given, files with content identical to that of another
+        deduplicated file created within the same job context are hard links to that other file, where possible.
+        Deduplicated files are tracked until the job context ends, so do not deduplicate files with unique content.
+    """
+    resource_file = ResourceFile()
+    yield resource_file
+    content = resource_file.content
+    if job_context is None:
+        await to_thread(_write_file, path, content, None)
+        return
+    if deduplicate:
+        async with job_context.cache.with_scope("generate-file").getset(
+            hashid(content)
+        ) as (cache_item, setter):
+            await to_thread(
+                _write_file,
+                path,
+                content,
+                None if cache_item is None else await cache_item.value(),
+            )
+            if cache_item is None:
+                await setter(path)
+    else:
+        await to_thread(_write_file, path, content, None)
+    if isinstance(job_context, ProjectContext) and job_context.precompressor:
+        await job_context.precompressor.precompress(path, content)
+
+
+def _write_file(path: Path, content: bytes, link_path: Path | None) -> None:
+    with suppress(OSError):
+        if path.stat().st_size == len(content) and path.read_bytes() == content:
+            return
+    _makedirs(path.parent)
+    if link_path is not None:
+        with suppress(OSError):
+            # Content hashes are not guaranteed to be unique, so confirm the content is identical.
+            if link_path.read_bytes() == content:
+                temporary_file_path = (
+                    path.parent / f".{path.name}.{os.getpid()}.{get_ident()}"
+                )
+                temporary_file_path.hardlink_to(link_path)
+                temporary_file_path.replace(path)
+                return
+    # Never write to existing files directly, because they may be hard links to other files.
+    write_file_atomically(path, content, mode=_FILE_MODE)
+
+
+@contextmanager
+def _stream_file(
+    path: Path, *, compress: bool = False
+) -> Iterator[Callable[[bytes], object]]:
+    """
+    Stream content to a file, without keeping the complete content in memory.
+
+    This yields a function to write content with. Like :py:func:`betty.project.generate.file._write_file`, this leaves
+    existing files with identical content untouched.
+
+    :param compress: Whether to gzip-compress the content.
+    """
+    _makedirs(path.parent)
+    # Never write to existing files directly, because they may be hard links to other files.
+    with open_file_atomically(path, mode=_FILE_MODE, keep_identical=True) as f:
+        if compress:
+            # Omit the modification time, so that identical content always compresses identically.
+            with gzip.GzipFile(
+                fileobj=f, mode="wb", compresslevel=9, mtime=0
+            ) as compressed_f:
+                yield compressed_f.write
+        else:
+            yield f.write
+
+
+async def create_files(
+    files: Sequence[tuple[Path, bytes]], *, job_context: Context | None = None
+) -> None:
+    """
+    Create many files at once.
+
+    Unlike :py:func:`betty.project.generate.file.create_file`, this creates all files in a single worker thread, which
+    makes it suitable for large numbers of small files with unique content. Files are never hard links to other files.
+
+    :param files: The paths and contents of the files to create.
+    :param job_context: If the job context has a :py:class:`betty.project.generate.file.Precompressor`, it
+        precompresses the files.
+    """
+    await to_thread(_write_files, files)
+    if isinstance(job_context, ProjectContext) and job_context.precompressor:
+        await job_context.precompressor.precompress_all(files)
+
+
+def _write_files(files: Sequence[tuple[Path, bytes]]) -> None:
+    for directory_path in {path.parent for path, _ in files}:
+        _makedirs(directory_path)
+    for path, content in files:
+        _write_file(path, content, None)
+
+
+def _makedirs(path: Path) -> None:
+    if path.is_dir():
+        return
+    _makedirs(path.parent)
+    with suppress(FileExistsError):
+        path.mkdir()
+        path.chmod(_DIRECTORY_MODE)
+
+
+def make_directories(path: Path) -> None:
+    """
+    Create a directory and any missing parent directories, with their final permissions.
+
+    This blocks, so call it from a worker thread in asynchronous code.
+    """
+    _makedirs(path)
+
+
+def copy_file(source_file_path: Path, destination_file_path: Path) -> None:
+    """
+    Copy a file, and give the copy its final permissions.
+
+    This blocks, so call it from a worker thread in asynchronous code.
+    """
+    _makedirs(destination_file_path.parent)
+    shutil.copy2(source_file_path, destination_file_path)
+    destination_file_path.chmod(_FILE_MODE)
+
+
+def link_or_copy_file(source_file_path: Path, destination_file_path: Path) -> None:
+    """
+    Hard-link or copy a file, and give the destination its final permissions.
+
+    Hard links share their permissions, so this also changes those of the source file if it was linked.
+
+    This blocks, so call it from a worker thread in asynchronous code.
     """
-    await makedirs(path.parent, exist_ok=True)
-    async with aiofiles.open(path, "w", encoding="utf-8") as f:
-        yield f
+    _makedirs(destination_file_path.parent)
+    _link_or_copy(source_file_path, destination_file_path)
+    destination_file_path.chmod(_FILE_MODE)
 
 
-def create_html_resource(path: Path) -> AsyncContextManager[AsyncTextIOWrapper]:
+def create_html_resource(
+    path: Path, *, job_context: Context | None = None
+) -> AsyncContextManager[ResourceFile]:
     """
     Create the file for an HTML resource.
     """
-    return create_file(path / "index.html")
+    return create_file(path / "index.html", job_context=job_context)
 
 
-def create_json_resource(path: Path) -> AsyncContextManager[AsyncTextIOWrapper]:
+def create_json_resource(
+    path: Path, *, job_context: Context | None = None
+) -> AsyncContextManager[ResourceFile]:
     """
     Create the file for a JSON resource.
     """
-    return create_file(path / "index.json")
+    return create_file(path / "index.json", job_context=job_context)
@@ -0,0 +1,136 @@
+"""
+Build manifests for incremental site generation.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from typing import TYPE_CHECKING, Self, final
+
+import aiofiles
+
+from betty.project.generate.file import create_file
+
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping, Set
+    from pathlib import Path
+
+    from betty.machine_name import MachineName
+    from betty.serde.dump import DumpMapping, Dump
+
+
+_MANIFEST_VERSION = 1
+
+
+@final
+class BuildManifest:
+    """
+    Record the fingerprints of a generated site's entity resources.
+
+    Fingerprints are opaque strings. If a resource's fingerprint differs between two builds, the resource must be
+    generated again.
+    """
+
+    def __init__(self, inputs: str):
+        """
+        :param inputs: The fingerprint of all site-wide inputs, such as the project configuration and assets.
+        """
+        self._inputs = inputs
+        self._entities: MutableMapping[
+            MachineName, MutableMapping[str, tuple[str, str | None]]
+        ] = defaultdict(dict)
+
+    @property
+    def inputs(self) -> str:
+        """
+        The fingerprint of all site-wide inputs, such as the project configuration and assets.
+        """
+        return self._inputs
+
+    def add(
+        self,
+        entity_type_id: MachineName,
+        entity_id: str,
+        json_fingerprint: str,
+        html_fingerprint: str | None,
+    ) -> None:
+        """
+        Add an entity's resource fingerprints.
+
+        :param html_fingerprint: ``None`` if no HTML resources are generated for the entity.
+        """
+        self._entities[entity_type_id][entity_id] = (
+            json_fingerprint,
+            html_fingerprint,
+        )
+
+    def get(
+        self, entity_type_id: MachineName, entity_id: str
+    ) -> tuple[str, str | None] | None:
+        """
+        Get an entity's JSON and HTML resource fingerprints, if the entity is in the manifest.
+        """
+        try:
+            return self._entities[entity_type_id][entity_id]
+        except KeyError:
+            return None
+
+    def entity_type_ids(self) -> Set[MachineName]:
+        """
+        Get the IDs of the entity types in the manifest.
+        """
+        return {
+            entity_type_id
+            for entity_type_id, entities in self._entities.items()
+            if entities
+        }
+
+    def entity_ids(self, entity_type_id: MachineName) -> Set[str]:
+        """
+        Get the IDs of the entities of the given type in the manifest.
+        """
+        return self._entities.get(entity_type_id, {}).keys()
+
+    @classmethod
+    async def read(cls, file_path: Path) -> Self | None:
+        """
+        Read a manifest from a file.
+
+        :return: ``None`` if the file does not exist, or does not contain a manifest this version of Betty can use.
+        """
+        try:
+            async with aiofiles.open(file_path, encoding="utf-8") as f:
+                dump = json.loads(await f.read())
+            if dump["version"] != _MANIFEST_VERSION:
+                return None
+            manifest = cls(dump["inputs"])
+            for entity_type_id, entities in dump["entities"].items():
+                for entity_id, (json_fingerprint, html_fingerprint) in entities.items():
+                    manifest.add(
+                        entity_type_id, entity_id, json_fingerprint, html_fingerprint
+                    )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return manifest
+
+    async def write(self, file_path: Path) -> None:
+        """
+        Write the manifest to a file.
+        """
+        dump: DumpMapping[Dump] = {
+            "version": _MANIFEST_VERSION,
+            "inputs": self._inputs,
+            "entities": {
+                entity_type_id: {
+                    entity_id: [json_fingerprint, html_fingerprint]
+                    for entity_id, (
+                        json_fingerprint,
+                        html_fingerprint,
+                    ) in entities.items()
+                }
+                for entity_type_id, entities in self._entities.items()
+            },
+        }
+        async with create_file(file_path) as f:
+            await f.write(json.dumps(dump))
@@ -2,17 +2,30 @@
 Provide the Ancestry loading API.
 """
 
-import logging
-from asyncio import gather
-from xml.etree.ElementTree import Element
-
-from html5lib import parse
+from __future__ import annotations
 
+import json
+import logging
+import pickle
+from abc import ABC, abstractmethod
+from asyncio import gather, to_thread
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from betty import about
+from betty.ancestry import Ancestry
 from betty.ancestry.link import Link, HasLinks
-from betty.fetch import Fetcher, FetchError
-from betty.media_type import MediaType, InvalidMediaType
+from betty.event_dispatcher import EventHandlerRegistry
+from betty.fetch.metadata import LinkMetadataFetcher
+from betty.hashid import hashid, hashid_sequence
 from betty.project import Project, ProjectEvent, ProjectContext
 
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping, MutableSequence, Sequence
+    from betty.project.extension import Extension
+
+_ANCESTRY_SNAPSHOT_VERSION = 1
+
 
 class LoadAncestryEvent(ProjectEvent):
     """
@@ -32,96 +45,157 @@ class PostLoadAncestryEvent(ProjectEvent):
     pass
 
 
-async def load(project: Project) -> None:
+class AncestryInputsProvider(ABC):
+    """
+    Provide the inputs an :py:class:`betty.project.extension.Extension` loads ancestry data from.
+
+    Loaded ancestries are stored as snapshots, which are restored instead of loading the ancestry again for as long as
+    the project configuration and the fingerprints of all ancestry inputs stay the same. Snapshots are only used if
+    every extension that handles :py:class:`betty.project.load.LoadAncestryEvent` implements this interface.
+    """
+
+    @abstractmethod
+    async def fingerprint_ancestry_inputs(self) -> str:
+        """
+        Fingerprint the inputs this extension loads ancestry data from.
+
+        Fingerprints are opaque strings that MUST change whenever the inputs change.
+        """
+        pass
+
+
+async def load(project: Project, *, snapshot: bool = True) -> None:
     """
     Load an ancestry.
+
+    If the project's ancestry is empty, and a snapshot of a previously loaded ancestry exists for the same inputs,
+    the snapshot is restored instead.
+
+    :param snapshot: Whether to restore and store ancestry snapshots.
     """
+    snapshot_key = None
+    if snapshot and not len(project.ancestry):
+        snapshot_key = await _ancestry_snapshot_key(project)
+        if snapshot_key is not None and await _restore_ancestry_snapshot(
+            project, snapshot_key
+        ):
+            return
+
     job_context = ProjectContext(project)
     await project.event_dispatcher.dispatch(LoadAncestryEvent(job_context))
     await project.event_dispatcher.dispatch(PostLoadAncestryEvent(job_context))
     await _fetch_link_titles(project)
 
-
-async def _fetch_link_titles(project: Project) -> None:
-    await gather(
-        *[
-            _fetch_link_title(await project.app.fetcher, link)
-            for entity in project.ancestry
-            if isinstance(entity, HasLinks)
-            for link in entity.links
-        ]
+    if snapshot_key is not None:
+        await _store_ancestry_snapshot(project, snapshot_key)
+
+
+def _ancestry_snapshot_cache_item_id(project: Project) -> str:
+    return hashid(str(project.configuration.configuration_file_path))
+
+
+async def _ancestry_snapshot_key(project: Project) -> str | None:
+    ancestry_inputs_fingerprints = []
+    for extension in (await project.extensions).flatten():
+        if isinstance(extension, AncestryInputsProvider):
+            ancestry_inputs_fingerprints.append(
+                await extension.fingerprint_ancestry_inputs()
+            )
+        # If an extension loads ancestry data from unknown inputs, a snapshot could be restored after those changed.
+        elif _loads_ancestry(extension):
+            return None
+    return hashid_sequence(
+        str(_ANCESTRY_SNAPSHOT_VERSION),
+        about.version(),
+        json.dumps(project.configuration.dump(), sort_keys=True, default=str),
+        *ancestry_inputs_fingerprints,
     )
 
 
-async def _fetch_link_title(fetcher: Fetcher, link: Link) -> None:
-    if link.label:
-        return
+def _loads_ancestry(extension: Extension) -> bool:
+    event_handlers = EventHandlerRegistry()
+    extension.register_event_handlers(event_handlers)
+    return bool(event_handlers.handlers.get(LoadAncestryEvent))
+
+
+async def _restore_ancestry_snapshot(project: Project, snapshot_key: str) -> bool:
+    cache = project.app.cache.with_scope("ancestry")
+    async with cache.get(_ancestry_snapshot_cache_item_id(project)) as cache_item:
+        if cache_item is None:
+            return False
+        snapshot = await cache_item.value()
+    if not isinstance(snapshot, bytes):
+        return False
+    stored_snapshot_key, _, pickled_ancestry = snapshot.partition(b"\n")
+    if stored_snapshot_key.decode() != snapshot_key:
+        return False
     try:
-        response = await fetcher.fetch(link.url)
-    except FetchError as error:
-        logging.getLogger(__name__).warning(str(error))
-        return
+        ancestry = await to_thread(pickle.loads, pickled_ancestry)
+    # Unpickling may raise almost any exception, and a broken snapshot must never prevent the ancestry from loading.
+    except Exception:
+        logging.getLogger(__name__).debug(
+            "Could not restore the ancestry snapshot.", exc_info=True
+        )
+        return False
+    assert isinstance(ancestry, Ancestry)
+    with project.ancestry.unchecked():
+        project.ancestry.add(*ancestry)
+    logging.getLogger(__name__).info(
+        (await project.app.localizer)
+        ._(
+            "Restored {entity_count} entities from a snapshot of the previously loaded ancestry."
+        )
+        .format(entity_count=str(len(project.ancestry)))
+    )
+    return True
+
+
+async def _store_ancestry_snapshot(project: Project, snapshot_key: str) -> None:
     try:
-        content_type = MediaType(response.headers["Content-Type"])
-    except InvalidMediaType:
+        pickled_ancestry = await to_thread(
+            pickle.dumps, project.ancestry, pickle.HIGHEST_PROTOCOL
+        )
+    # Extensions may add entities that cannot be pickled, which must never prevent the ancestry from loading.
+    except Exception:
+        logging.getLogger(__name__).debug(
+            "Could not store the ancestry snapshot.", exc_info=True
+        )
         return
+    await project.app.cache.with_scope("ancestry").set(
+        _ancestry_snapshot_cache_item_id(project),
+        snapshot_key.encode() + b"\n" + pickled_ancestry,
+    )
 
-    if (content_type.type, content_type.subtype, content_type.suffix) not in (
-        ("text", "html", None),
-        ("application", "xhtml", "+xml"),
-    ):
-        return
 
-    document = parse(response.text)
-    title = _extract_html_title(document)
-    if title is not None:
-        link.label = title
-    if not link.description:
-        description = _extract_html_meta_description(document)
-        if description is not None:
-            link.description = description
-
-
-def _extract_html_title(document: Element) -> str | None:
-    head = document.find(
-        "ns:head",
-        namespaces={
-            "ns": "http://www.w3.org/1999/xhtml",
-        },
+async def _fetch_link_titles(project: Project) -> None:
+    # Many links may share the same URL, so fetch each URL only once.
+    links_by_url: MutableMapping[str, MutableSequence[Link]] = defaultdict(list)
+    for entity in project.ancestry:
+        if isinstance(entity, HasLinks):
+            for link in entity.links:
+                if not link.label:
+                    links_by_url[link.url].append(link)
+    if not links_by_url:
+        return
+    link_metadata_fetcher = LinkMetadataFetcher(
+        await project.app.fetcher, project.app.cache.with_scope("link-metadata")
     )
-    if head is None:
-        return None
-    title = head.find(
-        "ns:title",
-        namespaces={
-            "ns": "http://www.w3.org/1999/xhtml",
-        },
+    await gather(
+        *[
+            _fetch_link_title(link_metadata_fetcher, url, links)
+            for url, links in links_by_url.items()
+        ]
     )
-    if title is None:
-        return None
-    return title.text
 
 
-def _extract_html_meta_description(document: Element) -> str | None:
-    head = document.find(
-        "ns:head",
-        namespaces={
-            "ns": "http://www.w3.org/1999/xhtml",
-        },
-    )
-    if head is None:
-        return None
-    metas = head.findall(
-        "ns:meta",
-        namespaces={
-            "ns": "http://www.w3.org/1999/xhtml",
-        },
-    )
-    for attr_name, attr_value in (
-        ("name", "description"),
-        ("property", "og:description"),
-    ):
-        for meta in metas:
-            if meta.get(attr_name, None) == attr_value:
-                return meta.get("content", None)
-    return None
+async def _fetch_link_title(
+    link_metadata_fetcher: LinkMetadataFetcher, url: str, links: Sequence[Link]
+) -> None:
+    metadata = await link_metadata_fetcher.fetch(url)
+    if metadata is None:
+        return
+    for link in links:
+        if metadata.title is not None:
+            link.label = metadata.title
+        if not link.description and metadata.description is not None:
+            link.description = metadata.description
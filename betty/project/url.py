@@ -26,7 +26,7 @@ if TYPE_CHECKING:
     from betty.project import Project
     from betty.model import Entity
     from betty.locale import Localey
-    from collections.abc import Mapping
+    from collections.abc import Mapping, MutableMapping, Hashable
 
 
 class _ProjectUrlGenerator:
@@ -218,6 +218,9 @@ class LocalizedUrlGenerator(StdLocalizedUrlGenerator, ProjectDependentFactory):
         *upstreams: StdLocalizedUrlGenerator,
     ):
         self._upstream = ProxyLocalizedUrlGenerator(*upstreams)
+        self._urls: MutableMapping[
+            tuple[Hashable, MediaType, bool, str | None], str
+        ] = {}
 
     @override
     @classmethod
@@ -256,6 +259,25 @@ class LocalizedUrlGenerator(StdLocalizedUrlGenerator, ProjectDependentFactory):
         absolute: bool = False,
         locale: Localey | None = None,
     ) -> str:
-        return self._upstream.generate(
-            resource, media_type, absolute=absolute, locale=locale
-        )
+        # The same URLs are generated many times over, so generate each URL only once.
+        if locale is not None and not isinstance(locale, str):
+            return self._upstream.generate(
+                resource, media_type, absolute=absolute, locale=locale
+            )
+        # An entity's URL depends on its type and ID only.
+        if isinstance(resource, model.Entity):
+            url_key: Hashable = (type(resource), resource.id)
+        elif isinstance(resource, (str, type)):
+            url_key = resource
+        else:
+            return self._upstream.generate(
+                resource, media_type, absolute=absolute, locale=locale
+            )
+        key = (url_key, media_type, absolute, locale)
+        try:
+            return self._urls[key]
+        except KeyError:
+            url = self._urls[key] = self._upstream.generate(
+                resource, media_type, absolute=absolute, locale=locale
+            )
+            return url
@@ -28,6 +28,7 @@ from betty.locale.localizable import _
 from betty.project.factory import ProjectDependentFactory
 
 if TYPE_CHECKING:
+    from os import PathLike
     from betty.locale.localizer import Localizer
     from betty.project import Project
     from types import TracebackType
@@ -159,13 +160,61 @@ class ProjectServer(ProjectDependentFactory, Server):
         return cls(await project.app.localizer, project)
 
 
+_PRECOMPRESSED_CONTENT_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
 @final
 class _BuiltinServerRequestHandler(SimpleHTTPRequestHandler):
+    _content_encoding: str | None = None
+
     @override
     def end_headers(self) -> None:
         self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if self._content_encoding is not None:
+            self.send_header("Content-Encoding", self._content_encoding)
         super().end_headers()
 
+    @override
+    def translate_path(self, path: str) -> str:
+        # Serve precompressed variants of files if the client accepts them.
+        file_path = Path(super().translate_path(path))
+        self._content_encoding = None
+        if file_path.is_dir():
+            if not urlparse(path).path.endswith("/"):
+                return str(file_path)
+            if not (file_path / "index.html").is_file():
+                return str(file_path)
+            file_path /= "index.html"
+        accepted_content_encodings = self._accepted_content_encodings()
+        for content_encoding, suffix in _PRECOMPRESSED_CONTENT_ENCODINGS:
+            variant_file_path = file_path.with_name(file_path.name + suffix)
+            if (
+                content_encoding in accepted_content_encodings
+                and variant_file_path.is_file()
+            ):
+                self._content_encoding = content_encoding
+                return str(variant_file_path)
+        return str(file_path)
+
+    @override
+    def guess_type(self, path: str | PathLike[str]) -> str:
+        if self._content_encoding is not None:
+            path = Path(path).with_suffix("")
+        return super().guess_type(path)
+
+    def _accepted_content_encodings(self) -> set[str]:
+        accepted_content_encodings = set()
+        for accepted_content_encoding in self.headers.get("Accept-Encoding", "").split(
+            ","
+        ):
+            content_encoding, _, parameters = accepted_content_encoding.partition(";")
+            with contextlib.suppress(ValueError):
+                if float(parameters.strip().removeprefix("q=")) == 0:
+                    continue
+            accepted_content_encodings.add(content_encoding.strip().lower())
+        return accepted_content_encodings
+
 
 @final
 class BuiltinServer(Server):
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import pickle
+import sys
+
 from typing_extensions import override
 
 from betty.ancestry import Ancestry
+from betty.ancestry.person import Person
 from betty.ancestry.has_file_references import HasFileReferences
 from betty.model.association import BidirectionalToZeroOrOne
 from betty.test_utils.ancestry.date import DummyHasDate
@@ -60,3 +64,20 @@ class TestAncestry:
             sut.add(left)
         assert left in sut
         assert right not in sut
+
+    async def test___reduce__(self) -> None:
+        sut = await Ancestry.new()
+        # Create a chain of ancestors longer than the maximum recursion depth.
+        people = [Person(id=str(index)) for index in range(sys.getrecursionlimit())]
+        for parent, child in zip(people[:-1], people[1:], strict=True):
+            child.parents.add(parent)
+        sut.add(*people)
+        unpickled_sut = pickle.loads(pickle.dumps(sut))
+        assert isinstance(unpickled_sut, Ancestry)
+        assert len(unpickled_sut) == len(sut)
+        unpickled_parent = unpickled_sut[Person]["1"]
+        unpickled_child = unpickled_sut[Person]["2"]
+        assert unpickled_child.parents[0] is unpickled_parent
+        assert unpickled_parent.children[0] is unpickled_child
+        unpickled_child.parents.remove(unpickled_parent)
+        assert unpickled_child not in unpickled_parent.children
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import Self
+from typing import Self, TYPE_CHECKING
 
 from typing_extensions import override
 
 from betty.app import App
+from betty.app.config import AppConfiguration
 from betty.app.factory import AppDependentFactory
+from betty.cache.no_op import NoOpCache
 from betty.locale import DEFAULT_LOCALE
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 
 class TestApp:
     async def test_new_from_environment(self) -> None:
@@ -23,6 +28,19 @@ class TestApp:
         async with App.new_temporary() as sut, sut:
             assert sut.binary_file_cache is sut.binary_file_cache
 
+    async def test_binary_file_cache_with_cache_max_size(self, tmp_path: Path) -> None:
+        async with App(
+            AppConfiguration(cache_max_size=len(b"SomeBytes")),
+            tmp_path,
+            cache_factory=lambda app: NoOpCache(),
+        ) as sut:
+            await sut.binary_file_cache.set("one", b"SomeBytes")
+            await sut.binary_file_cache.set("two", b"SomeBytes")
+            async with sut.binary_file_cache.get("one") as cache_item:
+                assert cache_item is None
+            async with sut.binary_file_cache.get("two") as cache_item:
+                assert cache_item is not None
+
     async def test_cache(self) -> None:
         async with App.new_temporary() as sut, sut:
             assert sut.cache is sut.cache
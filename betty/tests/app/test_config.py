@@ -1,6 +1,9 @@
 from typing import TYPE_CHECKING
 
+import pytest
+
 from betty.app.config import AppConfiguration
+from betty.assertion.error import AssertionFailed
 
 if TYPE_CHECKING:
     from betty.serde.dump import Dump, DumpMapping
@@ -16,6 +19,23 @@ class TestAppConfiguration:
         sut = AppConfiguration(locale=locale)
         assert sut.locale == locale
 
+    def test___init___with_cache_max_size(self) -> None:
+        sut = AppConfiguration(cache_max_size=999)
+        assert sut.cache_max_size == 999
+
+    def test_cache_max_size(self) -> None:
+        sut = AppConfiguration()
+        assert sut.cache_max_size is None
+        sut.cache_max_size = 999
+        assert sut.cache_max_size == 999
+        sut.cache_max_size = None
+        assert sut.cache_max_size is None
+
+    def test_cache_max_size_with_invalid_value(self) -> None:
+        sut = AppConfiguration()
+        with pytest.raises(AssertionFailed):
+            sut.cache_max_size = 0
+
     def test_locale(self) -> None:
         sut = AppConfiguration()
         locale = "nl-NL"
@@ -34,13 +54,24 @@ class TestAppConfiguration:
         sut.load(dump)
         assert sut.locale == locale
 
+    def test_load_with_cache_max_size(self) -> None:
+        sut = AppConfiguration()
+        dump: DumpMapping[Dump] = {"cache_max_size": 999}
+        sut.load(dump)
+        assert sut.cache_max_size == 999
+
     def test_dump_minimal(self) -> None:
         sut = AppConfiguration()
         actual = sut.dump()
-        assert actual == {"locale": None}
+        assert actual == {"locale": None, "cache_max_size": None}
 
     def test_dump_with_locale(self) -> None:
         locale = "nl-NL"
         sut = AppConfiguration(locale=locale)
         actual = sut.dump()
-        assert actual == {"locale": locale}
+        assert actual == {"locale": locale, "cache_max_size": None}
+
+    def test_dump_with_cache_max_size(self) -> None:
+        sut = AppConfiguration(cache_max_size=999)
+        actual = sut.dump()
+        assert actual == {"locale": None, "cache_max_size": 999}
@@ -1,6 +1,7 @@
 from collections.abc import Sequence, AsyncIterator, Iterator
 from contextlib import asynccontextmanager
 from pathlib import Path
+from pickle import dumps
 from typing import Any
 
 import pytest
@@ -8,6 +9,7 @@ from aiofiles.tempfile import TemporaryDirectory
 from typing_extensions import override
 
 from betty.cache.file import PickledFileCache, BinaryFileCache
+from betty.hashid import hashid
 from betty.test_utils.cache import CacheTestBase
 
 
@@ -31,6 +33,86 @@ class TestPickledFileCache(CacheTestBase[Any]):
         yield []
         yield {}
 
+    async def test_set_should_not_leave_temporary_files(self, tmp_path: Path) -> None:
+        sut = PickledFileCache[Any](tmp_path)
+        await sut.set("id", "Hello, world!")
+        await sut.set("id", "Hello, other world!")
+        assert [path.name for path in tmp_path.iterdir()] == [hashid("id")]
+        async with sut.get("id") as cache_item:
+            assert cache_item is not None
+            assert await cache_item.value() == "Hello, other world!"
+
+    async def test_set_with_max_size_should_evict_least_recently_used(
+        self, tmp_path: Path
+    ) -> None:
+        value_size = len(dumps("Hello, world!"))
+        sut = PickledFileCache[Any](tmp_path, max_size=value_size * 2)
+        await sut.set("one", "Hello, world!")
+        await sut.set("two", "Hello, world!")
+        async with sut.get("one"):
+            pass
+        await sut.set("three", "Hello, world!")
+        async with sut.get("one") as cache_item:
+            assert cache_item is not None
+        async with sut.get("two") as cache_item:
+            assert cache_item is None
+        async with sut.get("three") as cache_item:
+            assert cache_item is not None
+
+    async def test_set_with_max_size_should_index_existing_cache_items(
+        self, tmp_path: Path
+    ) -> None:
+        value_size = len(dumps("Hello, world!"))
+        await PickledFileCache[Any](tmp_path).set("one", "Hello, world!")
+        sut = PickledFileCache[Any](tmp_path, max_size=value_size)
+        await sut.set("two", "Hello, world!")
+        async with sut.get("one") as cache_item:
+            assert cache_item is None
+        async with sut.get("two") as cache_item:
+            assert cache_item is not None
+
+    async def test_with_scope_should_apply_max_size_per_scope(
+        self, tmp_path: Path
+    ) -> None:
+        value_size = len(dumps("Hello, world!"))
+        sut = PickledFileCache[Any](tmp_path, max_size=value_size)
+        await sut.set("id", "Hello, world!")
+        await sut.with_scope("scope").set("id", "Hello, world!")
+        async with sut.get("id") as cache_item:
+            assert cache_item is not None
+        async with sut.with_scope("scope").get("id") as cache_item:
+            assert cache_item is not None
+
+    async def test_set_with_max_size_should_share_index_between_instances(
+        self, tmp_path: Path
+    ) -> None:
+        value_size = len(dumps("Hello, world!"))
+        sut_one = PickledFileCache[Any](tmp_path, max_size=value_size * 2)
+        sut_two = PickledFileCache[Any](tmp_path, max_size=value_size * 2)
+        await sut_one.set("one", "Hello, world!")
+        await sut_two.set("two", "Hello, world!")
+        await sut_one.set("three", "Hello, world!")
+        async with sut_two.get("one") as cache_item:
+            assert cache_item is None
+        assert len(list(tmp_path.iterdir())) == 2
+
+    async def test_set_with_max_size_should_account_for_cache_items_set_elsewhere(
+        self, tmp_path: Path
+    ) -> None:
+        value_size = len(dumps("Hello, world!"))
+        sut = PickledFileCache[Any](tmp_path, max_size=value_size * 2)
+        await sut.set("one", "Hello, world!")
+        # Cache items set by caches without a maximum size, or by other processes, are not accounted for right away.
+        await PickledFileCache[Any](tmp_path).set("two", "Hello, world!")
+        await sut.set("three", "Hello, world!")
+        await sut.set("four", "Hello, world!")
+        for cache_item_id in ("one", "two"):
+            async with sut.get(cache_item_id) as cache_item:
+                assert cache_item is None
+        for cache_item_id in ("three", "four"):
+            async with sut.get(cache_item_id) as cache_item:
+                assert cache_item is not None
+
 
 class TestBinaryFileCache(CacheTestBase[bytes]):
     @override
@@ -85,3 +167,24 @@ class TestBinaryFileCache(CacheTestBase[bytes]):
         assert sut.cache_item_file_path("id") == tmp_path.joinpath(
             *expected_path_components
         )
+
+    async def test_add_file(self, tmp_path: Path) -> None:
+        sut = BinaryFileCache(tmp_path, max_size=len(b"SomeBytes"))
+        await sut.set("one", b"SomeBytes")
+        sut.cache_item_file_path("two").write_bytes(b"SomeBytes")
+        sut.add_file(sut.cache_item_file_path("two"))
+        async with sut.get("one") as cache_item:
+            assert cache_item is None
+        async with sut.get("two") as cache_item:
+            assert cache_item is not None
+
+    async def test_add_file_with_scope(self, tmp_path: Path) -> None:
+        sut = BinaryFileCache(tmp_path, max_size=len(b"SomeBytes"))
+        scoped_sut = sut.with_scope("scope")
+        await scoped_sut.set("one", b"SomeBytes")
+        scoped_sut.cache_item_file_path("two").write_bytes(b"SomeBytes")
+        sut.add_file(scoped_sut.cache_item_file_path("two"))
+        async with scoped_sut.get("one") as cache_item:
+            assert cache_item is None
+        async with scoped_sut.get("two") as cache_item:
+            assert cache_item is not None
@@ -28,3 +28,22 @@ class TestConfig:
         configuration = AppConfiguration()
         (await assert_configuration_file(configuration))(configuration_file_path)
         assert configuration.locale == locale
+
+    async def test_click_command_with_cache_max_size(
+        self, mocker: MockerFixture, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        configuration_file_path = tmp_path / "app.json"
+        mocker.patch(
+            "betty.app.config.CONFIGURATION_FILE_PATH",
+            new=configuration_file_path,
+        )
+
+        await run(
+            new_temporary_app,
+            "config",
+            "--cache-max-size",
+            "999",
+        )
+        configuration = AppConfiguration()
+        (await assert_configuration_file(configuration))(configuration_file_path)
+        assert configuration.cache_max_size == 999
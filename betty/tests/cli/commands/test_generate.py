@@ -43,3 +43,123 @@ class TestGenerate:
                 generate_args[0].configuration.configuration_file_path
                 == project.configuration.configuration_file_path.expanduser().resolve()
             )
+
+    async def test_click_command_with_incremental(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        m_generate = mocker.patch(
+            "betty.project.generate.generate", new_callable=AsyncMock
+        )
+        mocker.patch("betty.project.load.load", new_callable=AsyncMock)
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await write_configuration_file(
+                project.configuration, project.configuration.configuration_file_path
+            )
+            await run(
+                new_temporary_app,
+                "generate",
+                "-c",
+                str(project.configuration.configuration_file_path),
+                "--incremental",
+            )
+
+            m_generate.assert_called_once()
+            _, generate_kwargs = m_generate.call_args
+            assert generate_kwargs["incremental"] is True
+
+    async def test_click_command_with_no_snapshot(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        mocker.patch("betty.project.generate.generate", new_callable=AsyncMock)
+        m_load = mocker.patch("betty.project.load.load", new_callable=AsyncMock)
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await write_configuration_file(
+                project.configuration, project.configuration.configuration_file_path
+            )
+            await run(
+                new_temporary_app,
+                "generate",
+                "-c",
+                str(project.configuration.configuration_file_path),
+                "--no-snapshot",
+            )
+
+            m_load.assert_called_once()
+            _, load_kwargs = m_load.call_args
+            assert load_kwargs["snapshot"] is False
+
+    async def test_click_command_with_processes(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        m_generate = mocker.patch(
+            "betty.project.generate.generate", new_callable=AsyncMock
+        )
+        mocker.patch("betty.project.load.load", new_callable=AsyncMock)
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await write_configuration_file(
+                project.configuration, project.configuration.configuration_file_path
+            )
+            await run(
+                new_temporary_app,
+                "generate",
+                "-c",
+                str(project.configuration.configuration_file_path),
+                "--processes",
+                "4",
+            )
+
+            m_generate.assert_called_once()
+            _, generate_kwargs = m_generate.call_args
+            assert generate_kwargs["processes"] == 4
+
+    async def test_click_command_with_precompress(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        m_generate = mocker.patch(
+            "betty.project.generate.generate", new_callable=AsyncMock
+        )
+        mocker.patch("betty.project.load.load", new_callable=AsyncMock)
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await write_configuration_file(
+                project.configuration, project.configuration.configuration_file_path
+            )
+            await run(
+                new_temporary_app,
+                "generate",
+                "-c",
+                str(project.configuration.configuration_file_path),
+                "--precompress",
+            )
+
+            m_generate.assert_called_once()
+            _, generate_kwargs = m_generate.call_args
+            assert generate_kwargs["precompress"] is True
+
+    async def test_click_command_with_concurrency(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        m_generate = mocker.patch(
+            "betty.project.generate.generate", new_callable=AsyncMock
+        )
+        mocker.patch("betty.project.load.load", new_callable=AsyncMock)
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await write_configuration_file(
+                project.configuration, project.configuration.configuration_file_path
+            )
+            await run(
+                new_temporary_app,
+                "generate",
+                "-c",
+                str(project.configuration.configuration_file_path),
+                "--concurrency",
+                "16",
+            )
+
+            m_generate.assert_called_once()
+            _, generate_kwargs = m_generate.call_args
+            assert generate_kwargs["concurrency"] == 16
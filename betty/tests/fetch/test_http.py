@@ -1,9 +1,11 @@
 import asyncio
+from collections.abc import MutableSequence
 from typing import AsyncIterator
 
 import aiofiles
 import pytest
-from aiohttp import ClientSession, ClientError
+from aiohttp import ClientSession, ClientError, web
+from aiohttp.test_utils import TestServer
 from aioresponses import aioresponses
 
 from betty.cache.file import BinaryFileCache
@@ -173,3 +175,147 @@ class TestHttpFetcher:
             fetched_twice = await sut.fetch_file(url)
             async with aiofiles.open(fetched_twice, "rb") as f:
                 assert await f.read() == content
+
+
+class TestHttpFetcherWithServer:
+    _CONTENT = b"The name's Text. Plain Text."
+
+    @pytest.fixture
+    def requests(self) -> MutableSequence[web.Request]:
+        return []
+
+    @pytest.fixture
+    async def server(
+        self, requests: MutableSequence[web.Request]
+    ) -> AsyncIterator[TestServer]:
+        async def _handle(request: web.Request) -> web.Response:
+            requests.append(request)
+            if request.path == "/etag":
+                if request.headers.get("If-None-Match") == '"betty"':
+                    return web.Response(status=304)
+                return web.Response(body=self._CONTENT, headers={"ETag": '"betty"'})
+            last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+            if request.headers.get("If-Modified-Since") == last_modified:
+                return web.Response(status=304)
+            return web.Response(
+                body=self._CONTENT, headers={"Last-Modified": last_modified}
+            )
+
+        app = web.Application()
+        app.router.add_get("/{path}", _handle)
+        server = TestServer(app)
+        async with server:
+            yield server
+
+    @pytest.fixture
+    async def sut(
+        self, binary_file_cache: BinaryFileCache
+    ) -> AsyncIterator[HttpFetcher]:
+        async with ClientSession() as http_client:
+            yield HttpFetcher(
+                http_client,
+                MemoryCache(),
+                binary_file_cache,
+                # A negative TTL ensures every cache item is considered expired a long time ago.
+                -999999999,
+            )
+
+    @pytest.mark.parametrize(
+        ("path", "request_header_name"),
+        [
+            ("etag", "If-None-Match"),
+            ("last-modified", "If-Modified-Since"),
+        ],
+    )
+    async def test_fetch_should_revalidate(
+        self,
+        path: str,
+        request_header_name: str,
+        requests: MutableSequence[web.Request],
+        server: TestServer,
+        sut: HttpFetcher,
+    ) -> None:
+        url = str(server.make_url(f"/{path}"))
+        fetched_once = await sut.fetch(url)
+        fetched_twice = await sut.fetch(url)
+        assert fetched_once.body == self._CONTENT
+        assert fetched_twice.body == self._CONTENT
+        assert len(requests) == 2
+        assert request_header_name not in requests[0].headers
+        assert request_header_name in requests[1].headers
+
+    @pytest.mark.parametrize(
+        ("path", "request_header_name"),
+        [
+            ("etag", "If-None-Match"),
+            ("last-modified", "If-Modified-Since"),
+        ],
+    )
+    async def test_fetch_file_should_revalidate(
+        self,
+        path: str,
+        request_header_name: str,
+        requests: MutableSequence[web.Request],
+        server: TestServer,
+        sut: HttpFetcher,
+    ) -> None:
+        url = str(server.make_url(f"/{path}"))
+        fetched_once = await sut.fetch_file(url)
+        fetched_twice = await sut.fetch_file(url)
+        assert fetched_once == fetched_twice
+        async with aiofiles.open(fetched_twice, "rb") as f:
+            assert await f.read() == self._CONTENT
+        assert len(requests) == 2
+        assert request_header_name not in requests[0].headers
+        assert request_header_name in requests[1].headers
+
+    async def test_fetch_file_should_stream(
+        self, binary_file_cache: BinaryFileCache, sut: HttpFetcher
+    ) -> None:
+        content = bytes(range(256)) * 4096
+
+        async def _handle(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            for offset in range(0, len(content), 65536):
+                await response.write(content[offset : offset + 65536])
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_get("/", _handle)
+        server = TestServer(app)
+        async with server:
+            fetched = await sut.fetch_file(str(server.make_url("/")))
+        async with aiofiles.open(fetched, "rb") as f:
+            assert await f.read() == content
+        # Assert no temporary files were left behind.
+        assert list(fetched.parent.iterdir()) == [fetched]
+
+    async def test_fetch_should_limit_host_concurrency(
+        self, binary_file_cache: BinaryFileCache
+    ) -> None:
+        concurrency = 0
+        concurrencies = []
+
+        async def _handle(request: web.Request) -> web.Response:
+            nonlocal concurrency
+            concurrency += 1
+            concurrencies.append(concurrency)
+            await asyncio.sleep(0.01)
+            concurrency -= 1
+            return web.Response(body=self._CONTENT)
+
+        app = web.Application()
+        app.router.add_get("/{path}", _handle)
+        async with (
+            TestServer(app) as server,
+            ClientSession() as http_client,
+        ):
+            sut = HttpFetcher(
+                http_client, MemoryCache(), binary_file_cache, host_concurrency=2
+            )
+            await asyncio.gather(
+                *(sut.fetch(str(server.make_url(f"/{index}"))) for index in range(6))
+            )
+        assert max(concurrencies) == 2
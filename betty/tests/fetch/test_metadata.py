@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from multidict import CIMultiDict
+
+from betty.cache.memory import MemoryCache
+from betty.fetch import FetchResponse
+from betty.fetch.metadata import (
+    HtmlMetadata,
+    LinkMetadataFetcher,
+    parse_html_metadata,
+)
+from betty.fetch.static import StaticFetcher
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+class TestHtmlMetadata:
+    pass
+
+
+class TestParseHtmlMetadata:
+    @pytest.mark.parametrize(
+        ("expected", "html"),
+        [
+            (HtmlMetadata(None, None), ""),
+            (HtmlMetadata(None, None), "<html></html>"),
+            (
+                HtmlMetadata("Hello, world!", None),
+                "<html><head><title>\n  Hello, world!\n</title></head></html>",
+            ),
+            (
+                HtmlMetadata("Hello & goodbye", None),
+                "<html><head><title>Hello &amp; goodbye</title></head></html>",
+            ),
+            (
+                HtmlMetadata(None, "A greeting."),
+                '<html><head><meta name="description" content="A greeting."></head></html>',
+            ),
+            (
+                HtmlMetadata(None, "A greeting."),
+                '<html><head><meta property="og:description" content="A greeting."></head></html>',
+            ),
+            (
+                HtmlMetadata(None, "A greeting."),
+                '<html><head><meta property="og:description" content="An Open Graph greeting."><meta name="description" content="A greeting."></head></html>',
+            ),
+            (
+                HtmlMetadata(None, None),
+                '<html><head></head><body><title>Hello, world!</title><meta name="description" content="A greeting."></body></html>',
+            ),
+        ],
+    )
+    async def test(self, expected: HtmlMetadata, html: str) -> None:
+        assert parse_html_metadata(html.encode("utf-8"), "utf-8") == expected
+
+    async def test_should_only_parse_head(self) -> None:
+        html = (
+            "<html><head><title>Hello, world!</title></head><body>"
+            + "<p>Lorem ipsum</p>" * 10000
+            + "</body></html>"
+        )
+        assert parse_html_metadata(
+            html.encode("utf-8"), "utf-8", chunk_size=64
+        ) == HtmlMetadata("Hello, world!", None)
+
+
+class TestLinkMetadataFetcher:
+    _URL = "https://example.com"
+
+    def _fetch_response(self, content_type: str, html: str) -> FetchResponse:
+        return FetchResponse(
+            CIMultiDict({"Content-Type": content_type}),
+            html.encode("utf-8"),
+            "utf-8",
+        )
+
+    @pytest.mark.parametrize(
+        "content_type",
+        [
+            "text/html",
+            "text/html; charset=utf-8",
+            "application/xhtml+xml",
+        ],
+    )
+    async def test_fetch(self, content_type: str) -> None:
+        fetcher = StaticFetcher(
+            fetch_map={
+                self._URL: self._fetch_response(
+                    content_type,
+                    "<html><head><title>Hello, world!</title></head></html>",
+                )
+            }
+        )
+        sut = LinkMetadataFetcher(fetcher, MemoryCache())
+        assert await sut.fetch(self._URL) == HtmlMetadata("Hello, world!", None)
+
+    async def test_fetch_with_unsupported_content_type(self) -> None:
+        fetcher = StaticFetcher(
+            fetch_map={self._URL: self._fetch_response("text/plain", "Hello, world!")}
+        )
+        sut = LinkMetadataFetcher(fetcher, MemoryCache())
+        assert await sut.fetch(self._URL) is None
+
+    async def test_fetch_with_fetch_error(self) -> None:
+        sut = LinkMetadataFetcher(StaticFetcher(), MemoryCache())
+        assert await sut.fetch(self._URL) is None
+
+    async def test_fetch_should_fetch_once(self, mocker: MockerFixture) -> None:
+        fetcher = StaticFetcher(
+            fetch_map={
+                self._URL: self._fetch_response(
+                    "text/html",
+                    "<html><head><title>Hello, world!</title></head></html>",
+                )
+            }
+        )
+        fetch_spy = mocker.spy(fetcher, "fetch")
+        sut = LinkMetadataFetcher(fetcher, MemoryCache())
+        assert await sut.fetch(self._URL) == await sut.fetch(self._URL)
+        fetch_spy.assert_called_once_with(self._URL)
+
+    async def test_fetch_should_use_cache(self, mocker: MockerFixture) -> None:
+        fetcher = StaticFetcher(
+            fetch_map={
+                self._URL: self._fetch_response(
+                    "text/html",
+                    "<html><head><title>Hello, world!</title></head></html>",
+                )
+            }
+        )
+        cache = MemoryCache[HtmlMetadata | None]()
+        await LinkMetadataFetcher(fetcher, cache).fetch(self._URL)
+        fetch_spy = mocker.spy(fetcher, "fetch")
+        sut = LinkMetadataFetcher(fetcher, cache)
+        assert await sut.fetch(self._URL) == HtmlMetadata("Hello, world!", None)
+        fetch_spy.assert_not_called()
+
+    async def test_fetch_should_refetch_expired_cache_items(
+        self, mocker: MockerFixture
+    ) -> None:
+        fetcher = StaticFetcher(
+            fetch_map={
+                self._URL: self._fetch_response(
+                    "text/html",
+                    "<html><head><title>Hello, world!</title></head></html>",
+                )
+            }
+        )
+        cache = MemoryCache[HtmlMetadata | None]()
+        await LinkMetadataFetcher(fetcher, cache, ttl=0).fetch(self._URL)
+        fetch_spy = mocker.spy(fetcher, "fetch")
+        sut = LinkMetadataFetcher(fetcher, cache, ttl=0)
+        await sut.fetch(self._URL)
+        fetch_spy.assert_called_once_with(self._URL)
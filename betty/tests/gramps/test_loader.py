@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import gzip
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -156,6 +157,47 @@ class TestGrampsLoader:
                     Path(__file__).parent / "assets" / "minimal.invalid"
                 )
 
+    @pytest.mark.parametrize(
+        "xml",
+        [
+            # Truncated XML.
+            "<notes>{notes}",
+            # Malformed XML.
+            "<notes>{notes}</notes><people><person></people>",
+        ],
+    )
+    async def test_load_file_with_broken_gramps_file(
+        self, xml: str, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        notes = "".join(
+            f"""
+<note handle="_note{index}" change="1551643112" id="N000{index}" type="Transcript">
+    <text>I left this for you.</text>
+</note>
+"""
+            for index in range(3)
+        )
+        gramps_file_path = tmp_path / "broken.gramps"
+        with gzip.open(gramps_file_path, "wt") as f:
+            f.write(
+                f"""<?xml version="1.0" encoding="UTF-8"?>
+<database xmlns="http://gramps-project.org/xml/1.7.1/">
+{xml.format(notes=notes)}
+"""
+            )
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            sut = GrampsLoader(
+                project.ancestry,
+                factory=project.new_target,
+                localizer=DEFAULT_LOCALIZER,
+                copyright_notices=project.copyright_notice_repository,
+                licenses=await project.license_repository,
+                attribute_prefix_key=self.ATTRIBUTE_PREFIX_KEY,
+            )
+            with pytest.raises(UserFacingGrampsError):
+                await sut.load_file(gramps_file_path)
+            assert len(project.ancestry) == 0
+
     async def _load(
         self,
         xml: str,
@@ -644,6 +686,30 @@ class TestGrampsLoader:
         for parent in parents:
             assert expected_children == list(parent.children)
 
+    async def test_family_before_people_should_set_parents(self) -> None:
+        ancestry = await self._load_partial(
+            """
+<families>
+    <family handle="_e1dd3b84f9e5d832ffc17baa46c" change="1552127019" id="F0000">
+        <rel type="Unknown"/>
+        <father hlink="_e1dd3bf1f0041d92f586f9d8683"/>
+        <childref hlink="_e1dd36c700f7fa6564d3ac839db" mrel="Unknown" frel="Unknown"/>
+    </family>
+</families>
+<people>
+    <person handle="_e1dd36c700f7fa6564d3ac839db" change="1552127019" id="I0000">
+        <gender>U</gender>
+        <childof hlink="_e1dd3b84f9e5d832ffc17baa46c"/>
+    </person>
+    <person handle="_e1dd3bf1f0041d92f586f9d8683" change="1552126972" id="I0001">
+        <gender>U</gender>
+        <parentin hlink="_e1dd3b84f9e5d832ffc17baa46c"/>
+    </person>
+</people>
+"""
+        )
+        assert [ancestry[Person]["I0001"]] == list(ancestry[Person]["I0000"].parents)
+
     async def test_event_should_map_type(self) -> None:
         ancestry = await self._load_partial(
             """
@@ -6,13 +6,16 @@ from typing import TYPE_CHECKING
 import aiofiles
 from typing_extensions import override
 
+from betty import fs
 from betty.ancestry.has_file_references import HasFileReferences
+from betty.cache.file import BinaryFileCache
 from betty.jinja2 import (
     Jinja2Renderer,
     Jinja2Provider,
     EntityContexts,
     Environment,
 )
+from betty.jinja2.bytecode import BinaryFileBytecodeCache
 from betty.job import Context
 from betty.locale.localizer import Localizer
 from betty.project import Project
@@ -23,6 +26,7 @@ from betty.test_utils.plugin import PluginTestBase
 if TYPE_CHECKING:
     from pathlib import Path
     from betty.app import App
+    from pytest_mock import MockerFixture
 
 
 class TestJinja2Provider:
@@ -201,6 +205,77 @@ class TestEntityContexts:
         assert sut[EntityContextsTestEntityA] is b
 
 
+class TestFragmentCacheExtension:
+    _TEMPLATE = "{% cache 'greeting' %}{{ greeting }}{% endcache %}"
+
+    async def test_parse_without_job_context(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            environment = await project.jinja2_environment
+            template = environment.from_string(self._TEMPLATE)
+            assert (
+                await template.render_async(greeting="Hello, world!") == "Hello, world!"
+            )
+            assert (
+                await template.render_async(greeting="Goodbye, world!")
+                == "Goodbye, world!"
+            )
+
+    async def test_parse_with_job_context(self, new_temporary_app: App) -> None:
+        job_context = Context()
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            environment = await project.jinja2_environment
+            template = environment.from_string(self._TEMPLATE)
+            assert (
+                await template.render_async(
+                    greeting="Hello, world!", job_context=job_context
+                )
+                == "Hello, world!"
+            )
+            assert (
+                await template.render_async(
+                    greeting="Goodbye, world!", job_context=job_context
+                )
+                == "Hello, world!"
+            )
+
+    async def test_parse_with_job_context_and_different_locales(
+        self, new_temporary_app: App
+    ) -> None:
+        job_context = Context()
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            environment = await project.jinja2_environment
+            template = environment.from_string(self._TEMPLATE)
+            assert (
+                await template.render_async(
+                    greeting="Hello, world!",
+                    job_context=job_context,
+                    localizer=await new_temporary_app.localizers.get("en-US"),
+                )
+                == "Hello, world!"
+            )
+            assert (
+                await template.render_async(
+                    greeting="Hallo, wereld!",
+                    job_context=job_context,
+                    localizer=await new_temporary_app.localizers.get("nl-NL"),
+                )
+                == "Hallo, wereld!"
+            )
+
+    async def test_parse_should_not_escape_twice(self, new_temporary_app: App) -> None:
+        job_context = Context()
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            environment = await project.jinja2_environment
+            template = environment.from_string(self._TEMPLATE)
+            for _ in range(2):
+                assert (
+                    await template.render_async(
+                        greeting="<Hello, world!>", job_context=job_context
+                    )
+                    == "&lt;Hello, world!&gt;"
+                )
+
+
 class TestEnvironment:
     async def test_context_class(self, new_temporary_app: App) -> None:
         async with Project.new_temporary(new_temporary_app) as project, project:
@@ -230,3 +305,32 @@ class TestEnvironment:
             async with project:
                 sut = await Environment.new_for_project(project)
                 assert "jinja2.ext.DebugExtension" in sut.extensions
+
+    async def test_new_for_project_should_cache_bytecode(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            (await Environment.new_for_project(project)).get_template("base.html.j2")
+            sut = await Environment.new_for_project(project)
+            compile_spy = mocker.spy(sut, "compile")
+            sut.get_template("base.html.j2")
+            compile_spy.assert_not_called()
+
+    async def test_new_for_project_with_prebuilt_bytecode(
+        self, mocker: MockerFixture, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        original_prebuilt_assets_directory_path = fs.PREBUILT_ASSETS_DIRECTORY_PATH
+        fs.PREBUILT_ASSETS_DIRECTORY_PATH = tmp_path
+        try:
+            async with Project.new_temporary(new_temporary_app) as project, project:
+                prebuild_environment = await Environment.new_for_project(project)
+                prebuild_environment.bytecode_cache = BinaryFileBytecodeCache(
+                    BinaryFileCache(tmp_path / "jinja2")
+                )
+                prebuild_environment.get_template("base.html.j2")
+                sut = await Environment.new_for_project(project)
+                compile_spy = mocker.spy(sut, "compile")
+                sut.get_template("base.html.j2")
+                compile_spy.assert_not_called()
+        finally:
+            fs.PREBUILT_ASSETS_DIRECTORY_PATH = original_prebuilt_assets_directory_path
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from jinja2 import DictLoader, Environment as Jinja2Environment
+
+from betty.jinja2 import FragmentCacheExtension
+
+from betty.cache.file import BinaryFileCache
+from betty.jinja2.bytecode import BinaryFileBytecodeCache, compile_templates
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from pathlib import Path
+    from pytest_mock import MockerFixture
+
+
+class TestBinaryFileBytecodeCache:
+    def _environment(
+        self,
+        bytecode_cache: BinaryFileBytecodeCache,
+        source: str = "Hello, {{ who }}!",
+        **kwargs: Any,
+    ) -> Jinja2Environment:
+        return Jinja2Environment(
+            loader=DictLoader({"greeting.txt.j2": source}),
+            bytecode_cache=bytecode_cache,
+            **kwargs,
+        )
+
+    async def test_get_cache_key(self, tmp_path: Path) -> None:
+        sut = BinaryFileBytecodeCache(BinaryFileCache(tmp_path))
+        assert sut.get_cache_key(
+            "greeting.txt.j2", "/path/to/greeting.txt.j2"
+        ) == sut.get_cache_key("greeting.txt.j2", "/another/path/to/greeting.txt.j2")
+
+    async def test_load_bytecode(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        cache = BinaryFileCache(tmp_path)
+        self._environment(BinaryFileBytecodeCache(cache)).get_template(
+            "greeting.txt.j2"
+        )
+
+        environment = self._environment(BinaryFileBytecodeCache(cache))
+        compile_spy = mocker.spy(environment, "compile")
+        template = environment.get_template("greeting.txt.j2")
+        compile_spy.assert_not_called()
+        assert template.render(who="world") == "Hello, world!"
+
+    async def test_load_bytecode_with_changed_source(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        cache = BinaryFileCache(tmp_path)
+        self._environment(BinaryFileBytecodeCache(cache)).get_template(
+            "greeting.txt.j2"
+        )
+
+        environment = self._environment(
+            BinaryFileBytecodeCache(cache), "Goodbye, {{ who }}!"
+        )
+        compile_spy = mocker.spy(environment, "compile")
+        template = environment.get_template("greeting.txt.j2")
+        compile_spy.assert_called_once()
+        assert template.render(who="world") == "Goodbye, world!"
+
+    async def test_load_bytecode_with_debug(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        cache = BinaryFileCache(tmp_path)
+        self._environment(BinaryFileBytecodeCache(cache)).get_template(
+            "greeting.txt.j2"
+        )
+
+        environment = self._environment(BinaryFileBytecodeCache(cache, debug=True))
+        compile_spy = mocker.spy(environment, "compile")
+        environment.get_template("greeting.txt.j2")
+        compile_spy.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "environment_kwargs",
+        [
+            {"extensions": [FragmentCacheExtension]},
+            {"trim_blocks": True},
+            {"variable_start_string": "[[", "variable_end_string": "]]"},
+        ],
+    )
+    async def test_load_bytecode_with_changed_environment(
+        self,
+        environment_kwargs: Mapping[str, Any],
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        cache = BinaryFileCache(tmp_path)
+        self._environment(BinaryFileBytecodeCache(cache)).get_template(
+            "greeting.txt.j2"
+        )
+
+        environment = self._environment(
+            BinaryFileBytecodeCache(cache), **environment_kwargs
+        )
+        compile_spy = mocker.spy(environment, "compile")
+        environment.get_template("greeting.txt.j2")
+        compile_spy.assert_called_once()
+
+    async def test_load_bytecode_with_prebuilt_cache(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        prebuilt_cache = BinaryFileCache(tmp_path / "prebuild")
+        self._environment(BinaryFileBytecodeCache(prebuilt_cache)).get_template(
+            "greeting.txt.j2"
+        )
+
+        environment = self._environment(
+            BinaryFileBytecodeCache(
+                BinaryFileCache(tmp_path / "cache"), prebuilt_cache=prebuilt_cache
+            )
+        )
+        compile_spy = mocker.spy(environment, "compile")
+        template = environment.get_template("greeting.txt.j2")
+        compile_spy.assert_not_called()
+        assert template.render(who="world") == "Hello, world!"
+
+    async def test_dump_bytecode(self, tmp_path: Path) -> None:
+        prebuilt_cache = BinaryFileCache(tmp_path / "prebuild")
+        cache = BinaryFileCache(tmp_path / "cache")
+        self._environment(
+            BinaryFileBytecodeCache(cache, prebuilt_cache=prebuilt_cache)
+        ).get_template("greeting.txt.j2")
+        assert len(list(cache.path.iterdir())) == 1
+        assert not prebuilt_cache.path.exists()
+
+    async def test_dump_bytecode_with_max_size(self, tmp_path: Path) -> None:
+        cache = BinaryFileCache(tmp_path, max_size=1)
+        self._environment(BinaryFileBytecodeCache(cache)).get_template(
+            "greeting.txt.j2"
+        )
+        self._environment(
+            BinaryFileBytecodeCache(cache), "Goodbye, {{ who }}!"
+        ).get_template("greeting.txt.j2")
+        # The cache's maximum size fits one compiled template only.
+        assert len(list(cache.path.iterdir())) == 1
+
+
+class TestCompileTemplates:
+    async def test(self, tmp_path: Path) -> None:
+        cache = BinaryFileCache(tmp_path)
+        environment = Jinja2Environment(
+            loader=DictLoader(
+                {
+                    "greeting.txt.j2": "Hello, {{ who }}!",
+                    "farewell.txt.j2": "Goodbye, {{ who }}!",
+                    "README.txt": "Not a template.",
+                }
+            ),
+            bytecode_cache=BinaryFileBytecodeCache(cache),
+        )
+        compile_templates(environment)
+        assert len(list(cache.path.iterdir())) == 2
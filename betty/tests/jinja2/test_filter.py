@@ -11,6 +11,7 @@ from betty.ancestry.file import File
 from betty.ancestry.file_reference import FileReference
 from betty.date import Date, DateRange, Datey
 from betty.fs import ASSETS_DIRECTORY_PATH
+from betty.image import ImageDerivativePlanner
 from betty.job import Context
 from betty.locale import (
     NO_LINGUISTIC_CONTENT,
@@ -23,6 +24,7 @@ from betty.locale.localizable import StaticTranslationsLocalizable, plain
 from betty.locale.localized import Localized, LocalizedStr
 from betty.media_type import MediaType
 from betty.media_type.media_types import SVG
+from betty.project import Project, ProjectContext
 from betty.test_utils.ancestry.date import DummyHasDate
 from betty.test_utils.jinja2 import TemplateStringTestBase
 from betty.test_utils.locale.localized import DummyLocalized
@@ -30,6 +32,7 @@ from betty.tests.ancestry.test___init__ import DummyHasFileReferences
 
 if TYPE_CHECKING:
     from collections.abc import Sequence, MutableMapping
+    from betty.app import App
 
 
 class _DummyHasDate(DummyHasDate):
@@ -99,6 +102,22 @@ class TestFilterFile(TemplateStringTestBase):
                     project.configuration.www_directory_path / file_path[1:]
                 ).exists()
 
+    async def test_should_set_permissions(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file.txt"
+        file_path.write_text("Hello, world!")
+        file_path.chmod(0o600)
+        async with self.assert_template_string(
+            template="{{ file | file }}",
+            data={
+                "file": File(id="F1", path=file_path),
+            },
+        ) as (actual, project):
+            destination_file_path = (
+                project.configuration.www_directory_path / actual[1:]
+            )
+            assert destination_file_path.stat().st_mode & 0o777 == 0o644
+            assert destination_file_path.parent.stat().st_mode & 0o777 == 0o755
+
 
 class TestFilterFlatten(TemplateStringTestBase):
     @pytest.mark.parametrize(
@@ -279,6 +298,24 @@ class TestFilterImageResizeCover(TemplateStringTestBase):
                 focus=(0, 0, 9, 9),
             ),
         ),
+        (
+            "/file/F1-99x99.webp",
+            "{{ filey | filter_image_resize_cover((99, 99), image_format='webp') }}",
+            File(
+                id="F1",
+                path=_IMAGE_PATH,
+                media_type=MediaType("image/png"),
+            ),
+        ),
+        (
+            "/file/F1-99x99.png:/file/F1-99x99.avif",
+            "{{ filey | filter_image_resize_cover((99, 99)) }}:{{ filey | filter_image_resize_cover((99, 99), image_format='avif') }}",
+            File(
+                id="F1",
+                path=_IMAGE_PATH,
+                media_type=MediaType("image/png"),
+            ),
+        ),
     ]
 
     @pytest.mark.parametrize(_PARAMETER_ARGNAMES, _PARAMETER_ARGVALUES)
@@ -312,6 +349,32 @@ class TestFilterImageResizeCover(TemplateStringTestBase):
                     project.configuration.www_directory_path / file_path[1:]
                 ).exists()
 
+    async def test_with_image_derivative_planner(self, new_temporary_app: App) -> None:
+        image_derivative_planner = ImageDerivativePlanner()
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            job_context = ProjectContext(
+                project, image_derivative_planner=image_derivative_planner
+            )
+            environment = await project.jinja2_environment
+            template = environment.from_string(
+                "{{ filey | filter_image_resize_cover((99, 99)) }}"
+            )
+            actual = await template.render_async(
+                filey=File(
+                    id="F1",
+                    path=self._IMAGE_PATH,
+                    media_type=MediaType("image/png"),
+                ),
+                job_context=job_context,
+            )
+            assert actual == "/file/F1-99x99.png"
+            destination_file_path = (
+                project.configuration.www_directory_path / actual[1:]
+            )
+            assert not destination_file_path.exists()
+            await image_derivative_planner.generate()
+            assert destination_file_path.exists()
+
     async def test_with_svg(self, tmp_path: Path) -> None:
         image_path = tmp_path / "image.svg"
         async with aiofiles.open(image_path, "w") as f:
@@ -354,6 +417,20 @@ class TestFilterImageResizeCover(TemplateStringTestBase):
                     project.configuration.www_directory_path / file_path[1:]
                 ).exists()
 
+    async def test_with_image_format_without_size(self) -> None:
+        with pytest.raises(ValueError):  # noqa PT011
+            async with self.assert_template_string(
+                template="{{ filey | filter_image_resize_cover(image_format='webp') }}",
+                data={
+                    "filey": File(
+                        id="F1",
+                        path=self._IMAGE_PATH,
+                        media_type=MediaType("image/png"),
+                    )
+                },
+            ):
+                pass  # pragma: nocover
+
     async def test_with_invalid_image(self, tmp_path: Path) -> None:
         file_path = tmp_path / "not-an-image.txt"
         file_path.touch()
@@ -379,6 +456,86 @@ class TestFilterImageResizeCover(TemplateStringTestBase):
                 pass  # pragma: nocover
 
 
+class TestFilterImageSrcset(TemplateStringTestBase):
+    _IMAGE_PATH = ASSETS_DIRECTORY_PATH / "public" / "static" / "betty-512x512.png"
+
+    @pytest.mark.parametrize(
+        ("expected", "expected_sizes", "template"),
+        [
+            (
+                "/file/F1-99x99.png 99w, /file/F1-199x199.png 199w",
+                [(99, 99), (199, 199)],
+                "{{ filey | filter_image_srcset([99, 199]) }}",
+            ),
+            (
+                "/file/F1-99x33.png 99w, /file/F1-199x66.png 199w",
+                [(99, 33), (199, 66)],
+                "{{ filey | filter_image_srcset([99, 199], aspect_ratio=(3, 1)) }}",
+            ),
+            (
+                "/file/F1-99x99-1x2x3x4.png 99w",
+                [(99, 99)],
+                "{{ filey | filter_image_srcset([99], aspect_ratio=(1, 1), focus=(1, 2, 3, 4)) }}",
+            ),
+            (
+                "/file/F1-99x99.webp 99w",
+                [(99, 99)],
+                "{{ filey | filter_image_srcset([99], image_format='webp') }}",
+            ),
+        ],
+    )
+    async def test(
+        self,
+        expected: str,
+        expected_sizes: Sequence[tuple[int, int]],
+        template: str,
+    ) -> None:
+        async with self.assert_template_string(
+            template=template,
+            data={
+                "filey": File(
+                    id="F1",
+                    path=self._IMAGE_PATH,
+                    media_type=MediaType("image/png"),
+                ),
+            },
+        ) as (actual, project):
+            assert actual == expected
+            self._assert_sizes(project, actual, expected_sizes)
+
+    async def test_should_keep_aspect_ratio(self, tmp_path: Path) -> None:
+        image_file_path = tmp_path / "image.png"
+        Image.new("RGB", (400, 100)).save(image_file_path)
+        async with self.assert_template_string(
+            template="{{ filey | filter_image_srcset([40, 200]) }}",
+            data={
+                "filey": File(
+                    id="F1",
+                    path=image_file_path,
+                    media_type=MediaType("image/png"),
+                ),
+            },
+        ) as (actual, project):
+            assert actual == "/file/F1-40x10.png 40w, /file/F1-200x50.png 200w"
+            self._assert_sizes(project, actual, [(40, 10), (200, 50)])
+
+    def _assert_sizes(
+        self,
+        project: Project,
+        srcset: str,
+        expected_sizes: Sequence[tuple[int, int]],
+    ) -> None:
+        actual_sizes = []
+        for candidate in srcset.split(", "):
+            file_path, _ = candidate.split(" ")
+            image = Image.open(project.configuration.www_directory_path / file_path[1:])
+            try:
+                actual_sizes.append(image.size)
+            finally:
+                image.close()
+        assert actual_sizes == list(expected_sizes)
+
+
 class TestFilterSelectHasDates(TemplateStringTestBase):
     @pytest.mark.parametrize(
         ("expected", "data"),
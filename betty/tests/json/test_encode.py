@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from betty.json.encode import encode_json, DEFAULT_JSON_ENCODER
+from betty.serde.dump import Dump
+
+
+class TestEncodeJson:
+    @pytest.mark.parametrize(
+        "dump",
+        [
+            None,
+            True,
+            123,
+            "Hello, world!",
+            "Hallo, wereld! 👋",
+            [1, "two", None],
+            {"one": 1, "two": [2], "three": {"four": 4}},
+        ],
+    )
+    async def test(self, dump: Dump) -> None:
+        assert json.loads(encode_json(dump)) == dump
+
+
+class TestDefaultJsonEncoder:
+    @pytest.mark.parametrize(
+        "dump",
+        [
+            None,
+            True,
+            123,
+            "Hello, world!",
+            "Hallo, wereld! 👋",
+            [1, "two", None],
+            {"one": 1, "two": [2], "three": {"four": 4}},
+        ],
+    )
+    async def test(self, dump: Dump) -> None:
+        assert json.loads(DEFAULT_JSON_ENCODER(dump)) == dump
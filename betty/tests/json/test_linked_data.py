@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from inspect import getmembers
+from typing import TYPE_CHECKING
+
+from typing_extensions import override
+
+from betty.json.linked_data import (
+    dump_schema,
+    JsonLdObject,
+    JsonLdSchema,
+    LinkedDataDumpableJsonLdObject,
+    LinkedDataDumpableProvider,
+    _get_linked_data_dump_plan,
+)
+from betty.json.schema import String
+from betty.project import Project
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+    from betty.app import App
+    from betty.serde.dump import Dump
+
+
+class _DummyLinkedDataDumpableProvider(LinkedDataDumpableProvider[object, String]):
+    def __init__(self, value: str):
+        self._value = value
+
+    @override
+    async def linked_data_schema_for(self, project: Project) -> String:
+        return String()
+
+    @override
+    async def dump_linked_data_for(self, project: Project, target: object) -> Dump:
+        return self._value
+
+
+class _DummyLinkedDataDumpableJsonLdObject(LinkedDataDumpableJsonLdObject):
+    zulu_property = _DummyLinkedDataDumpableProvider("zulu")
+    alpha_property = _DummyLinkedDataDumpableProvider("alpha")
+    not_a_provider = "not a provider"
+
+
+class _DummyLinkedDataDumpableJsonLdObjectWithDefName(
+    _DummyLinkedDataDumpableJsonLdObject
+):
+    @override
+    @classmethod
+    async def linked_data_schema(cls, project: Project) -> JsonLdObject:
+        return JsonLdObject(await JsonLdSchema.new(), def_name="dummy")
+
+
+class TestDumpSchema:
+    async def test(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            dump: dict[str, Dump] = {}
+            await dump_schema(
+                project, dump, _DummyLinkedDataDumpableJsonLdObjectWithDefName()
+            )
+            assert dump["$schema"] == "https://example.com/schema.json#/$defs/dummy"
+
+    async def test_without_def_name(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            dump: dict[str, Dump] = {}
+            await dump_schema(project, dump, _DummyLinkedDataDumpableJsonLdObject())
+            assert "$schema" not in dump
+
+    async def test_should_build_schema_once_per_type(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        mocker.patch.dict(
+            "betty.json.linked_data._linked_data_schema_def_names", clear=True
+        )
+        spy = mocker.spy(
+            _DummyLinkedDataDumpableJsonLdObjectWithDefName, "linked_data_schema"
+        )
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            for _ in range(3):
+                dump: dict[str, Dump] = {}
+                await dump_schema(
+                    project, dump, _DummyLinkedDataDumpableJsonLdObjectWithDefName()
+                )
+                assert dump["$schema"] == "https://example.com/schema.json#/$defs/dummy"
+        assert spy.call_count == 1
+
+
+class TestLinkedDataDumpableJsonLdObject:
+    async def test_linked_data_schema(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            schema = await _DummyLinkedDataDumpableJsonLdObject.linked_data_schema(
+                project
+            )
+        properties = schema.schema["properties"]
+        assert isinstance(properties, Mapping)
+        assert list(properties) == ["alphaProperty", "zuluProperty"]
+        assert schema.schema["required"] == ["alphaProperty", "zuluProperty"]
+
+    async def test_dump_linked_data(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            dump = await _DummyLinkedDataDumpableJsonLdObject().dump_linked_data(
+                project
+            )
+        # Properties are dumped in the same order as before the dump plan was cached.
+        assert list(dump.items()) == [
+            ("alphaProperty", "alpha"),
+            ("zuluProperty", "zulu"),
+        ]
+
+    async def test_dump_linked_data_should_inspect_class_once(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        _get_linked_data_dump_plan.cache_clear()
+        m_getmembers = mocker.patch(
+            "betty.json.linked_data.getmembers", wraps=getmembers
+        )
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            dumps = [
+                await _DummyLinkedDataDumpableJsonLdObject().dump_linked_data(project)
+                for _ in range(3)
+            ]
+            await _DummyLinkedDataDumpableJsonLdObject.linked_data_schema(project)
+        assert dumps == [{"alphaProperty": "alpha", "zuluProperty": "zulu"}] * 3
+        assert m_getmembers.call_count == 1
@@ -1,3 +1,4 @@
+import pickle
 import tarfile
 from collections.abc import Iterator
 from json import dumps
@@ -205,6 +206,18 @@ class TestSpdxLicenseRepository:
         assert url is not None
         assert url.localize(DEFAULT_LOCALIZER) == "https://spdx.org/licenses/0BSD.html"
 
+    async def test_get_should_create_picklable_licenses(
+        self, sut_with_licenses: SpdxLicenseRepository
+    ) -> None:
+        zero_bsd_type = await sut_with_licenses.get("spdx-0bsd")
+        zero_bsd = await sut_with_licenses.new_target(zero_bsd_type)
+        unpickled_zero_bsd = pickle.loads(pickle.dumps(zero_bsd))
+        assert unpickled_zero_bsd.plugin_id() == "spdx-0bsd"
+        assert (
+            unpickled_zero_bsd.summary.localize(DEFAULT_LOCALIZER)
+            == "BSD Zero Clause License"
+        )
+
     async def test_get_not_found_with_licenses(
         self, sut_with_licenses: SpdxLicenseRepository
     ) -> None:
@@ -86,6 +86,9 @@ class TestAssociationRegistry:
     class _Associate(DummyEntity):
         pass
 
+    class _LaterOwner(_Owner):
+        pass
+
     def test_get_all_associations_with_base_class_should_return_base_associations(
         self,
     ) -> None:
@@ -158,6 +161,29 @@ class TestAssociationRegistry:
         assert actual.owner_type is self._Owner
         assert actual.associate_type is self._Associate
 
+    def test_get_association_without_association_should_raise_error(self) -> None:
+        with pytest.raises(ValueError, match="No association exists"):
+            AssociationRegistry.get_association(self._Owner, "unknown_associate")
+
+    def test_get_all_associations_should_include_associations_registered_later(
+        self,
+    ) -> None:
+        assert len(AssociationRegistry.get_all_associations(self._LaterOwner)) == 2
+        association = UnidirectionalToZeroOrOne[
+            "TestAssociationRegistry._LaterOwner",
+            "TestAssociationRegistry._Associate",
+        ](
+            "betty.tests.model.test_association:TestAssociationRegistry._LaterOwner",
+            "later_associate",
+            "betty.tests.model.test_association:TestAssociationRegistry._Associate",
+        )
+        assert association in AssociationRegistry.get_all_associations(self._LaterOwner)
+        assert (
+            AssociationRegistry.get_association(self._LaterOwner, "later_associate")
+            is association
+        )
+        assert association not in AssociationRegistry.get_all_associations(self._Owner)
+
 
 class TestUnidirectionalToZeroOrOne:
     class _Owner(DummyEntity):
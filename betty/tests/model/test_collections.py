@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import pickle
 from typing import Any, TYPE_CHECKING
 
 import pytest
@@ -172,6 +173,17 @@ class TestSingleTypeEntityCollection:
         with pytest.raises(KeyError):
             sut["4"]
 
+    async def test___getitem___by_entity_id_after_removing_entity_with_same_id(
+        self,
+    ) -> None:
+        sut = SingleTypeEntityCollection[Entity](DummyEntity)
+        entity1 = SingleTypeEntityCollectionTestEntity("1")
+        entity2 = SingleTypeEntityCollectionTestEntity("1")
+        sut.add(entity1, entity2)
+        assert entity1 is sut["1"]
+        sut.remove(entity1)
+        assert entity2 is sut["1"]
+
     async def test___delitem___by_entity(self) -> None:
         sut = SingleTypeEntityCollection[Entity](DummyEntity)
         entity1 = SingleTypeEntityCollectionTestEntity()
@@ -227,6 +239,32 @@ class TestSingleTypeEntityCollection:
 
         assert value not in sut
 
+    async def test___getstate__(self) -> None:
+        entity1 = SingleTypeEntityCollectionTestEntity("1")
+        entity2 = SingleTypeEntityCollectionTestEntity("2")
+        sut = SingleTypeEntityCollection[Entity](DummyEntity, entity1, entity2)
+        assert sut.__getstate__() == (DummyEntity, [entity1, entity2])
+
+    async def test___setstate__(self) -> None:
+        entity1 = SingleTypeEntityCollectionTestEntity("1")
+        entity2 = SingleTypeEntityCollectionTestEntity("2")
+        sut = SingleTypeEntityCollection[Entity](DummyEntity)
+        sut.__setstate__((DummyEntity, [entity1, entity2]))
+        assert list(sut) == [entity1, entity2]
+        assert entity1 in sut
+        assert entity2 is sut["2"]
+
+    async def test_pickle(self) -> None:
+        sut = SingleTypeEntityCollection[Entity](
+            DummyEntity,
+            SingleTypeEntityCollectionTestEntity("1"),
+            SingleTypeEntityCollectionTestEntity("2"),
+        )
+        unpickled_sut = pickle.loads(pickle.dumps(sut))
+        assert [entity.id for entity in unpickled_sut] == ["1", "2"]
+        assert unpickled_sut[0] in unpickled_sut
+        assert unpickled_sut[1] is unpickled_sut["2"]
+
 
 class MultipleTypesEntityCollectionTestEntityOne(DummyEntity):
     pass
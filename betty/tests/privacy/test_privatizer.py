@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -460,6 +461,50 @@ class TestPrivatizer:
         )
         assert expected == person.private
 
+    @pytest.mark.parametrize(
+        ("expected", "birth_year_offset"),
+        [
+            (True, 1),
+            (False, 0),
+        ],
+    )
+    async def test_privatize_person_with_distant_ancestor(
+        self, expected: bool, birth_year_offset: int
+    ) -> None:
+        generations_ago = 10
+        person = Person()
+        descendant = person
+        for _ in range(generations_ago):
+            ancestor = Person()
+            descendant.parents.add(ancestor)
+            descendant = ancestor
+        birth_year = (
+            datetime.now().year
+            - DEFAULT_LIFETIME_THRESHOLD * (generations_ago + 1)
+            + birth_year_offset
+        )
+        Presence(
+            descendant,
+            Subject(),
+            Event(event_type=Birth(), date=Date(birth_year, 1, 1)),
+        )
+        Privatizer(DEFAULT_LIFETIME_THRESHOLD, localizer=DEFAULT_LOCALIZER).privatize(
+            person
+        )
+        assert expected == person.private
+
+    async def test_privatize_person_with_deep_ancestry(self) -> None:
+        person = Person()
+        descendant = person
+        for _ in range(sys.getrecursionlimit()):
+            ancestor = Person()
+            descendant.parents.add(ancestor)
+            descendant = ancestor
+        Privatizer(DEFAULT_LIFETIME_THRESHOLD, localizer=DEFAULT_LOCALIZER).privatize(
+            person
+        )
+        assert person.private
+
     async def test_privatize_event_should_not_privatize_if_public(self) -> None:
         citation = Citation(source=Source())
         event_file = File(path=Path(__file__))
@@ -665,3 +710,38 @@ class TestPrivatizer:
             place
         )
         assert enclosee.private
+
+    async def test_privatize_place_should_privatize_deeply_nested_enclosees(
+        self,
+    ) -> None:
+        place = Place(private=True)
+        enclosee = place
+        for _ in range(sys.getrecursionlimit()):
+            encloser = enclosee
+            enclosee = Place()
+            Enclosure(enclosee, encloser)
+        Privatizer(DEFAULT_LIFETIME_THRESHOLD, localizer=DEFAULT_LOCALIZER).privatize(
+            place
+        )
+        assert enclosee.private
+
+    async def test_expiration_lookups(self) -> None:
+        person = Person()
+        person.parents.add(Person())
+        sut = Privatizer(DEFAULT_LIFETIME_THRESHOLD, localizer=DEFAULT_LOCALIZER)
+        assert sut.expiration_lookups == 0
+        sut.privatize(person)
+        assert sut.expiration_lookups > 0
+
+    async def test_memoized_expiration_lookups(self) -> None:
+        parent = Person()
+        children = [Person(), Person()]
+        for child in children:
+            child.parents.add(parent)
+        sut = Privatizer(DEFAULT_LIFETIME_THRESHOLD, localizer=DEFAULT_LOCALIZER)
+        sut.privatize(children[0])
+        memoized_expiration_lookups = sut.memoized_expiration_lookups
+        # The second child shares their ancestry with the first.
+        sut.privatize(children[1])
+        assert sut.memoized_expiration_lookups > memoized_expiration_lookups
+        assert children[1].private
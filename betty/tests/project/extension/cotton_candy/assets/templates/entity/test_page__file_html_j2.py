@@ -1,14 +1,23 @@
+from __future__ import annotations
+
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from betty.ancestry.file import File
 from betty.ancestry.file_reference import FileReference
 from betty.ancestry.has_file_references import HasFileReferences
+from betty.fs import ASSETS_DIRECTORY_PATH
 from betty.locale.localizer import DEFAULT_LOCALIZER
+from betty.media_type import MediaType
 from betty.privacy import HasPrivacy
+from betty.project import Project
 from betty.project.extension.cotton_candy import CottonCandy
 from betty.test_utils.jinja2 import TemplateFileTestBase
 from betty.test_utils.model import DummyEntity
 
+if TYPE_CHECKING:
+    from betty.app import App
+
 
 class DummyHasFileReferencesHasPrivacyEntity(
     HasFileReferences, HasPrivacy, DummyEntity
@@ -45,3 +54,24 @@ class TestTemplate(TemplateFileTestBase):
             assert str(public_referee.label.localize(DEFAULT_LOCALIZER)) in actual
 
             assert str(private_referee.label.localize(DEFAULT_LOCALIZER)) not in actual
+
+    async def test_with_image_formats(self, new_temporary_app: App) -> None:
+        file = File(
+            id="F1",
+            path=ASSETS_DIRECTORY_PATH / "public" / "static" / "betty-512x512.png",
+            media_type=MediaType("image/png"),
+        )
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.configuration.image_formats = ["webp", "avif"]
+            await project.configuration.extensions.enable(CottonCandy)
+            async with project:
+                environment = await project.jinja2_environment
+                actual = await environment.get_template(self.template).render_async(
+                    page_resource=file,
+                    entity_type=File,
+                    entity=file,
+                )
+        assert "<picture>" in actual
+        assert '<source srcset="/file/F1-1500x1500.webp" type="image/webp">' in actual
+        assert '<source srcset="/file/F1-1500x1500.avif" type="image/avif">' in actual
+        assert '<img src="/file/F1-1500x1500.png"' in actual
@@ -1,4 +1,6 @@
-from pathlib import Path
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 from betty.ancestry.event import Event
 from betty.ancestry.event_type.event_types import Birth
@@ -9,10 +11,16 @@ from betty.ancestry.person_name import PersonName
 from betty.ancestry.presence import Presence
 from betty.ancestry.presence_role.presence_roles import Subject
 from betty.date import Date
+from betty.job import Context
 from betty.locale.localizer import DEFAULT_LOCALIZER
+from betty.project import Project
 from betty.project.extension.cotton_candy import CottonCandy
 from betty.test_utils.jinja2 import TemplateFileTestBase
 
+if TYPE_CHECKING:
+    from pathlib import Path
+    from betty.app import App
+
 
 class TestTemplate(TemplateFileTestBase):
     extensions = {CottonCandy}
@@ -263,3 +271,31 @@ class TestTemplate(TemplateFileTestBase):
                 private_event_private_presence.description.localize(DEFAULT_LOCALIZER)
                 not in actual
             )
+
+    async def test_should_link_tree_stylesheet_after_page_without_tree(
+        self, new_temporary_app: App
+    ) -> None:
+        person_without_family = Person(id="P0")
+        person = Person(id="P1")
+        person.parents.add(Person(id="P2"))
+        job_context = Context()
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            async with project:
+                template = (await project.jinja2_environment).get_template(
+                    self.template
+                )
+                actual_without_tree = await template.render_async(
+                    page_resource=person_without_family,
+                    entity_type=Person,
+                    entity=person_without_family,
+                    job_context=job_context,
+                )
+                actual = await template.render_async(
+                    page_resource=person,
+                    entity_type=Person,
+                    entity=person,
+                    job_context=job_context,
+                )
+        assert "/css/trees.css" not in actual_without_tree
+        assert '<link rel="stylesheet" href="/css/trees.css">' in actual
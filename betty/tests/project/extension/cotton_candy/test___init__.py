@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from typing import Iterator, TYPE_CHECKING
 
@@ -28,13 +29,15 @@ from betty.ancestry.source import Source
 from betty.date import Datey, Date, DateRange
 from betty.model import persistent_id
 from betty.privacy import Privacy
-from betty.project import Project
+from betty.project import Project, ProjectContext
 from betty.project.config import DEFAULT_LIFETIME_THRESHOLD
 from betty.project.extension.cotton_candy import (
     person_timeline_events,
     associated_file_references,
     CottonCandy,
+    _generate_search_index,
 )
+from betty.project.generate import GenerateSiteEvent
 from betty.test_utils.model import DummyEntity
 from betty.test_utils.project.extension import ExtensionTestBase
 from betty.test_utils.project.extension.webpack import WebpackEntryPointProviderTestBase
@@ -380,3 +383,54 @@ class TestCottonCandy(
         async with Project.new_temporary(new_temporary_app) as project, project:
             sut = await project.new_target(self.get_sut_class())
             assert len(sut.public_css_paths)
+
+
+class TestGenerateSearchIndex:
+    async def test(self, new_temporary_app: App) -> None:
+        jane = Person(id="P1")
+        PersonName(person=jane, individual="Jane")
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            project.ancestry.add(jane)
+            async with project:
+                await _generate_search_index(GenerateSiteEvent(ProjectContext(project)))
+                www_directory_path = project.configuration.www_directory_path
+                index = json.loads(
+                    (www_directory_path / "search-index.json").read_text()
+                )
+        # Searches only load shards for query parts at least as long as the token prefixes.
+        assert index["tokenPrefixLength"] == 2
+        assert list(index["tokenShards"]) == ["ja"]
+
+    async def test_should_only_remove_stale_files(self, new_temporary_app: App) -> None:
+        jane = Person(id="P1")
+        PersonName(person=jane, individual="Jane")
+        john = Person(id="P2")
+        john_name = PersonName(person=john, individual="John")
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            project.ancestry.add(jane, john)
+            async with project:
+                event = GenerateSiteEvent(ProjectContext(project))
+                www_directory_path = project.configuration.www_directory_path
+                await _generate_search_index(event)
+                index = json.loads(
+                    (www_directory_path / "search-index.json").read_text()
+                )
+                jane_shard_file_path = www_directory_path / index["tokenShards"]["ja"]
+                john_shard_file_path = www_directory_path / index["tokenShards"]["jo"]
+                jane_shard_modified = jane_shard_file_path.stat().st_mtime_ns
+
+                project.ancestry.remove(john, john_name)
+                await _generate_search_index(event)
+
+                assert jane_shard_file_path.stat().st_mtime_ns == jane_shard_modified
+                assert not john_shard_file_path.exists()
+                index = json.loads(
+                    (www_directory_path / "search-index.json").read_text()
+                )
+                assert sorted(
+                    file_path.relative_to(www_directory_path).as_posix()
+                    for file_path in (www_directory_path / "search-index").rglob("*")
+                    if file_path.is_file()
+                ) == sorted([*index["tokenShards"].values(), *index["resultChunks"]])
@@ -1,6 +1,8 @@
+from inspect import getmembers
 from pathlib import Path
 
 import pytest
+from pytest_mock import MockerFixture
 
 from betty.ancestry.file import File
 from betty.ancestry.name import Name
@@ -13,7 +15,10 @@ from betty.locale.localizer import DEFAULT_LOCALIZER
 from betty.project import Project
 from betty.project.config import LocaleConfiguration
 from betty.project.extension.cotton_candy import CottonCandy
-from betty.project.extension.cotton_candy.search import Index
+from betty.project.extension.cotton_candy.search import (
+    Index,
+    _get_static_translations_localizable_attr_names,
+)
 
 
 class TestIndex:
@@ -357,6 +362,41 @@ class TestIndex:
                 }
                 assert expected in actual[0].result
 
+    async def test_build_files_should_inspect_entity_type_once(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        _get_static_translations_localizable_attr_names.cache_clear()
+        m_getmembers = mocker.patch(
+            "betty.project.extension.cotton_candy.search.getmembers", wraps=getmembers
+        )
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            project.ancestry.add(
+                File(
+                    id="F1",
+                    path=Path(__file__),
+                    description="Hello, world!",
+                ),
+                File(
+                    id="F2",
+                    path=Path(__file__),
+                    description="Goodbye, world!",
+                ),
+            )
+            async with project:
+                actual = await Index(
+                    project.ancestry,
+                    await project.jinja2_environment,
+                    Context(),
+                    DEFAULT_LOCALIZER,
+                ).build()
+
+                assert [entry.text for entry in actual] == [
+                    {"hello,", "world!"},
+                    {"goodbye,", "world!"},
+                ]
+        assert m_getmembers.call_count == 1
+
     async def test_build_private_file(self, new_temporary_app: App) -> None:
         file_id = "F1"
         file = File(
@@ -379,3 +419,72 @@ class TestIndex:
                 ).build()
 
                 assert actual == []
+
+    async def test_build_sharded_empty(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            async with project:
+                actual = await Index(
+                    project.ancestry,
+                    await project.jinja2_environment,
+                    Context(),
+                    DEFAULT_LOCALIZER,
+                ).build_sharded()
+
+                assert actual.token_shards == {}
+                assert actual.result_chunks == []
+
+    async def test_build_sharded(self, new_temporary_app: App) -> None:
+        jane = Person(id="P1")
+        PersonName(person=jane, individual="Jane", affiliation="Doe")
+        janet = Person(id="P2")
+        PersonName(person=janet, individual="Janet", affiliation="Doe")
+        john = Person(id="P3")
+        PersonName(person=john, individual="John")
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            project.ancestry.add(jane, janet, john)
+            async with project:
+                actual = await Index(
+                    project.ancestry,
+                    await project.jinja2_environment,
+                    Context(),
+                    DEFAULT_LOCALIZER,
+                ).build_sharded(result_chunk_size=2)
+
+                assert actual.token_shards == {
+                    "ja": {"jane": [0], "janet": [1]},
+                    "do": {"doe": [0, 1]},
+                    "jo": {"john": [2]},
+                }
+                assert len(actual.result_chunks) == 2
+                assert len(actual.result_chunks[0]) == 2
+                assert len(actual.result_chunks[1]) == 1
+                assert "/person/P1/index.html" in actual.result_chunks[0][0]
+                assert "/person/P2/index.html" in actual.result_chunks[0][1]
+                assert "/person/P3/index.html" in actual.result_chunks[1][0]
+
+    async def test_build_sharded_with_token_prefix_length(
+        self, new_temporary_app: App
+    ) -> None:
+        jane = Person(id="P1")
+        PersonName(person=jane, individual="Jane")
+        janet = Person(id="P2")
+        PersonName(person=janet, individual="Janet")
+
+        async with Project.new_temporary(new_temporary_app) as project:
+            await project.configuration.extensions.enable(CottonCandy)
+            project.ancestry.add(jane, janet)
+            async with project:
+                actual = await Index(
+                    project.ancestry,
+                    await project.jinja2_environment,
+                    Context(),
+                    DEFAULT_LOCALIZER,
+                ).build_sharded(token_prefix_length=5)
+
+                assert actual.token_shards == {
+                    "jane": {"jane": [0]},
+                    "janet": {"janet": [1]},
+                }
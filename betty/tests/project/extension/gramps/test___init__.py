@@ -370,3 +370,42 @@ class TestGramps(ExtensionTestBase[Gramps]):
                 assert "C0002" in project.ancestry[Citation]
                 assert "N0001" in project.ancestry[Note]
                 assert "N0002" in project.ancestry[Note]
+
+    async def test_fingerprint_ancestry_inputs(
+        self, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        gramps_family_tree_path = tmp_path / "gramps.xml"
+        async with aiofiles.open(gramps_family_tree_path, mode="w") as f:
+            await f.write("<database/>")
+        async with Project.new_temporary(new_temporary_app) as project:
+            sut = Gramps(
+                project,
+                configuration=GrampsConfiguration(
+                    family_trees=[
+                        FamilyTreeConfiguration(file_path=gramps_family_tree_path)
+                    ]
+                ),
+            )
+            fingerprint = await sut.fingerprint_ancestry_inputs()
+            assert await sut.fingerprint_ancestry_inputs() == fingerprint
+            async with aiofiles.open(gramps_family_tree_path, mode="a") as f:
+                await f.write("\n")
+            assert await sut.fingerprint_ancestry_inputs() != fingerprint
+
+    async def test_fingerprint_ancestry_inputs_with_missing_family_tree(
+        self, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        gramps_family_tree_path = tmp_path / "gramps.xml"
+        async with Project.new_temporary(new_temporary_app) as project:
+            sut = Gramps(
+                project,
+                configuration=GrampsConfiguration(
+                    family_trees=[
+                        FamilyTreeConfiguration(file_path=gramps_family_tree_path)
+                    ]
+                ),
+            )
+            fingerprint = await sut.fingerprint_ancestry_inputs()
+            async with aiofiles.open(gramps_family_tree_path, mode="w") as f:
+                await f.write("<database/>")
+            assert await sut.fingerprint_ancestry_inputs() != fingerprint
@@ -1,7 +1,14 @@
+import gzip
+import os
+from asyncio import sleep
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import AsyncExitStack
+from datetime import datetime
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
 import aiofiles
+import pytest
 from pytest_mock import MockerFixture
 
 from betty.ancestry.citation import Citation
@@ -10,7 +17,10 @@ from betty.ancestry.event_type.event_types import Birth
 from betty.ancestry.file import File
 from betty.ancestry.name import Name
 from betty.ancestry.person import Person
+from betty.ancestry.person_name import PersonName
 from betty.ancestry.place import Place
+from betty.ancestry.presence import Presence
+from betty.ancestry.presence_role.presence_roles import Subject
 from betty.ancestry.source import Source
 from betty.app import App
 from betty.model import (
@@ -19,7 +29,13 @@ from betty.model import (
 from betty.plugin.static import StaticPluginRepository
 from betty.project import Project, ProjectContext
 from betty.project.config import LocaleConfiguration, EntityTypeConfiguration
-from betty.project.generate import generate, GenerateSiteEvent
+from betty.project.generate import (
+    generate,
+    GenerateSiteEvent,
+    _JobScheduler,
+    _new_generate_worker_job_context,
+    _run_jobs,
+)
 from betty.string import camel_case_to_kebab_case, kebab_case_to_lower_camel_case
 from betty.test_utils.jinja2 import assert_betty_html, assert_betty_json
 from betty.test_utils.model import DummyEntity
@@ -77,6 +93,32 @@ class TestGenerate:
                     )
                     assert meta_redirect in await f.read()
 
+    async def test_json_error_responses(self) -> None:
+        async with (
+            App.new_temporary() as app,
+            app,
+            Project.new_temporary(app) as project,
+        ):
+            project.configuration.locales.replace(
+                LocaleConfiguration(
+                    "nl-NL",
+                    alias="nl",
+                ),
+                LocaleConfiguration(
+                    "en-US",
+                    alias="en",
+                ),
+            )
+            async with project:
+                await generate(project)
+            www_directory_path = project.configuration.www_directory_path
+            for code in (401, 403, 404):
+                file_path_nl = www_directory_path / "nl" / ".error" / f"{code}.json"
+                file_path_en = www_directory_path / "en" / ".error" / f"{code}.json"
+                # The responses are identical for all locales, so they are hard links to the same file.
+                assert file_path_nl.stat().st_ino == file_path_en.stat().st_ino
+                assert file_path_nl.stat().st_mode & 0o777 == 0o644
+
     async def test_links(self) -> None:
         async with (
             App.new_temporary() as app,
@@ -269,6 +311,33 @@ class TestGenerate:
                         project, f"/file/{file.id}/index.json", "fileEntity"
                     )
 
+    async def test_should_set_permissions(self) -> None:
+        umask = os.umask(0o077)
+        try:
+            async with (
+                App.new_temporary() as app,
+                app,
+                Project.new_temporary(app) as project,
+            ):
+                async with project:
+                    await generate(project)
+                output_directory_path = project.configuration.output_directory_path
+                assert output_directory_path.stat().st_mode & 0o777 == 0o755
+                for directory_path_str, subdirectory_names, file_names in os.walk(
+                    output_directory_path
+                ):
+                    directory_path = Path(directory_path_str)
+                    for subdirectory_name in subdirectory_names:
+                        assert (
+                            directory_path / subdirectory_name
+                        ).stat().st_mode & 0o777 == 0o755
+                    for file_name in file_names:
+                        assert (
+                            directory_path / file_name
+                        ).stat().st_mode & 0o777 == 0o644
+        finally:
+            os.umask(umask)
+
     async def test_places(self) -> None:
         async with (
             App.new_temporary() as app,
@@ -409,6 +478,254 @@ class TestGenerate:
                     project, f"/source/{source.id}/index.json", "sourceEntity"
                 )
 
+    async def _mark(self, *file_paths: Path) -> None:
+        for file_path in file_paths:
+            async with aiofiles.open(file_path, "a") as f:
+                await f.write("BETTY-WAS-HERE")
+
+    async def _is_marked(self, file_path: Path) -> bool:
+        async with aiofiles.open(file_path) as f:
+            return "BETTY-WAS-HERE" in await f.read()
+
+    async def test_incremental(self, new_temporary_app: App) -> None:
+        unchanged_person = Person(id="UNCHANGED")
+        changed_person = Person(id="CHANGED")
+        removed_person = Person(id="REMOVED")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(unchanged_person, changed_person, removed_person)
+            async with project:
+                await generate(project, incremental=True)
+                www_directory_path = project.configuration.www_directory_path
+                await self._mark(
+                    *(
+                        www_directory_path / "person" / person.id / file_name
+                        for person in (unchanged_person, changed_person)
+                        for file_name in ("index.html", "index.json")
+                    ),
+                    www_directory_path / "person" / "index.html",
+                    www_directory_path / "person" / "index.json",
+                    www_directory_path / "place" / "index.html",
+                    www_directory_path / "place" / "index.json",
+                )
+
+                project.ancestry.add(
+                    PersonName(person=changed_person, individual="Jane")
+                )
+                project.ancestry.remove(removed_person)
+                await generate(project, incremental=True)
+
+                assert await self._is_marked(
+                    www_directory_path / "person" / unchanged_person.id / "index.json"
+                )
+                # Any page may render information about the changed person.
+                assert not await self._is_marked(
+                    www_directory_path / "person" / unchanged_person.id / "index.html"
+                )
+                for file_name in ("index.html", "index.json"):
+                    assert not await self._is_marked(
+                        www_directory_path / "person" / changed_person.id / file_name
+                    )
+                    assert not await self._is_marked(
+                        www_directory_path / "person" / file_name
+                    )
+                # Any list page may render information about the changed person.
+                assert not await self._is_marked(
+                    www_directory_path / "place" / "index.html"
+                )
+                assert await self._is_marked(
+                    www_directory_path / "place" / "index.json"
+                )
+                assert not (www_directory_path / "person" / removed_person.id).exists()
+                await assert_betty_html(
+                    project, f"/person/{changed_person.id}/index.html"
+                )
+                await assert_betty_json(
+                    project, f"/person/{changed_person.id}/index.json", "personEntity"
+                )
+
+    async def test_incremental_should_generate_html_for_distant_changes(
+        self, new_temporary_app: App
+    ) -> None:
+        parent = Person(id="PARENT")
+        person = Person(id="PERSON")
+        sibling = Person(id="SIBLING")
+        person.parents.add(parent)
+        sibling.parents.add(parent)
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(parent, person, sibling)
+            async with project:
+                await generate(project, incremental=True)
+                person_directory_path = (
+                    project.configuration.www_directory_path / "person" / person.id
+                )
+                await self._mark(
+                    person_directory_path / "index.html",
+                    person_directory_path / "index.json",
+                )
+
+                # The person's page lists their siblings' names.
+                project.ancestry.add(PersonName(person=sibling, individual="Jane"))
+                await generate(project, incremental=True)
+
+                assert not await self._is_marked(person_directory_path / "index.html")
+                assert await self._is_marked(person_directory_path / "index.json")
+
+    async def test_incremental_should_generate_list_html_for_related_changes(
+        self, new_temporary_app: App
+    ) -> None:
+        person = Person(id="PERSON")
+        event = Event(id="EVENT", event_type=Birth())
+        Presence(person, Subject(), event)
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person, event)
+            # Like Cotton Candy's event list, this names each event's subjects.
+            templates_directory_path = (
+                project.configuration.assets_directory_path / "templates" / "entity"
+            )
+            templates_directory_path.mkdir(parents=True)
+            async with aiofiles.open(
+                templates_directory_path / "page-list--event.html.j2", "w"
+            ) as f:
+                await f.write(
+                    "{% for event in entities %}{% for presence in event.presences %}"
+                    "{{ presence.person.label | localize }}"
+                    "{% endfor %}{% endfor %}"
+                )
+            async with project:
+                await generate(project, incremental=True)
+                event_list_file_path = (
+                    project.configuration.www_directory_path / "event" / "index.html"
+                )
+                async with aiofiles.open(event_list_file_path) as f:
+                    assert "Jane" not in await f.read()
+
+                project.ancestry.add(PersonName(person=person, individual="Jane"))
+                await generate(project, incremental=True)
+
+                async with aiofiles.open(event_list_file_path) as f:
+                    assert "Jane" in await f.read()
+
+    async def test_incremental_should_prune_html_for_private_entities(
+        self, new_temporary_app: App
+    ) -> None:
+        person = Person(id="PERSON1")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person)
+            async with project:
+                await generate(project, incremental=True)
+                person.private = True
+                await generate(project, incremental=True)
+                person_directory_path = (
+                    project.configuration.www_directory_path / "person" / person.id
+                )
+                assert not (person_directory_path / "index.html").exists()
+                assert (person_directory_path / "index.json").exists()
+
+    async def test_incremental_with_changed_inputs(
+        self, new_temporary_app: App
+    ) -> None:
+        person = Person(id="PERSON1")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person)
+            async with project:
+                await generate(project, incremental=True)
+                person_file_path = (
+                    project.configuration.www_directory_path
+                    / "person"
+                    / person.id
+                    / "index.html"
+                )
+                await self._mark(person_file_path)
+                project.configuration.title = "My First Ancestry Site"
+                await generate(project, incremental=True)
+                assert not await self._is_marked(person_file_path)
+
+    async def test_without_incremental_should_generate_everything(
+        self, new_temporary_app: App
+    ) -> None:
+        person = Person(id="PERSON1")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person)
+            async with project:
+                await generate(project, incremental=True)
+                person_file_path = (
+                    project.configuration.www_directory_path
+                    / "person"
+                    / person.id
+                    / "index.html"
+                )
+                await self._mark(person_file_path)
+                await generate(project)
+                assert not await self._is_marked(person_file_path)
+
+    async def test_with_processes(self, new_temporary_app: App) -> None:
+        person = Person(id="PERSON1")
+        PersonName(person=person, individual="Jane")
+        place = Place(id="PLACE1", names=[Name("Amsterdam")])
+        event = Event(id="EVENT1", event_type=Birth(), place=place)
+        Presence(person, Subject(), event)
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.configuration.locales["en-US"].alias = "en"
+            project.configuration.locales.append(
+                LocaleConfiguration(
+                    "nl-NL",
+                    alias="nl",
+                )
+            )
+            project.ancestry.add(person, place, event)
+            async with project:
+                await generate(project, processes=2)
+                for entity_type_id, entity_id, schema_definition in (
+                    ("person", person.id, "personEntity"),
+                    ("place", place.id, "placeEntity"),
+                    ("event", event.id, "eventEntity"),
+                ):
+                    await assert_betty_json(
+                        project,
+                        f"/{entity_type_id}/{entity_id}/index.json",
+                        schema_definition,
+                    )
+                    for locale in ("en", "nl"):
+                        await assert_betty_html(
+                            project,
+                            f"/{locale}/{entity_type_id}/{entity_id}/index.html",
+                        )
+
+    async def test_with_precompress(self, new_temporary_app: App) -> None:
+        person = Person(id="PERSON1")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person)
+            async with project:
+                await generate(project, precompress=True)
+                www_directory_path = project.configuration.www_directory_path
+                # Small files are not precompressed.
+                assert not (www_directory_path / "robots.txt.gz").exists()
+                for file_path in (
+                    www_directory_path / "person" / "index.html",
+                    www_directory_path / "api" / "index.json",
+                    www_directory_path / "schema.json",
+                ):
+                    assert (
+                        gzip.decompress(
+                            file_path.with_name(file_path.name + ".gz").read_bytes()
+                        )
+                        == file_path.read_bytes()
+                    )
+
+    async def test_with_precompress_incremental_should_prune_variants(
+        self, new_temporary_app: App
+    ) -> None:
+        person = Person(id="PERSON1")
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(person)
+            async with project:
+                await generate(project, incremental=True, precompress=True)
+                project.ancestry.remove(person)
+                await generate(project, incremental=True, precompress=True)
+                assert not (
+                    project.configuration.www_directory_path / "person" / person.id
+                ).exists()
+
 
 class TestResourceOverride:
     async def test(self) -> None:
@@ -455,6 +772,153 @@ class TestSitemapGenerate:
             )
             schema.validate(sitemap_doc)
 
+    async def test_with_multiple_batches(self, mocker: MockerFixture) -> None:
+        mocker.patch("betty.project.generate._SITEMAP_BATCH_SIZE", 2)
+        async with (
+            App.new_temporary() as app,
+            app,
+            Project.new_temporary(app) as project,
+        ):
+            project.configuration.locales.append(LocaleConfiguration("nl-NL"))
+            for person_id in ("PERSON1", "PERSON2", "PERSON3"):
+                project.ancestry.add(Person(id=person_id, public=True))
+            www_directory_path = project.configuration.www_directory_path
+            www_directory_path.mkdir(parents=True)
+            stale_sitemap_batch_path = www_directory_path / "sitemap-3.xml"
+            stale_sitemap_batch_path.touch()
+            async with project:
+                await generate(project)
+            sitemap = (www_directory_path / "sitemap.xml").read_text()
+            sitemap_batches = [
+                (www_directory_path / f"sitemap-{index}.xml").read_text()
+                for index in range(3)
+            ]
+            assert "sitemap-2.xml" in sitemap
+            assert "sitemap-3.xml" not in sitemap
+            assert not stale_sitemap_batch_path.exists()
+            assert [
+                sitemap_batch.count("<url>") for sitemap_batch in sitemap_batches
+            ] == [2, 2, 2]
+            assert "/en-US/person/PERSON1/" in sitemap_batches[0]
+            assert "/nl-NL/person/PERSON3/" in sitemap_batches[2]
+
+    async def test_with_compress_sitemaps(self) -> None:
+        from lxml import etree
+
+        async with (
+            App.new_temporary() as app,
+            app,
+            Project.new_temporary(app) as project,
+        ):
+            project.configuration.compress_sitemaps = True
+            project.ancestry.add(Person(id="PERSON1", public=True))
+            async with project:
+                await generate(project)
+            www_directory_path = project.configuration.www_directory_path
+            assert (
+                "sitemap-0.xml.gz" in (www_directory_path / "sitemap.xml").read_text()
+            )
+            assert not (www_directory_path / "sitemap-0.xml").exists()
+            schema = etree.XMLSchema(
+                etree.parse(
+                    Path(__file__).parent / "test___init___assets" / "sitemap.xsd"
+                )
+            )
+            sitemap_batch_doc = etree.fromstring(
+                gzip.decompress((www_directory_path / "sitemap-0.xml.gz").read_bytes())
+            )
+            assert schema.validate(sitemap_batch_doc)
+            assert "/person/PERSON1/" in etree.tostring(sitemap_batch_doc).decode()
+
+    async def test_with_precompress(self) -> None:
+        async with (
+            App.new_temporary() as app,
+            app,
+            Project.new_temporary(app) as project,
+            project,
+        ):
+            await generate(project, precompress=True)
+            www_directory_path = project.configuration.www_directory_path
+            assert (
+                gzip.decompress((www_directory_path / "sitemap-0.xml.gz").read_bytes())
+                == (www_directory_path / "sitemap-0.xml").read_bytes()
+            )
+
+
+class TestJobScheduler:
+    async def test_run(self) -> None:
+        in_flight_job_counts = []
+        sut = _JobScheduler(3)
+
+        async def _job() -> None:
+            in_flight_job_counts.append(sut.in_flight_job_count)
+            await sleep(0)
+
+        async def _jobs() -> AsyncIterator[Awaitable[None]]:
+            for _ in range(10):
+                yield _job()
+
+        await sut.run(_jobs())
+        assert sut.completed_job_count == 10
+        assert sut.in_flight_job_count == 0
+        assert max(in_flight_job_counts) <= 3
+        assert sut.throughput > 0
+
+    async def test_run_should_raise_job_errors(self) -> None:
+        async def _failing_job() -> None:
+            raise RuntimeError("Job failed")
+
+        async def _jobs() -> AsyncIterator[Awaitable[None]]:
+            yield _failing_job()
+            yield sleep(999)
+
+        sut = _JobScheduler(1)
+        with pytest.raises(RuntimeError, match="Job failed"):
+            await sut.run(_jobs())
+
+
+class TestRunJobs:
+    async def test_with_process_pool_should_yield_entity_jobs_between_other_jobs(
+        self, mocker: MockerFixture, new_temporary_app: App
+    ) -> None:
+        async with Project.new_temporary(new_temporary_app) as project:
+            project.ancestry.add(Person(id="PERSON1"), Person(id="PERSON2"))
+            async with project:
+                job_names = []
+                async for job in _run_jobs(
+                    ProjectContext(project), process_pool=mocker.Mock()
+                ):
+                    job_names.append(job.cr_code.co_name)
+                    job.close()
+        # Entity jobs are yielded like any other, rather than being collected until all other jobs are done.
+        assert job_names.count("_run_entity_job") == 3
+        assert "_generate_entity_html" not in job_names
+        assert "_generate_entity_jsons" not in job_names
+        assert job_names.index("_run_entity_job") < max(
+            index
+            for index, job_name in enumerate(job_names)
+            if job_name == "_generate_entity_type_list_html"
+        )
+
+
+class TestNewGenerateWorkerJobContext:
+    async def test_should_share_start(self, new_temporary_app: App) -> None:
+        start = datetime(1970, 1, 1)
+        async with (
+            Project.new_temporary(new_temporary_app) as project,
+            AsyncExitStack() as stack,
+        ):
+            sut = await _new_generate_worker_job_context(
+                stack,
+                new_temporary_app.configuration,
+                new_temporary_app.binary_file_cache.path,
+                project.configuration,
+                project.ancestry,
+                False,
+                start,
+            )
+            assert sut.start == start
+
 
 class TestGenerateSiteEvent:
     async def test_job_context(self, new_temporary_app: App) -> None:
@@ -1,16 +1,40 @@
+import gzip
+import os
 from collections.abc import Sequence
 from pathlib import Path
 
 import aiofiles
 import pytest
 
+from betty.app import App
+from betty.hashid import hashid
+from betty.job import Context
+from betty.project import Project, ProjectContext
 from betty.project.generate.file import (
+    copy_file,
     create_file,
+    create_files,
     create_html_resource,
     create_json_resource,
+    link_or_copy_file,
+    make_directories,
+    ResourceFile,
+    Precompressor,
 )
 
 
+class TestResourceFile:
+    async def test_write(self) -> None:
+        sut = ResourceFile()
+        await sut.write("Hello, ")
+        await sut.write("world!")
+        assert sut.content == b"Hello, world!"
+
+    async def test_content(self) -> None:
+        sut = ResourceFile()
+        assert sut.content == b""
+
+
 class TestCreateFile:
     @pytest.mark.parametrize(
         "path_segments",
@@ -28,6 +52,163 @@ class TestCreateFile:
         async with aiofiles.open(file_path) as f:
             assert await f.read() == content
 
+    async def test_should_set_permissions(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "directory" / "file"
+        async with create_file(file_path) as f:
+            await f.write("Hello, world!")
+        assert file_path.stat().st_mode & 0o777 == 0o644
+        assert file_path.parent.stat().st_mode & 0o777 == 0o755
+
+    async def test_should_not_write_identical_content(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        content = "Hello, world!"
+        async with create_file(file_path) as f:
+            await f.write(content)
+        os.utime(file_path, ns=(0, 0))
+        async with create_file(file_path) as f:
+            await f.write(content)
+        assert file_path.stat().st_mtime_ns == 0
+
+    async def test_should_write_changed_content(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        async with create_file(file_path) as f:
+            await f.write("Hello, world!")
+        async with create_file(file_path) as f:
+            await f.write("Hello, other world!")
+        async with aiofiles.open(file_path) as f:
+            assert await f.read() == "Hello, other world!"
+
+    async def test_with_deduplicate_should_hard_link_identical_content(
+        self, tmp_path: Path
+    ) -> None:
+        job_context = Context()
+        file_path_one = tmp_path / "one" / "file"
+        file_path_two = tmp_path / "two" / "file"
+        for file_path in (file_path_one, file_path_two):
+            async with create_file(
+                file_path, job_context=job_context, deduplicate=True
+            ) as f:
+                await f.write("Hello, world!")
+        assert file_path_one.stat().st_ino == file_path_two.stat().st_ino
+
+        # Changing one file must leave the other untouched.
+        async with create_file(file_path_two) as f:
+            await f.write("Hello, other world!")
+        async with aiofiles.open(file_path_one) as f:
+            assert await f.read() == "Hello, world!"
+
+    async def test_without_deduplicate_should_not_track_content(
+        self, tmp_path: Path
+    ) -> None:
+        job_context = Context()
+        file_path_one = tmp_path / "one" / "file"
+        file_path_two = tmp_path / "two" / "file"
+        for file_path in (file_path_one, file_path_two):
+            async with create_file(file_path, job_context=job_context) as f:
+                await f.write("Hello, world!")
+        assert file_path_one.stat().st_ino != file_path_two.stat().st_ino
+        async with job_context.cache.with_scope("generate-file").get(
+            hashid(b"Hello, world!")
+        ) as cache_item:
+            assert cache_item is None
+
+    async def test_with_job_context_should_precompress(
+        self, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        content = "Hello, world! " * 100
+        file_path = tmp_path / "file"
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            job_context = ProjectContext(project, precompressor=Precompressor())
+            async with create_file(file_path, job_context=job_context) as f:
+                await f.write(content)
+        assert gzip.decompress((tmp_path / "file.gz").read_bytes()) == content.encode(
+            "utf-8"
+        )
+
+
+class TestCreateFiles:
+    async def test(self, tmp_path: Path) -> None:
+        files = [
+            (tmp_path / "one" / "index.json", b"1"),
+            (tmp_path / "two" / "index.json", b"2"),
+        ]
+        await create_files(files)
+        for path, content in files:
+            assert path.read_bytes() == content
+            assert path.stat().st_mode & 0o777 == 0o644
+            assert path.parent.stat().st_mode & 0o777 == 0o755
+
+    async def test_should_not_write_identical_content(self, tmp_path: Path) -> None:
+        path = tmp_path / "index.json"
+        await create_files([(path, b"1")])
+        os.utime(path, (0, 0))
+        await create_files([(path, b"1")])
+        assert path.stat().st_mtime == 0
+
+    async def test_with_job_context_should_precompress(
+        self, new_temporary_app: App, tmp_path: Path
+    ) -> None:
+        content = b"Hello, world! " * 100
+        path = tmp_path / "index.json"
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            job_context = ProjectContext(project, precompressor=Precompressor())
+            await create_files([(path, content)], job_context=job_context)
+        assert gzip.decompress((tmp_path / "index.json.gz").read_bytes()) == content
+
+
+class TestPrecompressor:
+    async def test_precompress(self, tmp_path: Path) -> None:
+        content = b"Hello, world! " * 100
+        file_path = tmp_path / "file"
+        file_path.write_bytes(content)
+        sut = Precompressor()
+        await sut.precompress(file_path, content)
+        gzip_file_path = tmp_path / "file.gz"
+        assert gzip.decompress(gzip_file_path.read_bytes()) == content
+        assert gzip_file_path.stat().st_mode & 0o777 == 0o644
+
+    async def test_precompress_all(self, tmp_path: Path) -> None:
+        files = [
+            (tmp_path / "one", b"Hello, world! " * 100),
+            (tmp_path / "two", b"Hello, other world! " * 100),
+        ]
+        sut = Precompressor()
+        await sut.precompress_all(files)
+        for path, content in files:
+            assert (
+                gzip.decompress(path.with_name(f"{path.name}.gz").read_bytes())
+                == content
+            )
+
+    async def test_precompress_should_compress_deterministically(
+        self, tmp_path: Path
+    ) -> None:
+        content = b"Hello, world! " * 100
+        file_path = tmp_path / "file"
+        sut = Precompressor()
+        await sut.precompress(file_path, content)
+        gzip_content = (tmp_path / "file.gz").read_bytes()
+        await sut.precompress(file_path, content)
+        assert (tmp_path / "file.gz").read_bytes() == gzip_content
+
+    async def test_precompress_below_threshold(self, tmp_path: Path) -> None:
+        content = b"Hello, world! " * 100
+        file_path = tmp_path / "file"
+        gzip_file_path = tmp_path / "file.gz"
+        gzip_file_path.write_bytes(b"Stale content")
+        sut = Precompressor(threshold=len(content) + 1)
+        await sut.precompress(file_path, content)
+        assert not gzip_file_path.exists()
+
+    async def test_precompress_with_incompressible_content(
+        self, tmp_path: Path
+    ) -> None:
+        content = os.urandom(2048)
+        file_path = tmp_path / "file"
+        sut = Precompressor()
+        await sut.precompress(file_path, content)
+        assert not (tmp_path / "file.gz").exists()
+
 
 class TestCreateHtmlResource:
     async def test(self, tmp_path: Path) -> None:
@@ -49,3 +230,36 @@ class TestCreateJsonResource:
         file_path = resource_path / "index.json"
         async with aiofiles.open(file_path) as f:
             assert await f.read() == content
+
+
+class TestMakeDirectories:
+    def test(self, tmp_path: Path) -> None:
+        directory_path = tmp_path / "foo" / "bar"
+        make_directories(directory_path)
+        assert directory_path.stat().st_mode & 0o777 == 0o755
+        assert directory_path.parent.stat().st_mode & 0o777 == 0o755
+
+
+class TestCopyFile:
+    def test(self, tmp_path: Path) -> None:
+        source_file_path = tmp_path / "source"
+        source_file_path.write_text("Hello, world!")
+        source_file_path.chmod(0o600)
+        destination_file_path = tmp_path / "destination" / "file"
+        copy_file(source_file_path, destination_file_path)
+        assert destination_file_path.read_text() == "Hello, world!"
+        assert destination_file_path.stat().st_mode & 0o777 == 0o644
+        assert destination_file_path.parent.stat().st_mode & 0o777 == 0o755
+        assert source_file_path.stat().st_mode & 0o777 == 0o600
+
+
+class TestLinkOrCopyFile:
+    def test(self, tmp_path: Path) -> None:
+        source_file_path = tmp_path / "source"
+        source_file_path.write_text("Hello, world!")
+        source_file_path.chmod(0o600)
+        destination_file_path = tmp_path / "destination" / "file"
+        link_or_copy_file(source_file_path, destination_file_path)
+        assert destination_file_path.read_text() == "Hello, world!"
+        assert destination_file_path.stat().st_mode & 0o777 == 0o644
+        assert destination_file_path.parent.stat().st_mode & 0o777 == 0o755
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import aiofiles
+
+from betty.project.generate.manifest import BuildManifest
+
+
+class TestBuildManifest:
+    async def test_inputs(self) -> None:
+        inputs = "0123456789abcdef"
+        sut = BuildManifest(inputs)
+        assert sut.inputs == inputs
+
+    async def test_add(self) -> None:
+        sut = BuildManifest("0123456789abcdef")
+        sut.add("person", "P1", "json-fingerprint", "html-fingerprint")
+        assert sut.get("person", "P1") == ("json-fingerprint", "html-fingerprint")
+
+    async def test_add_should_replace(self) -> None:
+        sut = BuildManifest("0123456789abcdef")
+        sut.add("person", "P1", "json-fingerprint", "html-fingerprint")
+        sut.add("person", "P1", "another-json-fingerprint", None)
+        assert sut.get("person", "P1") == ("another-json-fingerprint", None)
+
+    async def test_get_without_entity(self) -> None:
+        sut = BuildManifest("0123456789abcdef")
+        assert sut.get("person", "P1") is None
+
+    async def test_entity_type_ids(self) -> None:
+        sut = BuildManifest("0123456789abcdef")
+        assert sut.entity_type_ids() == set()
+        sut.add("person", "P1", "json-fingerprint", None)
+        sut.add("place", "P1", "json-fingerprint", None)
+        assert sut.entity_type_ids() == {"person", "place"}
+
+    async def test_entity_ids(self) -> None:
+        sut = BuildManifest("0123456789abcdef")
+        assert sut.entity_ids("person") == set()
+        sut.add("person", "P1", "json-fingerprint", None)
+        sut.add("person", "P2", "json-fingerprint", None)
+        sut.add("place", "P3", "json-fingerprint", None)
+        assert sut.entity_ids("person") == {"P1", "P2"}
+
+    async def test_read_without_file(self, tmp_path: Path) -> None:
+        assert await BuildManifest.read(tmp_path / "build-manifest.json") is None
+
+    async def test_read_with_invalid_file(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "build-manifest.json"
+        async with aiofiles.open(file_path, "w") as f:
+            await f.write("{")
+        assert await BuildManifest.read(file_path) is None
+
+    async def test_read_with_unknown_version(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "build-manifest.json"
+        async with aiofiles.open(file_path, "w") as f:
+            await f.write('{"version": 999999, "inputs": "", "entities": {}}')
+        assert await BuildManifest.read(file_path) is None
+
+    async def test_write(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "directory" / "build-manifest.json"
+        sut = BuildManifest("0123456789abcdef")
+        sut.add("person", "P1", "json-fingerprint", "html-fingerprint")
+        sut.add("person", "P2", "json-fingerprint", None)
+        await sut.write(file_path)
+        manifest = await BuildManifest.read(file_path)
+        assert manifest is not None
+        assert manifest.inputs == sut.inputs
+        assert manifest.entity_type_ids() == {"person"}
+        assert manifest.entity_ids("person") == {"P1", "P2"}
+        assert manifest.get("person", "P1") == ("json-fingerprint", "html-fingerprint")
+        assert manifest.get("person", "P2") == ("json-fingerprint", None)
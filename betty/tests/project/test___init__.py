@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Self, Sequence
 
@@ -12,6 +13,7 @@ import betty.ancestry.place
 from betty.ancestry import Ancestry
 from betty.app import App
 from betty.app.factory import AppDependentFactory
+from betty.image import ImageDerivativePlanner
 from betty.json.schema import JsonSchemaSchema
 from betty.plugin import CyclicDependencyError
 from betty.plugin.config import PluginConfiguration, PluginInstanceConfiguration
@@ -23,6 +25,7 @@ from betty.project import (
     ProjectExtensions,
     ProjectContext,
 )
+from betty.project.generate.file import Precompressor
 from betty.project.config import (
     CopyrightNoticeConfiguration,
     LicenseConfiguration,
@@ -500,6 +503,40 @@ class TestProjectContext:
             sut = ProjectContext(project)
             assert sut.project is project
 
+    async def test_precompressor(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            precompressor = Precompressor()
+            sut = ProjectContext(project, precompressor=precompressor)
+            assert sut.precompressor is precompressor
+
+    async def test_precompressor_without_precompressor(
+        self, new_temporary_app: App
+    ) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            sut = ProjectContext(project)
+            assert sut.precompressor is None
+
+    async def test_start(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            start = datetime(1970, 1, 1)
+            sut = ProjectContext(project, start=start)
+            assert sut.start == start
+
+    async def test_image_derivative_planner(self, new_temporary_app: App) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            image_derivative_planner = ImageDerivativePlanner()
+            sut = ProjectContext(
+                project, image_derivative_planner=image_derivative_planner
+            )
+            assert sut.image_derivative_planner is image_derivative_planner
+
+    async def test_image_derivative_planner_without_image_derivative_planner(
+        self, new_temporary_app: App
+    ) -> None:
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            sut = ProjectContext(project)
+            assert sut.image_derivative_planner is None
+
 
 class TestProjectEvent:
     async def test_project(self, new_temporary_app: App) -> None:
@@ -1103,6 +1103,25 @@ class TestProjectConfiguration:
         sut.clean_urls = clean_urls
         assert sut.clean_urls == clean_urls
 
+    async def test_compress_sitemaps(self, tmp_path: Path) -> None:
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        compress_sitemaps = True
+        sut.compress_sitemaps = compress_sitemaps
+        assert sut.compress_sitemaps == compress_sitemaps
+
+    async def test_image_formats(self, tmp_path: Path) -> None:
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        image_formats = ("webp", "avif")
+        sut.image_formats = image_formats
+        assert sut.image_formats == image_formats
+
+    async def test_image_formats_with_unsupported_image_format(
+        self, tmp_path: Path
+    ) -> None:
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        with pytest.raises(AssertionFailed):
+            sut.image_formats = ["bmp"]
+
     async def test_author_without_author(self, tmp_path: Path) -> None:
         sut = await ProjectConfiguration.new(tmp_path / "betty.json")
         assert not sut.author
@@ -1157,6 +1176,8 @@ class TestProjectConfiguration:
         assert not sut.author
         assert not sut.debug
         assert not sut.clean_urls
+        assert not sut.compress_sitemaps
+        assert not sut.image_formats
 
     async def test_load_should_load_name(self, tmp_path: Path) -> None:
         name = "my-first-betty-site"
@@ -1270,6 +1291,30 @@ class TestProjectConfiguration:
         sut.load(dump)
         assert sut.clean_urls == clean_urls
 
+    async def test_load_should_compress_sitemaps(self, tmp_path: Path) -> None:
+        compress_sitemaps = True
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        dump = sut.dump()
+        dump["compress_sitemaps"] = compress_sitemaps
+        sut.load(dump)
+        assert sut.compress_sitemaps == compress_sitemaps
+
+    async def test_load_should_load_image_formats(self, tmp_path: Path) -> None:
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        dump = sut.dump()
+        dump["image_formats"] = ["webp"]
+        sut.load(dump)
+        assert sut.image_formats == ("webp",)
+
+    async def test_load_with_unsupported_image_format_should_error(
+        self, tmp_path: Path
+    ) -> None:
+        sut = await ProjectConfiguration.new(tmp_path / "betty.json")
+        dump = sut.dump()
+        dump["image_formats"] = ["bmp"]
+        with raises_error(error_type=AssertionFailed):
+            sut.load(dump)
+
     @pytest.mark.parametrize(
         "debug",
         [
@@ -1,21 +1,163 @@
+from __future__ import annotations
+
+from typing import Any, TYPE_CHECKING
+
 import pytest
 from multidict import CIMultiDict
+from typing_extensions import override
 
 from betty.ancestry.link import Link, HasLinks
 from betty.app import App
+from betty.app.config import AppConfiguration
+from betty.cache.file import PickledFileCache
 from betty.fetch import FetchResponse
 from betty.fetch.static import StaticFetcher
 from betty.locale.localizer import DEFAULT_LOCALIZER
 from betty.project import Project
-from betty.project.load import load
+from betty.project.config import ProjectConfiguration
+from betty.plugin.static import StaticPluginRepository
+from betty.project.load import load, LoadAncestryEvent, AncestryInputsProvider
 from betty.test_utils.model import DummyEntity
+from betty.test_utils.project.extension import DummyExtension
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from pytest_mock import MockerFixture
+    from betty.event_dispatcher import EventHandlerRegistry
+    from betty.project.extension import Extension
 
 
 class DummyHasLinks(HasLinks, DummyEntity):
     pass
 
 
+async def _load_ancestry(event: LoadAncestryEvent) -> None:
+    event.project.ancestry.add(DummyEntity("E0002"))
+
+
+class _LoadAncestryExtension(DummyExtension):
+    @override
+    def register_event_handlers(self, registry: EventHandlerRegistry) -> None:
+        registry.add_handler(LoadAncestryEvent, _load_ancestry)
+
+
+class _LoadAncestryWithAncestryInputsExtension(
+    _LoadAncestryExtension, AncestryInputsProvider
+):
+    @override
+    async def fingerprint_ancestry_inputs(self) -> str:
+        return "inputs"
+
+
 class TestLoad:
+    @pytest.fixture
+    def _extensions(self, mocker: MockerFixture) -> None:
+        mocker.patch(
+            "betty.project.extension.EXTENSION_REPOSITORY",
+            new=StaticPluginRepository(
+                _LoadAncestryExtension, _LoadAncestryWithAncestryInputsExtension
+            ),
+        )
+
+    async def _load_with_cache(
+        self,
+        tmp_path: Path,
+        configuration: ProjectConfiguration,
+        *,
+        snapshot: bool = True,
+        extension: type[Extension] | None = None,
+    ) -> tuple[int, Project]:
+        load_count = 0
+
+        async def _load_ancestry(event: LoadAncestryEvent) -> None:
+            nonlocal load_count
+            load_count += 1
+            event.project.ancestry.add(DummyEntity("E0001"))
+
+        async with (
+            App(
+                AppConfiguration(),
+                tmp_path / "cache",
+                cache_factory=lambda app: PickledFileCache[Any](tmp_path / "cache"),
+            ) as app,
+            Project.new_temporary(app, configuration=configuration) as project,
+        ):
+            if extension is not None:
+                await project.configuration.extensions.enable(extension)
+            async with project:
+                project.event_dispatcher.add_handler(LoadAncestryEvent, _load_ancestry)
+                await load(project, snapshot=snapshot)
+        return load_count, project
+
+    async def test_should_store_and_restore_ancestry_snapshot(
+        self, tmp_path: Path
+    ) -> None:
+        configuration = await ProjectConfiguration.new(tmp_path / "betty.json")
+        load_count, project = await self._load_with_cache(tmp_path, configuration)
+        assert load_count == 1
+        assert "E0001" in project.ancestry[DummyEntity]
+
+        load_count, project = await self._load_with_cache(tmp_path, configuration)
+        assert load_count == 0
+        assert "E0001" in project.ancestry[DummyEntity]
+
+    async def test_should_not_restore_ancestry_snapshot_with_changed_configuration(
+        self, tmp_path: Path
+    ) -> None:
+        configuration = await ProjectConfiguration.new(tmp_path / "betty.json")
+        await self._load_with_cache(tmp_path, configuration)
+
+        configuration.lifetime_threshold += 1
+        load_count, project = await self._load_with_cache(tmp_path, configuration)
+        assert load_count == 1
+        assert "E0001" in project.ancestry[DummyEntity]
+
+    async def test_should_not_restore_ancestry_snapshot_without_snapshot(
+        self, tmp_path: Path
+    ) -> None:
+        configuration = await ProjectConfiguration.new(tmp_path / "betty.json")
+        await self._load_with_cache(tmp_path, configuration)
+
+        load_count, project = await self._load_with_cache(
+            tmp_path, configuration, snapshot=False
+        )
+        assert load_count == 1
+        assert "E0001" in project.ancestry[DummyEntity]
+
+    @pytest.mark.usefixtures("_extensions")
+    async def test_should_restore_ancestry_snapshot_with_ancestry_inputs_provider(
+        self, tmp_path: Path
+    ) -> None:
+        configuration = await ProjectConfiguration.new(tmp_path / "betty.json")
+        await self._load_with_cache(
+            tmp_path,
+            configuration,
+            extension=_LoadAncestryWithAncestryInputsExtension,
+        )
+
+        load_count, project = await self._load_with_cache(
+            tmp_path,
+            configuration,
+            extension=_LoadAncestryWithAncestryInputsExtension,
+        )
+        assert load_count == 0
+        assert "E0002" in project.ancestry[DummyEntity]
+
+    @pytest.mark.usefixtures("_extensions")
+    async def test_should_not_restore_ancestry_snapshot_without_ancestry_inputs_provider(
+        self, tmp_path: Path
+    ) -> None:
+        configuration = await ProjectConfiguration.new(tmp_path / "betty.json")
+        await self._load_with_cache(
+            tmp_path, configuration, extension=_LoadAncestryExtension
+        )
+
+        load_count, project = await self._load_with_cache(
+            tmp_path, configuration, extension=_LoadAncestryExtension
+        )
+        assert load_count == 1
+        assert "E0002" in project.ancestry[DummyEntity]
+
     async def test_should_fetch_link_with_unsupported_content_type(self) -> None:
         link_url = "https://example.com"
         link = Link(link_url)
@@ -181,3 +323,34 @@ class TestLoad:
                 link.description.localize(DEFAULT_LOCALIZER)
                 == link_page_meta_description
             )
+
+    async def test_should_fetch_link_url_once(self, mocker: MockerFixture) -> None:
+        link_url = "https://example.com"
+        link_page_title = "Hello, world!"
+        link_page_html = (
+            f"<html><head><title>{link_page_title}</title></head><body></body></html>"
+        )
+        links = [Link(link_url), Link(link_url)]
+        fetcher = StaticFetcher(
+            fetch_map={
+                link_url: FetchResponse(
+                    CIMultiDict({"Content-Type": "text/html"}),
+                    link_page_html.encode("utf-8"),
+                    "utf-8",
+                )
+            }
+        )
+        fetch_spy = mocker.spy(fetcher, "fetch")
+        async with (
+            App.new_temporary(fetcher=fetcher) as app,
+            app,
+            Project.new_temporary(app) as project,
+        ):
+            for link in links:
+                project.ancestry.add(DummyHasLinks(links=[link]))
+            async with project:
+                await load(project)
+
+            for link in links:
+                assert link.label.localize(DEFAULT_LOCALIZER) == link_page_title
+            fetch_spy.assert_called_once_with(link_url)
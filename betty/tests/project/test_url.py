@@ -166,6 +166,36 @@ class TestLocalizedUrlGenerator:
                     sut.generate(resource, media_type, absolute=absolute, locale=locale)
                     == expected
                 )
+                # Assert that repeated generation returns the same URL.
+                assert (
+                    sut.generate(resource, media_type, absolute=absolute, locale=locale)
+                    == expected
+                )
+
+    async def test_generate_should_generate_entity_urls_once(
+        self, new_temporary_app: App, mocker: MockerFixture
+    ) -> None:
+        mocker.patch(
+            "betty.model.ENTITY_TYPE_REPOSITORY",
+            new=StaticPluginRepository(DummyEntity),
+        )
+        async with Project.new_temporary(new_temporary_app) as project, project:
+            sut = await LocalizedUrlGenerator.new_for_project(project)
+            m_upstream_generate = mocker.spy(sut._upstream, "generate")
+            entity = DummyEntity(id="my-first-entity")
+            same_entity = DummyEntity(id="my-first-entity")
+            other_entity = DummyEntity(id="my-second-entity")
+            expected = "/dummy-entity/my-first-entity/index.html"
+            assert sut.generate(entity, HTML) == expected
+            assert sut.generate(entity, HTML) == expected
+            assert sut.generate(same_entity, HTML) == expected
+            assert m_upstream_generate.call_count == 1
+            assert (
+                sut.generate(other_entity, HTML)
+                == "/dummy-entity/my-second-entity/index.html"
+            )
+            assert sut.generate(entity, HTML, absolute=True).startswith("http")
+            assert m_upstream_generate.call_count == 3
 
 
 class TestStaticUrlGenerator:
@@ -1,7 +1,29 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Any
+
 import pytest
 from PIL import Image, ImageDraw
 
-from betty.image import resize_cover, FocusArea, Size, Pixel
+from betty import image
+from betty.cache.file import BinaryFileCache
+from betty.image import (
+    resize_cover,
+    FocusArea,
+    Size,
+    Pixel,
+    ImageDerivative,
+    ImageDerivativePlanner,
+    generate_image_derivatives,
+    read_image_size,
+)
+from betty.media_type import MediaType
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from unittest.mock import MagicMock
+    from pytest_mock import MockerFixture
 
 
 class TestResizeCover:
@@ -97,3 +119,290 @@ class TestResizeCover:
             # Assert the pixel left of the bottom-left pixel.
             if expected_focus[0] > 0:
                 assert actual.getpixel((expected_focus[0] - 1, expected_focus[3])) == 0
+
+
+def _new_image_derivative(
+    tmp_path: Path,
+    source_file_path: Path,
+    name: str,
+    size: Size | None,
+    *,
+    focus: FocusArea | None = None,
+    media_type: MediaType = MediaType("image/jpeg"),  # noqa B008
+) -> ImageDerivative:
+    return ImageDerivative(
+        source_file_path,
+        media_type,
+        tmp_path / "www" / name,
+        tmp_path / "cache" / name,
+        size,
+        focus,
+        media_type.subtype,
+    )
+
+
+def _new_pdf_image_derivative(
+    tmp_path: Path, name: str, size: Size | None
+) -> ImageDerivative:
+    return ImageDerivative(
+        tmp_path / "source.pdf",
+        MediaType("application/pdf"),
+        tmp_path / "www" / name,
+        tmp_path / "cache" / name,
+        size,
+        None,
+        "jpeg",
+        tmp_path / "cache" / "pdf",
+    )
+
+
+def _mock_pdf2image(mocker: MockerFixture) -> MagicMock:
+    """
+    Mock Poppler, by rasterizing a US Letter page of 612 x 792 points.
+    """
+
+    def _convert_from_path(*args: Any, dpi: int, **kwargs: Any) -> list[Image.Image]:
+        return [
+            Image.new(
+                "RGB",
+                (math.ceil(612 * dpi / 72), math.ceil(792 * dpi / 72)),
+                (255, 0, 0),
+            )
+        ]
+
+    mocker.patch(
+        "betty.image.pdfinfo_from_path",
+        return_value={"Pages": 200, "Page size": "612 x 792 pts (letter)"},
+    )
+    return mocker.patch("betty.image.convert_from_path", side_effect=_convert_from_path)
+
+
+def _image_size(image_file_path: Path) -> tuple[Pixel, Pixel]:
+    image = Image.open(image_file_path)
+    try:
+        return image.size
+    finally:
+        image.close()
+
+
+def _new_source_image(tmp_path: Path, size: tuple[Pixel, Pixel]) -> Path:
+    source_file_path = tmp_path / "source.jpg"
+    Image.new("RGB", size, (255, 0, 0)).save(source_file_path, format="jpeg")
+    return source_file_path
+
+
+class TestImageDerivative:
+    pass
+
+
+class TestImageDerivativePlanner:
+    async def test_plan(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", (10, 10)
+        )
+        sut = ImageDerivativePlanner()
+        sut.plan(derivative, derivative)
+        assert sut.pop_derivatives() == [derivative]
+
+    async def test_pop_derivatives(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", (10, 10)
+        )
+        sut = ImageDerivativePlanner()
+        sut.plan(derivative)
+        assert sut.pop_derivatives() == [derivative]
+        assert sut.pop_derivatives() == []
+
+    async def test_generate(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        load_image_spy = mocker.spy(image, "_load_image")
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivatives = [
+            _new_image_derivative(
+                tmp_path, source_file_path, "derivative-10x10.jpg", (10, 10)
+            ),
+            _new_image_derivative(
+                tmp_path, source_file_path, "derivative-20x-.jpg", (20, None)
+            ),
+            _new_image_derivative(
+                tmp_path,
+                source_file_path,
+                "derivative-30x30-0x0x50x50.jpg",
+                (30, 30),
+                focus=(0, 0, 50, 50),
+            ),
+        ]
+        sut = ImageDerivativePlanner()
+        sut.plan(*derivatives)
+        await sut.generate()
+        load_image_spy.assert_called_once()
+        for derivative in derivatives:
+            assert derivative.destination_file_path.exists()
+        assert sut.pop_derivatives() == []
+
+    async def test_generate_with_cache(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivatives = [
+            _new_image_derivative(
+                tmp_path, source_file_path, "derivative-10x10.jpg", (10, 10)
+            ),
+            _new_image_derivative(
+                tmp_path, source_file_path, "derivative-20x20.jpg", (20, 20)
+            ),
+        ]
+        # The cache's maximum size fits one derivative only.
+        sut = ImageDerivativePlanner(
+            cache=BinaryFileCache(tmp_path / "cache", max_size=1)
+        )
+        sut.plan(*derivatives)
+        await sut.generate()
+        for derivative in derivatives:
+            assert derivative.destination_file_path.exists()
+        assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+class TestReadImageSize:
+    async def test(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 50))
+        assert read_image_size(source_file_path, MediaType("image/jpeg")) == (100, 50)
+
+    async def test_with_pdf(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        convert_from_path = _mock_pdf2image(mocker)
+        assert read_image_size(
+            tmp_path / "source.pdf", MediaType("application/pdf")
+        ) == (612, 792)
+        convert_from_path.assert_not_called()
+
+
+class TestGenerateImageDerivatives:
+    async def test(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", (10, 20)
+        )
+        generate_image_derivatives([derivative])
+        assert _image_size(derivative.destination_file_path) == (10, 20)
+        assert derivative.cache_item_file_path.exists()
+
+    async def test_without_size(self, tmp_path: Path) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", None
+        )
+        generate_image_derivatives([derivative])
+        assert (
+            derivative.destination_file_path.read_bytes()
+            == source_file_path.read_bytes()
+        )
+
+    async def test_with_cached_derivative(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        source_file_path = _new_source_image(tmp_path, (100, 100))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", (10, 10)
+        )
+        generate_image_derivatives([derivative])
+        derivative.destination_file_path.unlink()
+        load_image_spy = mocker.spy(image, "_load_image")
+        generate_image_derivatives([derivative])
+        load_image_spy.assert_not_called()
+        assert derivative.destination_file_path.exists()
+
+    @pytest.mark.parametrize(
+        ("expected_size", "expected_decoded_size", "size", "focus"),
+        [
+            ((80, 60), (100, 75), (80, 60), None),
+            ((80, 80), (200, 150), (80, 80), (0, 0, 50, 50)),
+            # One-dimensional sizes keep the source's size in the other dimension, so they cannot be downscaled.
+            ((80, 600), (800, 600), (80, None), None),
+        ],
+    )
+    async def test_should_downscale_while_decoding(
+        self,
+        mocker: MockerFixture,
+        tmp_path: Path,
+        expected_size: tuple[Pixel, Pixel],
+        expected_decoded_size: tuple[Pixel, Pixel],
+        size: Size,
+        focus: FocusArea | None,
+    ) -> None:
+        crop_spy = mocker.spy(Image.Image, "crop")
+        source_file_path = _new_source_image(tmp_path, (800, 600))
+        derivative = _new_image_derivative(
+            tmp_path, source_file_path, "derivative.jpg", size, focus=focus
+        )
+        generate_image_derivatives([derivative])
+        assert _image_size(derivative.destination_file_path) == expected_size
+        assert crop_spy.call_args.args[0].size == expected_decoded_size
+
+    async def test_should_reduce_non_jpeg_images(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        reduce_spy = mocker.spy(Image.Image, "reduce")
+        source_file_path = tmp_path / "source.png"
+        Image.new("RGB", (800, 600), (255, 0, 0)).save(source_file_path, format="png")
+        derivative = _new_image_derivative(
+            tmp_path,
+            source_file_path,
+            "derivative.png",
+            (80, 60),
+            media_type=MediaType("image/png"),
+        )
+        generate_image_derivatives([derivative])
+        reduce_spy.assert_called_once()
+        assert _image_size(derivative.destination_file_path) == (80, 60)
+
+    @pytest.mark.parametrize(
+        ("expected_dpi", "size"),
+        [
+            (8, (61, 79)),
+            (144, (1224, 1584)),
+            (200, (5000, 5000)),
+            # One-dimensional sizes keep the source's size in the other dimension, so they cannot be downscaled.
+            (200, (61, None)),
+        ],
+    )
+    async def test_with_pdf(
+        self,
+        mocker: MockerFixture,
+        tmp_path: Path,
+        expected_dpi: int,
+        size: Size,
+    ) -> None:
+        convert_from_path = _mock_pdf2image(mocker)
+        derivative = _new_pdf_image_derivative(tmp_path, "derivative.jpg", size)
+        generate_image_derivatives([derivative])
+        convert_from_path.assert_called_once_with(
+            derivative.source_file_path, dpi=expected_dpi, first_page=1, last_page=1
+        )
+        assert derivative.destination_file_path.exists()
+        assert derivative.source_cache_item_file_path
+        assert derivative.source_cache_item_file_path.exists()
+
+    async def test_with_pdf_should_reuse_rasterized_page(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        convert_from_path = _mock_pdf2image(mocker)
+        generate_image_derivatives(
+            [_new_pdf_image_derivative(tmp_path, "derivative-1.jpg", (610, 790))]
+        )
+        convert_from_path.reset_mock()
+        derivative = _new_pdf_image_derivative(tmp_path, "derivative-2.jpg", (61, 79))
+        generate_image_derivatives([derivative])
+        convert_from_path.assert_not_called()
+        assert _image_size(derivative.destination_file_path) == (61, 79)
+
+    async def test_with_pdf_should_rasterize_page_for_larger_sizes(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        convert_from_path = _mock_pdf2image(mocker)
+        generate_image_derivatives(
+            [_new_pdf_image_derivative(tmp_path, "derivative-1.jpg", (61, 79))]
+        )
+        convert_from_path.reset_mock()
+        derivative = _new_pdf_image_derivative(tmp_path, "derivative-2.jpg", (610, 790))
+        generate_image_derivatives([derivative])
+        convert_from_path.assert_called_once()
+        assert _image_size(derivative.destination_file_path) == (610, 790)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime
+
 from betty.job import Context
 
 
@@ -11,3 +13,8 @@ class TestContext:
     async def test_start(self) -> None:
         sut = Context()
         sut.start  # noqa B018
+
+    async def test_start_with_start(self) -> None:
+        start = datetime(1970, 1, 1)
+        sut = Context(start=start)
+        assert sut.start == start
@@ -1,10 +1,16 @@
 from pathlib import Path
 
 import aiofiles
+import pytest
 from aiofiles.tempfile import TemporaryDirectory
 from pytest_mock import MockerFixture
 
-from betty.os import link_or_copy, copy_tree
+from betty.os import (
+    link_or_copy,
+    copy_tree,
+    open_file_atomically,
+    write_file_atomically,
+)
 
 
 class TestLinkOrCopy:
@@ -82,3 +88,67 @@ class TestCopyTree:
 
             await copy_tree(source_path, destination_path, file_callback=_file_callback)
             assert tracker[destination_path / "content"] == content
+
+
+class TestWriteFileAtomically:
+    def test(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        write_file_atomically(file_path, b"Hello, world!")
+        write_file_atomically(file_path, b"Hello, other world!")
+        assert file_path.read_bytes() == b"Hello, other world!"
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_with_modified(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        write_file_atomically(file_path, b"Hello, world!", modified=123456789)
+        assert file_path.stat().st_mtime == 123456789
+
+    def test_with_mode(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        write_file_atomically(file_path, b"Hello, world!", mode=0o644)
+        assert file_path.stat().st_mode & 0o777 == 0o644
+
+    def test_should_keep_hard_links_intact(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        link_path = tmp_path / "link"
+        file_path.write_bytes(b"Hello, world!")
+        link_path.hardlink_to(file_path)
+        write_file_atomically(file_path, b"Hello, other world!")
+        assert link_path.read_bytes() == b"Hello, world!"
+
+
+class TestOpenFileAtomically:
+    def test(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        file_path.write_bytes(b"Hello, world!")
+        with open_file_atomically(file_path) as f:
+            f.write(b"Hello, ")
+            f.write(b"other world!")
+            assert file_path.read_bytes() == b"Hello, world!"
+        assert file_path.read_bytes() == b"Hello, other world!"
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_with_error(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        file_path.write_bytes(b"Hello, world!")
+
+        def _write() -> None:
+            with open_file_atomically(file_path) as f:
+                f.write(b"Hello, other world!")
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            _write()
+        assert file_path.read_bytes() == b"Hello, world!"
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_with_keep_identical(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file"
+        write_file_atomically(file_path, b"Hello, world!", modified=123456789)
+        with open_file_atomically(file_path, keep_identical=True) as f:
+            f.write(b"Hello, world!")
+        assert file_path.stat().st_mtime == 123456789
+        with open_file_atomically(file_path, keep_identical=True) as f:
+            f.write(b"Hello, other world!")
+        assert file_path.read_bytes() == b"Hello, other world!"
+        assert list(tmp_path.iterdir()) == [file_path]
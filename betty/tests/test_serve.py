@@ -1,3 +1,6 @@
+import gzip
+from pathlib import Path
+
 import aiofiles
 import requests
 from aiofiles.os import makedirs
@@ -7,7 +10,8 @@ from requests import Response
 from betty.app import App
 from betty.functools import Do
 from betty.project import Project
-from betty.serve import BuiltinProjectServer
+from betty.locale.localizer import DEFAULT_LOCALIZER
+from betty.serve import BuiltinProjectServer, BuiltinServer
 
 
 class TestBuiltinProjectServer:
@@ -28,3 +32,42 @@ class TestBuiltinProjectServer:
                     assert response.headers["Cache-Control"] == "no-cache"
 
                 await Do(requests.get, server.public_url).until(_assert_response)
+
+
+class TestBuiltinServer:
+    async def test_should_serve_precompressed_variants(self, tmp_path: Path) -> None:
+        content = b"Hello, and welcome to my site!"
+        (tmp_path / "index.html").write_bytes(content)
+        (tmp_path / "index.html.gz").write_bytes(gzip.compress(content))
+        async with BuiltinServer(tmp_path, localizer=DEFAULT_LOCALIZER) as server:
+
+            def _assert_response(response: Response) -> None:
+                assert response.status_code == 200
+                assert response.content == content
+                assert response.headers["Content-Encoding"] == "gzip"
+                assert response.headers["Content-Type"] == "text/html"
+
+            await Do(
+                requests.get,
+                f"{server.public_url}/",
+                headers={"Accept-Encoding": "gzip"},
+            ).until(_assert_response)
+
+    async def test_should_not_serve_unaccepted_precompressed_variants(
+        self, tmp_path: Path
+    ) -> None:
+        content = b"Hello, and welcome to my site!"
+        (tmp_path / "index.html").write_bytes(content)
+        (tmp_path / "index.html.gz").write_bytes(gzip.compress(content))
+        async with BuiltinServer(tmp_path, localizer=DEFAULT_LOCALIZER) as server:
+
+            def _assert_response(response: Response) -> None:
+                assert response.status_code == 200
+                assert response.content == content
+                assert "Content-Encoding" not in response.headers
+
+            await Do(
+                requests.get,
+                f"{server.public_url}/index.html",
+                headers={"Accept-Encoding": "gzip;q=0, identity"},
+            ).until(_assert_response)